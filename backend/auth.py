@@ -1,4 +1,9 @@
 
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import Request, HTTPException
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -6,9 +11,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
-import sqlite3
 from backend.models import TokenData, User
-from backend.database import create_connection
+from backend import repositories
+from backend.auth_cache import principal_cache, get_cached
 
 TOKEN = "supersecret"
 
@@ -24,12 +29,79 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Hash/verifikasi bcrypt memakan 100-300 ms CPU. Dijalankan di executor khusus
+# yang ukurannya dibatasi agar lonjakan login tidak membekukan event loop
+# (konsol WebSocket, API lain), dan ditolak cepat jika antrean sudah penuh.
+PASSWORD_HASH_WORKERS = 4
+PASSWORD_HASH_MAX_PENDING = 32
+PASSWORD_HASH_LATENCY_SAMPLES = 1000
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies_ms = deque(maxlen=PASSWORD_HASH_LATENCY_SAMPLES)
+        self.completed = 0
+        self.rejected = 0
+
+    def _timed(self, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._latencies_ms.append(elapsed_ms)
+                self.completed += 1
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server sedang sibuk memproses login, coba lagi sebentar lagi.",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._latencies_ms)
+            pending = self._pending
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 1) if samples else None
+        return {
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_ms_p50": pct(50),
+            "latency_ms_p99": pct(99),
+        }
+
+password_hasher = PasswordHasher()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -40,14 +112,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_user(db, username: str):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    user_data = cursor.fetchone()
+def get_user(username: str):
+    user_data = repositories.users.get_by_username(username)
     if user_data:
-        return {"username": user_data[1], "hashed_password": user_data[2], "server_path": user_data[3]}
+        return {"username": user_data["username"], "hashed_password": user_data["hashed_password"], "server_path": user_data["server_path"]}
     return None
 
+def get_cached_user(username: str):
+    """Sama seperti get_user, tetapi memakai principal cache untuk request yang sudah terotentikasi."""
+    return get_cached(principal_cache, username, lambda: get_user(username))
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -62,13 +136,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(username=str(username))
     except JWTError:
         raise credentials_exception
-    
-    conn = create_connection()
+
     if token_data.username is None:
         raise credentials_exception
-    user = get_user(conn, username=token_data.username)
-    if conn is not None:
-        conn.close()
+    user = get_cached_user(token_data.username)
 
     if user is None:
         raise credentials_exception
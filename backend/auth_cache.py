@@ -0,0 +1,96 @@
+# Cache in-process untuk data otentikasi.
+# get_current_user dan get_server_details dipanggil di hampir setiap request
+# (termasuk polling status tiap detik), jadi hasil lookup pengguna dan
+# kepemilikan server disimpan sebentar di memori. Entri dihapus secara eksplisit
+# saat registrasi, pembuatan, dan penghapusan server.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+PRINCIPAL_CACHE_SIZE = 10000
+PRINCIPAL_TTL_SECONDS = 60
+OWNERSHIP_CACHE_SIZE = 50000
+OWNERSHIP_TTL_SECONDS = 60
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU berbatas dengan masa berlaku per entri. Aman dipakai dari banyak thread."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "ttl_seconds": self.ttl,
+                    "hits": self.hits, "misses": self.misses}
+
+
+# Key: username, Value: dict pengguna (username, hashed_password, server_path)
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_TTL_SECONDS)
+# Key: (username, server_id), Value: dict server (id, path, version)
+ownership_cache = TTLCache(OWNERSHIP_CACHE_SIZE, OWNERSHIP_TTL_SECONDS)
+
+
+def get_cached(cache: TTLCache, key: Hashable, loader: Callable[[], Optional[dict]]) -> Optional[dict]:
+    """Ambil dari cache, atau panggil loader dan simpan hasilnya jika ditemukan."""
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = loader()
+    if value is not None:
+        cache.set(key, value)
+    return value
+
+
+def invalidate_user(username: str):
+    principal_cache.invalidate(username)
+    ownership_cache.invalidate_where(lambda key: key[0] == username)
+
+
+def invalidate_server(server_id: int, username: Optional[str] = None):
+    if username is not None:
+        ownership_cache.invalidate((username, server_id))
+    else:
+        ownership_cache.invalidate_where(lambda key: key[1] == server_id)
@@ -0,0 +1,381 @@
+# Penyimpanan log konsol terstruktur per server.
+# Setiap baris dari pipeline log diurai (waktu, thread, level, sumber, pesan, serta pemain
+# dan jenis event: join, leave, chat, death, lag "Can't keep up!") lalu dimasukkan per batch
+# ke console_logs/<server_id>.db: tabel lines dengan indeks per waktu, level, event, dan
+# pemain, plus indeks FTS5 atas pesan. Pertanyaan seperti "semua peringatan lag minggu
+# ini" cukup membaca indeks (event, ts), tanpa membuka file log.
+# Penguraian dan penulisan dilakukan satu thread penulis, jadi event loop hanya menaruh
+# batch ke antrean. Arsip logs/*.log.gz bisa diimpor sekali; baris arsip yang waktunya
+# sudah tercakup aliran langsung dilewati agar tidak ganda.
+
+import glob
+import gzip
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from backend.utils.log_parser import EVENTS, LogLineParser, archive_date
+
+CONSOLE_LOG_DIR = "console_logs"
+RETENTION_DAYS = 30
+RETENTION_CHECK_SECONDS = 3600
+MAX_PENDING_BATCHES = 2000   # Batch dari pipeline yang menunggu ditulis; lebih dari ini dibuang
+IMPORT_BATCH_SIZE = 5000
+MAX_PAGE_SIZE = 1000
+LIVE_ORIGIN = "live"
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS lines (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        level TEXT,
+        thread TEXT,
+        source TEXT,
+        player TEXT COLLATE NOCASE,
+        event TEXT,
+        lag_ms INTEGER,
+        message TEXT NOT NULL,
+        origin TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_lines_ts ON lines (ts)",
+    "CREATE INDEX IF NOT EXISTS idx_lines_level ON lines (level, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_lines_event ON lines (event, ts) WHERE event IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_lines_player ON lines (player, ts) WHERE player IS NOT NULL",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(message, content='lines', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS lines_ad AFTER DELETE ON lines BEGIN
+        INSERT INTO lines_fts (lines_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END""",
+    # Arsip .log.gz yang sudah diimpor
+    """CREATE TABLE IF NOT EXISTS imports (
+        name TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        lines INTEGER NOT NULL,
+        imported_at REAL NOT NULL
+    )""",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+INSERT_SQL = ("INSERT INTO lines (ts, level, thread, source, player, event, lag_ms, message, origin) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class ConsoleLogError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _insert(conn: sqlite3.Connection, rows: List[tuple]):
+    # Indeks FTS diisi sekali per batch, bukan lewat trigger per baris (sekitar 3x lebih cepat)
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM lines").fetchone()[0]
+    conn.executemany(INSERT_SQL, rows)
+    conn.execute("INSERT INTO lines_fts (rowid, message) SELECT id, message FROM lines WHERE id > ?", (last_id,))
+
+
+def _row(record: dict, origin: str) -> tuple:
+    return (record["ts"], record["level"], record["thread"], record["source"], record["player"],
+            record["event"], record["lag_ms"], record["message"], origin)
+
+
+class ConsoleLogStore:
+    def __init__(self, log_dir: str = CONSOLE_LOG_DIR, retention_days: float = RETENTION_DAYS):
+        self.log_dir = log_dir
+        self.retention_seconds = retention_days * 86400
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=MAX_PENDING_BATCHES)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Hanya disentuh thread penulis
+        self._parsers: Dict[int, LogLineParser] = {}
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._last_retention: Dict[int, float] = {}
+        self._imports: Dict[int, dict] = {}
+        self._schema_ready = set()
+        self.stats_counters = {"lines": 0, "batches": 0, "dropped_batches": 0, "write_seconds": 0.0}
+
+    def db_path(self, server_id: int) -> str:
+        return os.path.join(self.log_dir, f"{server_id}.db")
+
+    def connect(self, server_id: int) -> sqlite3.Connection:
+        os.makedirs(self.log_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path(server_id), timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if server_id not in self._schema_ready:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._schema_ready.add(server_id)
+        return conn
+
+    # --- Penulisan ---
+
+    def ingest(self, server_id: int, lines: List[str]):
+        """Dipanggil dari sink pipeline log (event loop). Tidak pernah memblokir."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(("lines", server_id, lines, time.time()))
+        except queue.Full:
+            self.stats_counters["dropped_batches"] += 1
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="console-log-writer", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            # Kumpulkan semua batch yang sudah menunggu agar satu transaksi per server
+            items = [item]
+            while len(items) < MAX_PENDING_BATCHES:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            started = time.monotonic()
+            pending: Dict[int, List[tuple]] = {}
+            for kind, server_id, *args in items:
+                if kind == "lines":
+                    lines, received_at = args
+                    parser = self._parsers.setdefault(server_id, LogLineParser())
+                    rows = pending.setdefault(server_id, [])
+                    for line in lines:
+                        record = parser.parse(line, received_at)
+                        if record is not None:
+                            rows.append(_row(record, LIVE_ORIGIN))
+                elif kind == "drop":
+                    pending.pop(server_id, None)
+                    self._close(server_id)
+                    args[0].set()
+                elif kind == "flush":
+                    self._write(pending)
+                    pending.clear()
+                    args[0].set()
+            self._write(pending)
+            self.stats_counters["write_seconds"] += time.monotonic() - started
+
+    def _write(self, pending: Dict[int, List[tuple]]):
+        for server_id, rows in pending.items():
+            if not rows:
+                continue
+            try:
+                conn = self._connections.get(server_id)
+                if conn is None:
+                    conn = self._connections[server_id] = self.connect(server_id)
+                with conn:
+                    _insert(conn, rows)
+                    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('live_since', ?)", (str(rows[0][0]),))
+                self.stats_counters["lines"] += len(rows)
+                self.stats_counters["batches"] += 1
+                self._apply_retention(server_id, conn)
+            except sqlite3.Error as e:
+                print(f"Gagal menyimpan log konsol server {server_id}: {e}")
+
+    def _apply_retention(self, server_id: int, conn: sqlite3.Connection):
+        now = time.time()
+        if now - self._last_retention.get(server_id, 0) < RETENTION_CHECK_SECONDS:
+            return
+        self._last_retention[server_id] = now
+        with conn:
+            conn.execute("DELETE FROM lines WHERE ts < ?", (now - self.retention_seconds,))
+
+    def _close(self, server_id: int):
+        self._parsers.pop(server_id, None)
+        self._last_retention.pop(server_id, None)
+        conn = self._connections.pop(server_id, None)
+        if conn is not None:
+            conn.close()
+
+    def flush(self, timeout: float = 5.0):
+        """Tunggu sampai semua batch yang sudah diantrekan tertulis (misal, saat aplikasi berhenti)."""
+        if self._worker is None or not self._worker.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("flush", 0, done))
+        done.wait(timeout)
+
+    def drop(self, server_id: int):
+        """Hapus seluruh log tersimpan server (misal, saat server dihapus)."""
+        if self._worker is not None and self._worker.is_alive():
+            done = threading.Event()
+            self._queue.put(("drop", server_id, done))
+            done.wait(10)
+        with self._lock:
+            self._imports.pop(server_id, None)
+        self._schema_ready.discard(server_id)
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.db_path(server_id) + suffix)
+            except FileNotFoundError:
+                pass
+
+    # --- Impor arsip ---
+
+    def start_import(self, server_id: int, server_path: str) -> dict:
+        with self._lock:
+            state = self._imports.get(server_id)
+            if state is not None and state["state"] == "running":
+                raise ConsoleLogError(409, "Impor log arsip sedang berjalan untuk server ini.")
+            state = self._imports[server_id] = {
+                "state": "running", "files_total": 0, "files_done": 0, "files_skipped": 0,
+                "lines": 0, "started_at": time.time(), "finished_at": None, "error": None,
+            }
+        threading.Thread(target=self._import, args=(server_id, server_path, state),
+                         name=f"console-log-import-{server_id}", daemon=True).start()
+        return dict(state)
+
+    def _import(self, server_id: int, server_path: str, state: dict):
+        conn = self.connect(server_id)
+        try:
+            archives = sorted(glob.glob(os.path.join(server_path, "logs", "*.log.gz")))
+            state["files_total"] = len(archives)
+            imported = {row["name"]: row["size"] for row in conn.execute("SELECT name, size FROM imports")}
+            live_since = conn.execute("SELECT value FROM meta WHERE key = 'live_since'").fetchone()
+            # Baris sejak aliran langsung mulai dicatat sudah ada di store
+            cutoff = float(live_since["value"]) if live_since else float("inf")
+            for path in archives:
+                name = os.path.basename(path)
+                size = os.path.getsize(path)
+                if imported.get(name) == size:
+                    state["files_skipped"] += 1
+                    state["files_done"] += 1
+                    continue
+                count = self._import_archive(conn, path, name, cutoff)
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO imports (name, size, lines, imported_at) VALUES (?, ?, ?, ?)",
+                                 (name, size, count, time.time()))
+                state["lines"] += count
+                state["files_done"] += 1
+            state["state"] = "succeeded"
+        except Exception as e:
+            state["state"], state["error"] = "failed", str(e)
+        finally:
+            conn.close()
+            state["finished_at"] = time.time()
+
+    @staticmethod
+    def _import_archive(conn: sqlite3.Connection, path: str, name: str, cutoff: float) -> int:
+        # Nama arsip bawaan memuat tanggal; selain itu pakai tanggal file terakhir diubah
+        day = archive_date(name) or datetime.fromtimestamp(os.path.getmtime(path)).date()
+        parser = LogLineParser(day)
+        # Impor ulang arsip yang berubah: buang baris lamanya dulu
+        with conn:
+            conn.execute("DELETE FROM lines WHERE origin = ?", (name,))
+        count = 0
+        rows = []
+        with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                record = parser.parse(line)
+                if record is None or record["ts"] >= cutoff:
+                    continue
+                rows.append(_row(record, name))
+                if len(rows) >= IMPORT_BATCH_SIZE:
+                    with conn:
+                        _insert(conn, rows)
+                    count += len(rows)
+                    rows = []
+        if rows:
+            with conn:
+                _insert(conn, rows)
+            count += len(rows)
+        return count
+
+    # --- Query ---
+
+    def query(
+        self,
+        server_id: int,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        levels: Optional[List[str]] = None,
+        events: Optional[List[str]] = None,
+        player: Optional[str] = None,
+        text: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> dict:
+        """Record terbaru lebih dulu. cursor = next_cursor dari halaman sebelumnya."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where, params = [], []
+        if since is not None:
+            where.append("l.ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("l.ts < ?")
+            params.append(until)
+        if levels:
+            where.append(f"l.level IN ({', '.join('?' for _ in levels)})")
+            params.extend(level.upper() for level in levels)
+        if events:
+            unknown = [event for event in events if event not in EVENTS]
+            if unknown:
+                raise ConsoleLogError(400, f"Event tidak dikenal: {', '.join(unknown)}. Pilihan: {', '.join(EVENTS)}")
+            where.append(f"l.event IN ({', '.join('?' for _ in events)})")
+            params.extend(events)
+        if player:
+            where.append("l.player = ?")
+            params.append(player)
+        if text:
+            where.append("l.id IN (SELECT rowid FROM lines_fts WHERE lines_fts MATCH ?)")
+            params.append('"' + text.replace('"', '""') + '"')
+        if cursor:
+            before_ts, before_id = self._parse_cursor(cursor)
+            where.append("(l.ts, l.id) < (?, ?)")
+            params.extend([before_ts, before_id])
+
+        sql = ("SELECT l.id, l.ts, l.level, l.thread, l.source, l.player, l.event, l.lag_ms, l.message, l.origin "
+               "FROM lines l" + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY l.ts DESC, l.id DESC LIMIT ?")
+        if not os.path.exists(self.db_path(server_id)):
+            return {"records": [], "has_more": False, "next_cursor": None}
+        conn = self.connect(server_id)
+        try:
+            rows = conn.execute(sql, params + [limit + 1]).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ConsoleLogError(400, f"Query log tidak valid: {e}")
+        finally:
+            conn.close()
+        records = [dict(row) for row in rows[:limit]]
+        has_more = len(rows) > limit
+        return {
+            "records": records,
+            "has_more": has_more,
+            "next_cursor": f"{records[-1]['ts']!r}:{records[-1]['id']}" if has_more else None,
+        }
+
+    @staticmethod
+    def _parse_cursor(cursor: str) -> Tuple[float, int]:
+        try:
+            ts, row_id = cursor.rsplit(":", 1)
+            return float(ts), int(row_id)
+        except ValueError:
+            raise ConsoleLogError(400, "Cursor tidak valid.")
+
+    def stats(self, server_id: int) -> dict:
+        with self._lock:
+            import_state = dict(self._imports[server_id]) if server_id in self._imports else None
+        summary = {"records": 0, "first_ts": None, "last_ts": None, "events": {}, "imports": [],
+                   "import_job": import_state}
+        if not os.path.exists(self.db_path(server_id)):
+            return summary
+        conn = self.connect(server_id)
+        try:
+            row = conn.execute("SELECT COUNT(*) AS records, MIN(ts) AS first_ts, MAX(ts) AS last_ts FROM lines").fetchone()
+            summary.update(dict(row))
+            summary["events"] = {r["event"]: r["count"] for r in conn.execute(
+                "SELECT event, COUNT(*) AS count FROM lines WHERE event IS NOT NULL GROUP BY event")}
+            summary["imports"] = [dict(r) for r in conn.execute("SELECT * FROM imports ORDER BY name")]
+        finally:
+            conn.close()
+        return summary
+
+
+console_logs = ConsoleLogStore()
@@ -0,0 +1,387 @@
+# Pencarian isi file (grep) di direktori server.
+# Setiap pencarian adalah job dengan id sendiri: satu thread penelusur mengumpulkan
+# kandidat file, worker pool bersama memindai isinya per blok besar dengan regex bytes
+# (loop pencocokan berjalan di C, nomor baris hanya dihitung di sekitar kecocokan),
+# dan hasilnya dialirkan ke klien lewat antrean terbatas begitu ditemukan.
+# File biner dilewati berdasarkan magic bytes/byte NUL, bukan ekstensi, dan log
+# rotasi .log.gz dibaca langsung lewat gzip tanpa diekstrak ke disk.
+
+import asyncio
+import fnmatch
+import gzip
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+SEARCH_WORKERS = 4
+MAX_ACTIVE_JOBS = 4
+FINISHED_JOBS_KEPT = 50
+READ_BLOCK_SIZE = 1024 * 1024
+SNIFF_SIZE = 8192
+MAX_LINE_CHARS = 500             # Baris yang lebih panjang dipotong di hasil
+MAX_CARRY_BYTES = 1024 * 1024    # Baris tanpa newline yang lebih panjang dari ini dipotong
+DEFAULT_MAX_FILE_SIZE = 64 * 1024 * 1024
+DEFAULT_MAX_MATCHES = 1000
+RESULT_QUEUE_SIZE = 1000
+RESULT_POLL_SECONDS = 0.5        # Thread pembaca hasil tidak pernah menunggu lebih lama dari ini
+MAX_PATTERN_LENGTH = 512
+MAX_NESTED_REPEAT = 10  # Pengulangan luar sebatas ini (misal (\.\d{1,3}){3}) tetap diizinkan
+
+# Awalan file biner umum di server Minecraft (jar/zip, gambar, NBT terkompresi, dll.)
+BINARY_MAGIC = (
+    b"PK\x03\x04", b"PK\x05\x06", b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"OggS",
+    b"\x7fELF", b"MZ", b"\xca\xfe\xba\xbe", b"SQLite format 3", b"\x28\xb5\x2f\xfd",
+    b"BZh", b"\xfd7zXZ", b"7z\xbc\xaf",
+)
+GZIP_MAGIC = b"\x1f\x8b"
+
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="content-search")
+# Pembaca hasil untuk respons streaming; terpisah dari executor default event loop
+_result_executor = ThreadPoolExecutor(max_workers=MAX_ACTIVE_JOBS * 2, thread_name_prefix="content-search-results")
+
+
+class ContentSearchError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+_REPEATS = tuple(op for op in (getattr(sre_parse, name, None) for name in
+                                ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")) if op is not None)
+_BACKREFS = (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS)
+
+
+def _has_repeat(parsed) -> bool:
+    """True jika pola berisi pengulangan dengan panjang bervariasi; pola berbahaya memicu ContentSearchError."""
+    found = False
+    for op, av in parsed:
+        if op in _BACKREFS:
+            raise ContentSearchError(400, "Regex dengan backreference tidak didukung.")
+        if op in _REPEATS:
+            min_count, max_count, body = av
+            inner = _has_repeat(body)
+            if inner and max_count > MAX_NESTED_REPEAT:
+                # Misal (a+)+ atau (\w*x?)*: backtracking eksponensial pada input yang hampir cocok
+                raise ContentSearchError(400, "Regex dengan quantifier bersarang tidak didukung.")
+            found = found or inner or min_count != max_count
+        elif op is sre_parse.SUBPATTERN:
+            found = _has_repeat(av[-1]) or found
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                found = _has_repeat(branch) or found
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            found = _has_repeat(av[1]) or found
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            found = _has_repeat(av) or found
+    return found
+
+
+def check_regex_safety(source: bytes):
+    """Tolak regex pengguna yang bisa memicu backtracking katastrofik (ReDoS) di worker bersama."""
+    if len(source) > MAX_PATTERN_LENGTH:
+        raise ContentSearchError(400, f"Regex terlalu panjang (maksimal {MAX_PATTERN_LENGTH} karakter).")
+    _has_repeat(sre_parse.parse(source))
+
+
+class _JobCancelled(Exception):
+    pass
+
+
+_DONE = object()
+
+
+class ContentSearchJob:
+    def __init__(self, server_id: int, root: str, start_dir: str, pattern: "re.Pattern",
+                 include: Optional[str], max_file_size: int, max_matches: int):
+        self.job_id = uuid.uuid4().hex
+        self.server_id = server_id
+        self.root = root
+        self.start_dir = start_dir
+        self.pattern = pattern
+        self.include = include.lower() if include else None
+        self.max_file_size = max_file_size
+        self.max_matches = max_matches
+
+        self.results: "queue.Queue" = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        self.cancel_event = threading.Event()
+        self.state = "running"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.files_scanned = 0
+        self.files_skipped = 0
+        self.matches = 0
+        self.truncated = False
+        self._lock = threading.Lock()
+        # Diset setelah run() selesai memasukkan item terakhir; setelah itu queue hanya bisa berkurang
+        self._closed = threading.Event()
+        self._summary_delivered = False
+
+    # --- Hasil ---
+
+    def _put(self, item):
+        while True:
+            if self.cancel_event.is_set():
+                raise _JobCancelled()
+            try:
+                self.results.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _emit_match(self, rel_path: str, line_no: int, line: bytes):
+        with self._lock:
+            if self.matches >= self.max_matches:
+                self.truncated = True
+                self.cancel_event.set()
+                raise _JobCancelled()
+            self.matches += 1
+        text = line.decode("utf-8", errors="replace").rstrip("\r")
+        self._put({"type": "match", "path": rel_path, "line": line_no, "text": text[:MAX_LINE_CHARS]})
+
+    def cancel(self):
+        if self.state == "running":
+            self.state = "cancelled"
+        self.cancel_event.set()
+
+    def next_result(self, wait: float = RESULT_POLL_SECONDS) -> Optional[dict]:
+        """
+        Blocking paling lama `wait` detik; dipanggil dari thread. None berarti job sudah selesai,
+        queue.Empty berarti belum ada hasil baru. Ringkasan "done" selalu dikirim tepat sekali,
+        juga jika run() tidak sempat memasukkannya karena queue penuh.
+        """
+        try:
+            item = self.results.get(timeout=wait)
+        except queue.Empty:
+            if not self._closed.is_set():
+                raise
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                if self._summary_delivered:
+                    return None
+                self._summary_delivered = True
+                return dict(self.status(), type="done")
+        if item is _DONE:
+            return None
+        if item.get("type") == "done":
+            self._summary_delivered = True
+        return item
+
+    async def iter_results(self) -> AsyncIterator[dict]:
+        """Hasil untuk respons streaming; setiap tunggu di thread dibatasi RESULT_POLL_SECONDS."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                item = await loop.run_in_executor(_result_executor, self.next_result)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            yield item
+
+    def status(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "files_scanned": self.files_scanned,
+            "files_skipped": self.files_skipped,
+            "matches": self.matches,
+            "truncated": self.truncated,
+            "error": self.error,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+        }
+
+    # --- Pemindaian ---
+
+    def _candidates(self) -> Iterator[str]:
+        real_root = os.path.realpath(self.root)
+        if os.path.isfile(self.start_dir):
+            yield self.start_dir
+            return
+        for dirpath, dirnames, filenames in os.walk(self.start_dir):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if self.include and not fnmatch.fnmatchcase(name.lower(), self.include):
+                    continue
+                full_path = os.path.join(dirpath, name)
+                # Symlink keluar direktori server dilewati (diakhiri separator agar /srv/ab tidak lolos untuk /srv/a)
+                if not os.path.realpath(full_path).startswith(real_root + os.sep):
+                    continue
+                yield full_path
+
+    def _open(self, abs_path: str):
+        """File objek untuk dipindai, atau None jika file dilewati (biner/terlalu besar)."""
+        try:
+            if os.path.getsize(abs_path) > self.max_file_size:
+                return None
+            f = open(abs_path, "rb")
+        except OSError:
+            return None
+        head = f.read(SNIFF_SIZE)
+        if head.startswith(GZIP_MAGIC):
+            f.close()
+            f = gzip.open(abs_path, "rb")
+            try:
+                head = f.read(SNIFF_SIZE)
+            except (OSError, EOFError):
+                f.close()
+                return None
+        if head.startswith(BINARY_MAGIC) or b"\x00" in head:
+            f.close()
+            return None
+        f.seek(0)
+        return f
+
+    def _scan_file(self, abs_path: str):
+        if self.cancel_event.is_set():
+            return
+        f = self._open(abs_path)
+        if f is None:
+            with self._lock:
+                self.files_skipped += 1
+            return
+        rel_path = os.path.relpath(abs_path, self.root).replace("\\", "/")
+        try:
+            with f:
+                self._scan_stream(f, rel_path)
+        except (OSError, EOFError, gzip.BadGzipFile):
+            # File terpotong (mis. log yang sedang ditulis) - pakai hasil yang sudah didapat
+            pass
+        with self._lock:
+            self.files_scanned += 1
+
+    def _scan_stream(self, f, rel_path: str):
+        carry = b""
+        line_no = 1
+        total = 0
+        while not self.cancel_event.is_set():
+            block = f.read(READ_BLOCK_SIZE)
+            if block:
+                total += len(block)
+                data = carry + block
+                cut = data.rfind(b"\n") + 1
+                if cut == 0 and len(data) < MAX_CARRY_BYTES:
+                    carry = data
+                    continue
+                if cut == 0:
+                    cut = len(data)
+                data, carry = data[:cut], data[cut:]
+            else:
+                data, carry = carry, b""
+
+            position = 0
+            last_line_end = -1
+            for match in self.pattern.finditer(data):
+                line_start = data.rfind(b"\n", 0, match.start()) + 1
+                if line_start <= last_line_end:
+                    continue  # Baris ini sudah dilaporkan
+                line_no += data.count(b"\n", position, line_start)
+                position = line_start
+                line_end = data.find(b"\n", match.start())
+                if line_end == -1:
+                    line_end = len(data)
+                self._emit_match(rel_path, line_no, data[line_start:line_end])
+                last_line_end = line_end
+            line_no += data.count(b"\n", position)
+
+            # Batas ukuran juga berlaku untuk isi .gz setelah didekompresi
+            if not block or total > self.max_file_size:
+                return
+
+    def run(self, max_in_flight: int = SEARCH_WORKERS * 2):
+        slots = threading.Semaphore(max_in_flight)
+        futures = []
+
+        def release(_future):
+            slots.release()
+
+        try:
+            for abs_path in self._candidates():
+                if self.cancel_event.is_set():
+                    break
+                slots.acquire()
+                future = _search_executor.submit(self._scan_file, abs_path)
+                future.add_done_callback(release)
+                futures.append(future)
+                futures = [fu for fu in futures if not fu.done()]
+            for future in futures:
+                try:
+                    future.result()
+                except _JobCancelled:
+                    pass
+            if self.state == "running":
+                self.state = "done"
+        except Exception as e:
+            self.state = "error"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            # Tetap kirim ringkasan ke klien yang masih terhubung; tanpa menunggu jika job dibatalkan
+            summary = dict(self.status(), type="done")
+            for item in (summary, _DONE):
+                try:
+                    self.results.put(item, timeout=0 if self.state == "cancelled" else 5)
+                except queue.Full:
+                    break  # next_result mengirim ringkasan dan mengakhiri aliran setelah queue kosong
+            self._closed.set()
+
+
+class ContentSearchService:
+    def __init__(self):
+        self._jobs: "OrderedDict[str, ContentSearchJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, server_id: int, root: str, start_dir: str, query: str, regex: bool = False,
+              case_sensitive: bool = False, include: Optional[str] = None,
+              max_file_size: int = DEFAULT_MAX_FILE_SIZE, max_matches: int = DEFAULT_MAX_MATCHES) -> ContentSearchJob:
+        if not query:
+            raise ContentSearchError(400, "Kata kunci pencarian tidak boleh kosong.")
+        source = query.encode("utf-8")
+        try:
+            if regex:
+                check_regex_safety(source)
+            pattern = re.compile(source if regex else re.escape(source), 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            raise ContentSearchError(400, f"Regex tidak valid: {e}")
+
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.state == "running")
+            if active >= MAX_ACTIVE_JOBS:
+                raise ContentSearchError(429, "Terlalu banyak pencarian berjalan, coba lagi nanti.")
+            job = ContentSearchJob(server_id, root, start_dir, pattern, include,
+                                   max(1, min(max_file_size, DEFAULT_MAX_FILE_SIZE * 4)),
+                                   max(1, min(max_matches, DEFAULT_MAX_MATCHES * 10)))
+            self._jobs[job.job_id] = job
+            finished = [job_id for job_id, j in self._jobs.items() if j.state != "running"]
+            for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+                del self._jobs[job_id]
+
+        threading.Thread(target=job.run, name=f"content-search-{job.job_id[:8]}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str, server_id: int) -> ContentSearchJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.server_id != server_id:
+            raise ContentSearchError(404, "Job pencarian tidak ditemukan.")
+        return job
+
+    def active_jobs(self) -> Dict[str, dict]:
+        with self._lock:
+            return {job_id: job.status() for job_id, job in self._jobs.items() if job.state == "running"}
+
+
+content_search = ContentSearchService()
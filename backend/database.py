@@ -1,7 +1,27 @@
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from sqlite3 import Error
+from typing import Any, Iterator, List, Optional, Sequence
 
 DATABASE_FILE = "user_preferences.db"
+POOL_SIZE = 16
+POOL_TIMEOUT_SECONDS = 10.0
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 256
+
+# Pragma yang dipasang pada setiap koneksi dari pool.
+# WAL membuat pembaca tidak saling mengunci dengan penulis, sehingga polling
+# dasbor yang bersamaan tidak lagi memicu "database is locked".
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+)
 
 def create_connection():
     """Membuat koneksi ke database SQLite."""
@@ -14,6 +34,112 @@ def create_connection():
         print(f"Database connection error: {e}")
     return conn
 
+
+class ConnectionPool:
+    """
+    Pool koneksi SQLite yang aman dipakai dari banyak thread.
+    Koneksi dibuat saat dibutuhkan sampai `size`, lalu dipakai ulang. sqlite3 menyimpan
+    statement yang sudah dikompilasi per koneksi (cached_statements), jadi query
+    yang sama tidak di-parse ulang di setiap request.
+    """
+
+    def __init__(self, database: str = DATABASE_FILE, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT_SECONDS):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database,
+            check_same_thread=False,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise Error("Pool koneksi database habis, coba lagi nanti.")
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Jalankan beberapa perintah dalam satu transaksi; commit di akhir, rollback jika error."""
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    # --- Helper query ---
+
+    def fetch_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[dict]:
+        with self.connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+    def fetch_all(self, sql: str, params: Sequence[Any] = ()) -> List[dict]:
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Jalankan satu perintah tulis dan commit. Cursor yang dikembalikan berisi lastrowid/rowcount."""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+pool = ConnectionPool()
+
 def create_tables(conn):
     """Membuat semua tabel yang dibutuhkan jika belum ada."""
     try:
@@ -36,10 +162,27 @@ def create_tables(conn):
                 name TEXT NOT NULL,
                 version TEXT NOT NULL,
                 path TEXT NOT NULL UNIQUE,
+                idle_timeout_minutes REAL,
                 FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
             );
         """)
         
+        # Riwayat durasi startup server untuk memantau regresi waktu boot
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS server_startups (
+                id INTEGER PRIMARY KEY,
+                server_id INTEGER NOT NULL,
+                version TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                ready_at REAL NOT NULL,
+                duration_seconds REAL NOT NULL,
+                reported_seconds REAL,
+                init_seconds REAL,
+                FOREIGN KEY (server_id) REFERENCES servers (id) ON DELETE CASCADE
+            );
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_server_startups_server ON server_startups (server_id, started_at)")
+
         # Tabel webhook tetap sama
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS user_webhooks (
@@ -71,6 +214,10 @@ def migrate_schema_if_needed(conn):
         if 'server_version' in columns:
              print("Skema lama terdeteksi. Disarankan untuk memigrasikan data secara manual.")
 
+        # Kolom server_path masih dipakai saat registrasi pengguna
+        if 'server_path' not in columns:
+            cursor.execute("ALTER TABLE users ADD COLUMN server_path TEXT")
+
         # Buat tabel servers (akan dilewati jika sudah ada)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS servers (
@@ -83,6 +230,12 @@ def migrate_schema_if_needed(conn):
             );
         """)
 
+        # Batas idle per server (NULL = bawaan IDLE_TIMEOUT_MINUTES)
+        cursor.execute("PRAGMA table_info(servers)")
+        server_columns = [row['name'] for row in cursor.fetchall()]
+        if 'idle_timeout_minutes' not in server_columns:
+            cursor.execute("ALTER TABLE servers ADD COLUMN idle_timeout_minutes REAL")
+
     except Error as e:
         print(f"Gagal memigrasi skema: {e}")
 
@@ -1,7 +1,16 @@
 from fastapi import Depends, HTTPException, Path
-from typing import Annotated
-from . import auth, models
-from .database import create_connection
+from typing import Annotated, Optional
+from . import auth, models, repositories
+from .auth_cache import ownership_cache, get_cached
+
+def get_owned_server(username: str, server_id: int) -> Optional[dict]:
+    """Detail server jika dimiliki pengguna (lewat cache kepemilikan), selain itu None.
+    Dipakai juga oleh endpoint WebSocket yang tidak bisa memakai dependency."""
+    return get_cached(
+        ownership_cache,
+        (username, server_id),
+        lambda: repositories.servers.get_owned(server_id, username),
+    )
 
 def get_server_details(
     server_id: Annotated[int, Path(title="The ID of the server to operate on.")],
@@ -11,18 +20,9 @@ def get_server_details(
     Dependency yang memverifikasi kepemilikan server dan mengembalikan detailnya.
     Fungsi ini sekarang berada di lokasi netral untuk menghindari impor sirkular.
     """
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.id, s.path, s.version FROM servers s
-        JOIN users u ON s.user_id = u.id
-        WHERE s.id = ? AND u.username = ?
-    """, (server_id, current_user.username))
-    server_data = cursor.fetchone()
-    conn.close()
+    server_data = get_owned_server(current_user.username, server_id)
     
     if not server_data:
         raise HTTPException(status_code=404, detail="Server tidak ditemukan atau Anda tidak memiliki akses.")
     
-    # Mengonversi sqlite3.Row menjadi dictionary
-    return dict(server_data)
\ No newline at end of file
+    return server_data
\ No newline at end of file
@@ -0,0 +1,345 @@
+# Indeks nama file per server untuk pencarian di file manager.
+# Setiap server punya database SQLite sendiri (file_index/<server_id>.db) berisi
+# tabel files dan indeks FTS5 trigram atas nama file, sehingga pencarian substring,
+# prefix, glob, dan ekstensi selesai dalam hitungan milidetik tanpa menjelajah disk.
+# Indeks dibangun dan diperbarui oleh satu thread latar belakang. Pembaruan bersifat
+# inkremental: mtime setiap direktori disimpan, dan hanya direktori yang mtime-nya
+# berubah (ada file ditambah, dihapus, atau diganti nama) yang dibaca ulang.
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+FILE_INDEX_DIR = "file_index"
+REFRESH_INTERVAL_SECONDS = 30  # Pencarian memicu pemindaian ulang jika indeks lebih tua dari ini
+BATCH_SIZE = 5000              # Baris per transaksi; hasil parsial sudah bisa dicari selama build
+MAX_PAGE_SIZE = 500
+SEARCH_MODES = ("substring", "prefix", "glob")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        dir TEXT NOT NULL,
+        name TEXT NOT NULL COLLATE NOCASE,
+        ext TEXT NOT NULL,
+        is_dir INTEGER NOT NULL,
+        depth INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_files_dir ON files (dir)",
+    "CREATE INDEX IF NOT EXISTS idx_files_name ON files (name)",
+    "CREATE INDEX IF NOT EXISTS idx_files_ext ON files (ext)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+        name, content='files', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts (rowid, name) VALUES (new.id, new.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+        INSERT INTO files_fts (files_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END""",
+    # Direktori yang sudah dipindai beserta mtime-nya saat itu
+    "CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+
+class FileIndexError(Exception):
+    pass
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _subtree_bounds(path: str) -> Tuple[str, str]:
+    # Semua path di bawah `path/`: '/' adalah 0x2F dan '0' adalah 0x30, jadi rentang
+    # [path/, path0) bisa memakai indeks UNIQUE pada kolom path
+    return f"{path}/", f"{path}0"
+
+
+class ServerFileIndex:
+    def __init__(self, server_id: int, root: str, index_dir: str = FILE_INDEX_DIR):
+        self.server_id = server_id
+        self.root = root
+        self.db_path = os.path.join(index_dir, f"{server_id}.db")
+        os.makedirs(index_dir, exist_ok=True)
+        conn = self.connect()
+        try:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        # Indeks bisa dibangun ulang kapan saja, jadi durabilitas penuh tidak diperlukan
+        conn.execute("PRAGMA synchronous = OFF")
+        return conn
+
+    def meta(self) -> Dict[str, str]:
+        conn = self.connect()
+        try:
+            return {row["key"]: row["value"] for row in conn.execute("SELECT key, value FROM meta")}
+        finally:
+            conn.close()
+
+    # --- Pemindaian ---
+
+    def _delete_subtree(self, conn: sqlite3.Connection, path: str):
+        low, high = _subtree_bounds(path)
+        conn.execute("DELETE FROM files WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+
+    def scan(self) -> dict:
+        """Sinkronkan indeks dengan disk. Mengembalikan statistik pemindaian."""
+        started = time.monotonic()
+        stats = {"dirs_checked": 0, "dirs_rescanned": 0, "added": 0, "updated": 0, "removed": 0}
+        conn = self.connect()
+        try:
+            known_dirs = dict(conn.execute("SELECT path, mtime_ns FROM dirs").fetchall())
+            pending = 0
+            stack = [""]
+            while stack:
+                rel_dir = stack.pop()
+                abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+                try:
+                    mtime_ns = os.stat(abs_dir).st_mtime_ns
+                except OSError:
+                    continue
+                stats["dirs_checked"] += 1
+
+                if known_dirs.get(rel_dir) == mtime_ns:
+                    # Isi langsung direktori ini tidak berubah; cukup turun ke subfolder yang sudah dikenal
+                    stack.extend(row[0] for row in conn.execute(
+                        "SELECT path FROM files WHERE dir = ? AND is_dir = 1", (rel_dir,)))
+                    continue
+
+                stats["dirs_rescanned"] += 1
+                existing = {
+                    row["name"]: row for row in conn.execute(
+                        "SELECT id, name, is_dir, size, mtime FROM files WHERE dir = ?", (rel_dir,))
+                }
+                depth = rel_dir.count("/") + 1 if rel_dir else 0
+                inserts = []
+                try:
+                    with os.scandir(abs_dir) as it:
+                        for entry in it:
+                            try:
+                                is_dir = entry.is_dir(follow_symlinks=False)
+                                st = entry.stat(follow_symlinks=False)
+                            except OSError:
+                                continue
+                            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                            if is_dir:
+                                stack.append(rel_path)
+                            old = existing.pop(entry.name, None)
+                            if old is not None and bool(old["is_dir"]) == is_dir:
+                                if old["size"] != st.st_size or old["mtime"] != st.st_mtime:
+                                    conn.execute("UPDATE files SET size = ?, mtime = ? WHERE id = ?",
+                                                 (st.st_size, st.st_mtime, old["id"]))
+                                    stats["updated"] += 1
+                                continue
+                            if old is not None:
+                                self._delete_subtree(conn, rel_path)
+                            ext = "" if is_dir else os.path.splitext(entry.name)[1].lower()
+                            inserts.append((rel_path, rel_dir, entry.name, ext, int(is_dir), depth,
+                                            st.st_size, st.st_mtime))
+                except OSError:
+                    continue
+
+                for name, old in existing.items():
+                    removed_path = f"{rel_dir}/{name}" if rel_dir else name
+                    self._delete_subtree(conn, removed_path)
+                    stats["removed"] += 1
+                conn.executemany(
+                    "INSERT INTO files (path, dir, name, ext, is_dir, depth, size, mtime) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    inserts,
+                )
+                stats["added"] += len(inserts)
+                conn.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)", (rel_dir, mtime_ns))
+
+                pending += len(inserts) + 1
+                if pending >= BATCH_SIZE:
+                    conn.commit()
+                    pending = 0
+
+            entries = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            stats["entries"] = entries
+            stats["seconds"] = round(time.monotonic() - started, 3)
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ("last_scan_at", str(time.time())),
+                ("last_scan_seconds", str(stats["seconds"])),
+                ("entries", str(entries)),
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        return stats
+
+    # --- Pencarian ---
+
+    def search(
+        self,
+        query: str = "",
+        mode: str = "substring",
+        extensions: Optional[List[str]] = None,
+        kind: Optional[str] = None,
+        under: str = "",
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Tuple[List[dict], bool]:
+        if mode not in SEARCH_MODES:
+            raise FileIndexError(f"Mode pencarian harus salah satu dari: {', '.join(SEARCH_MODES)}.")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where, params = [], []
+        source = "files f"
+
+        if query:
+            if mode == "substring" and len(query) >= 3:
+                # Trigram FTS5: substring tidak peka huruf besar/kecil, memakai indeks
+                source = "files_fts JOIN files f ON f.id = files_fts.rowid"
+                where.append("files_fts MATCH ?")
+                params.append('"' + query.replace('"', '""') + '"')
+            elif mode == "substring":
+                where.append("f.name LIKE ? ESCAPE '\\'")
+                params.append(f"%{_escape_like(query)}%")
+            elif mode == "prefix":
+                where.append("f.name LIKE ? ESCAPE '\\'")
+                params.append(f"{_escape_like(query)}%")
+            else:
+                where.append("lower(f.name) GLOB ?")
+                params.append(query.lower())
+        if extensions:
+            normalized = [e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions]
+            where.append(f"f.ext IN ({', '.join('?' for _ in normalized)})")
+            params.extend(normalized)
+        if kind in ("file", "folder"):
+            where.append("f.is_dir = ?")
+            params.append(1 if kind == "folder" else 0)
+        if under:
+            low, high = _subtree_bounds(under.strip("/"))
+            where.append("f.path >= ? AND f.path < ?")
+            params.extend([low, high])
+
+        # Peringkat: nama persis, lalu awalan nama, lalu yang lebih dangkal dan lebih pendek
+        lowered = query.lower()
+        order = "f.depth, length(f.name), f.path"
+        order_params: list = []
+        if query and mode != "glob":
+            order = "(lower(f.name) = ?) DESC, (f.name LIKE ? ESCAPE '\\') DESC, " + order
+            order_params = [lowered, f"{_escape_like(query)}%"]
+
+        sql = (
+            f"SELECT f.path, f.name, f.is_dir, f.size, f.mtime FROM {source}"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + f" ORDER BY {order} LIMIT ? OFFSET ?"
+        )
+        conn = self.connect()
+        try:
+            rows = conn.execute(sql, params + order_params + [limit + 1, offset]).fetchall()
+        finally:
+            conn.close()
+        results = [
+            {"name": row["name"], "path": row["path"], "type": "folder" if row["is_dir"] else "file",
+             "size": row["size"], "mtime": row["mtime"]}
+            for row in rows[:limit]
+        ]
+        return results, len(rows) > limit
+
+
+class FileIndexService:
+    """Mengelola indeks semua server dan satu thread pemindai latar belakang."""
+
+    def __init__(self, index_dir: str = FILE_INDEX_DIR, refresh_interval: float = REFRESH_INTERVAL_SECONDS):
+        self.index_dir = index_dir
+        self.refresh_interval = refresh_interval
+        self._indexes: Dict[int, ServerFileIndex] = {}
+        self._state: Dict[int, dict] = {}
+        self._queue: "queue.Queue[int]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def get(self, server_id: int, root: str) -> ServerFileIndex:
+        with self._lock:
+            index = self._indexes.get(server_id)
+            if index is None or index.root != root:
+                index = ServerFileIndex(server_id, root, self.index_dir)
+                self._indexes[server_id] = index
+                last_scan = float(index.meta().get("last_scan_at", 0))
+                self._state[server_id] = {"ready": last_scan > 0, "scanning": False, "queued": False,
+                                          "last_scan_at": last_scan or None, "last_scan": None, "last_error": None}
+            return index
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="file-indexer", daemon=True)
+                self._worker.start()
+
+    def request_refresh(self, server_id: int, root: str, force: bool = False):
+        """Antrekan pemindaian jika indeks sudah lebih tua dari refresh_interval (atau jika force)."""
+        self.get(server_id, root)
+        with self._lock:
+            state = self._state[server_id]
+            if state["queued"] or state["scanning"]:
+                return
+            if not force and state["last_scan_at"] and time.time() - state["last_scan_at"] < self.refresh_interval:
+                return
+            state["queued"] = True
+        self._ensure_worker()
+        self._queue.put(server_id)
+
+    def _run(self):
+        while True:
+            server_id = self._queue.get()
+            with self._lock:
+                index = self._indexes.get(server_id)
+                state = self._state.get(server_id)
+                if index is None or state is None:
+                    continue
+                state["queued"] = False
+                state["scanning"] = True
+            try:
+                stats = index.scan()
+                error = None
+            except Exception as e:
+                stats, error = None, str(e)
+                print(f"Gagal memindai indeks file server {server_id}: {e}")
+            with self._lock:
+                state["scanning"] = False
+                state["last_error"] = error
+                if stats is not None:
+                    state.update(ready=True, last_scan_at=time.time(), last_scan=stats)
+
+    def status(self, server_id: int) -> dict:
+        with self._lock:
+            return dict(self._state.get(server_id, {"ready": False, "scanning": False, "queued": False}))
+
+    def search(self, server_id: int, root: str, **kwargs) -> dict:
+        index = self.get(server_id, root)
+        self.request_refresh(server_id, root)
+        results, has_more = index.search(**kwargs)
+        return {"results": results, "has_more": has_more, "index": self.status(server_id)}
+
+    def drop(self, server_id: int):
+        with self._lock:
+            index = self._indexes.pop(server_id, None)
+            self._state.pop(server_id, None)
+        db_path = index.db_path if index else os.path.join(self.index_dir, f"{server_id}.db")
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(db_path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+file_index = FileIndexService()
@@ -0,0 +1,159 @@
+# Penyimpanan JAR server bersama (content-addressed).
+# Setiap JAR disimpan sekali sebagai <sha1>.jar, dengan indeks versi -> sha1.
+# Direktori server hanya berisi hardlink (atau symlink/salinan sebagai cadangan)
+# ke file di penyimpanan ini, sehingga 50 server versi yang sama cukup satu unduhan.
+
+import asyncio
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Dict, Optional
+
+from backend.utils.file_manager import atomic_write_text
+from backend.version_manifest import manifest_cache
+
+JAR_STORE_DIR = "jar_cache"
+DOWNLOAD_TIMEOUT_SECONDS = 300.0
+WRITE_BUFFER_BYTES = 1024 * 1024  # Potongan unduhan dikumpulkan dulu agar tidak satu thread hop per chunk
+
+
+class JarStoreError(Exception):
+    pass
+
+
+def _finish_file(f, data: bytes):
+    f.write(data)
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _remove_if_exists(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class JarStore:
+    def __init__(self, root: str = JAR_STORE_DIR):
+        self.root = root
+        self._index_path = os.path.join(root, "index.json")
+        self._index: Optional[Dict[str, str]] = None
+        self._index_lock = threading.Lock()
+        # Unduhan yang sedang berjalan: versi -> task. Permintaan kedua untuk versi
+        # yang sama menunggu task yang sama (single-flight).
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    # --- Indeks versi -> sha1 ---
+
+    def _load_index(self) -> Dict[str, str]:
+        if self._index is None:
+            try:
+                with open(self._index_path) as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _remember(self, version: str, sha1: str):
+        with self._index_lock:
+            index = self._load_index()
+            index[version] = sha1
+            os.makedirs(self.root, exist_ok=True)
+            atomic_write_text(self._index_path, json.dumps(index, indent=2, sort_keys=True))
+
+    def blob_path(self, sha1: str) -> str:
+        return os.path.join(self.root, f"{sha1}.jar")
+
+    def lookup(self, version: str) -> Optional[str]:
+        """Path JAR di penyimpanan untuk versi ini, atau None jika belum ada."""
+        with self._index_lock:
+            sha1 = self._load_index().get(version)
+        if sha1 and os.path.isfile(self.blob_path(sha1)):
+            return self.blob_path(sha1)
+        return None
+
+    # --- Unduhan ---
+
+    async def ensure(self, version: str) -> str:
+        """Pastikan JAR versi ini ada di penyimpanan dan kembalikan path-nya."""
+        cached = self.lookup(version)
+        if cached:
+            return cached
+        task = self._inflight.get(version)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._fetch(version))
+            self._inflight[version] = task
+            task.add_done_callback(lambda _: self._inflight.pop(version, None))
+        # shield: pemanggil yang dibatalkan tidak ikut membatalkan unduhan bersama
+        return await asyncio.shield(task)
+
+    async def _fetch(self, version: str) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        detail = await manifest_cache.get_version_detail(version)
+        download = detail.get("downloads", {}).get("server", {})
+        if not download.get("url"):
+            raise JarStoreError(f"URL download untuk versi {version} tidak ditemukan.")
+        expected_sha1 = download.get("sha1")
+        client = manifest_cache.client
+
+        # Versi lain bisa saja memakai JAR yang identik
+        if expected_sha1 and os.path.isfile(self.blob_path(expected_sha1)):
+            await asyncio.to_thread(self._remember, version, expected_sha1)
+            return self.blob_path(expected_sha1)
+
+        tmp_path = os.path.join(self.root, f"{version}.{uuid.uuid4().hex}.part")
+        digest = hashlib.sha1()
+        size = 0
+        # Semua operasi disk (tulis, fsync, rename) berjalan di thread agar event loop tidak tertahan
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            try:
+                pending = bytearray()
+                async with client.stream("GET", download["url"], timeout=DOWNLOAD_TIMEOUT_SECONDS) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes():
+                        digest.update(chunk)
+                        size += len(chunk)
+                        pending += chunk
+                        if len(pending) >= WRITE_BUFFER_BYTES:
+                            await asyncio.to_thread(f.write, bytes(pending))
+                            pending.clear()
+                await asyncio.to_thread(_finish_file, f, bytes(pending))
+            finally:
+                await asyncio.to_thread(f.close)
+            sha1 = digest.hexdigest()
+            if expected_sha1 and sha1 != expected_sha1:
+                raise JarStoreError(f"SHA1 tidak cocok untuk versi {version}: {sha1} != {expected_sha1}")
+            if download.get("size") and size != download["size"]:
+                raise JarStoreError(f"Ukuran file tidak cocok untuk versi {version}.")
+            await asyncio.to_thread(os.replace, tmp_path, self.blob_path(sha1))
+        finally:
+            await asyncio.to_thread(_remove_if_exists, tmp_path)
+
+        await asyncio.to_thread(self._remember, version, sha1)
+        return self.blob_path(sha1)
+
+    # --- Menautkan ke direktori server ---
+
+    def link_into(self, store_path: str, dest_path: str):
+        """
+        Tautkan JAR dari penyimpanan ke direktori server: hardlink jika bisa,
+        symlink jika beda filesystem, dan salinan sebagai pilihan terakhir.
+        """
+        tmp_path = f"{dest_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(store_path, tmp_path)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            try:
+                os.symlink(os.path.abspath(store_path), tmp_path)
+            except OSError:
+                shutil.copy2(store_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+
+
+jar_store = JarStore()
@@ -0,0 +1,136 @@
+# Pipeline log konsol bersama.
+# Thread pembaca stdout setiap server hanya memasukkan baris ke antrean terbatas,
+# lalu satu task di event loop utama (uvicorn) menguras antrean tersebut dan
+# menyerahkan baris-baris yang terkumpul ke sink sebagai satu batch per server.
+
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+MAX_QUEUE_LINES = 10000   # Batas antrean per server, baris tertua dibuang jika penuh
+MAX_BATCH_LINES = 500     # Jumlah baris maksimum dalam satu frame
+FLUSH_INTERVAL = 0.05     # Jeda (detik) untuk mengumpulkan baris sebelum dikirim
+
+Sink = Callable[[int, List[str]], Awaitable[None]]
+
+
+def _empty_stats() -> dict:
+    return {"queued": 0, "dropped": 0, "coalesced": 0, "sent": 0, "frames": 0}
+
+
+class LogPipeline:
+    def __init__(
+        self,
+        max_queue_lines: int = MAX_QUEUE_LINES,
+        max_batch_lines: int = MAX_BATCH_LINES,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        self.max_queue_lines = max_queue_lines
+        self.max_batch_lines = max_batch_lines
+        self.flush_interval = flush_interval
+        self._queues: Dict[int, Deque[str]] = {}
+        self._stats: Dict[int, dict] = {}
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sink: Optional[Sink] = None
+
+    def start(self, sink: Sink):
+        """Mulai task penguras antrean. Harus dipanggil dari dalam event loop yang berjalan."""
+        if self._task is not None and not self._task.done():
+            return
+        self._sink = sink
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        # Baris yang masuk sebelum pipeline dimulai tetap dikirim
+        if self._pending:
+            self._wakeup.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._loop = None
+
+    def push(self, server_id: int, line: str):
+        """
+        Dipanggil dari thread pembaca. Tidak pernah memblokir: jika antrean penuh,
+        baris tertua dibuang dan dicatat sebagai 'dropped'.
+        """
+        with self._lock:
+            queue = self._queues.get(server_id)
+            if queue is None:
+                queue = self._queues[server_id] = deque()
+            stats = self._stats.setdefault(server_id, _empty_stats())
+            if len(queue) >= self.max_queue_lines:
+                queue.popleft()
+                stats["dropped"] += 1
+            queue.append(line)
+            stats["queued"] += 1
+            # Event loop hanya dibangunkan saat antrean berpindah dari kosong ke terisi
+            should_wake = not self._pending
+            self._pending.add(server_id)
+
+        loop = self._loop
+        if should_wake and loop is not None and self._wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # Event loop sudah ditutup (aplikasi sedang berhenti)
+                pass
+
+    def _take_batches(self) -> List[Tuple[int, List[str]]]:
+        batches = []
+        with self._lock:
+            for server_id in self._pending:
+                queue = self._queues.get(server_id)
+                if not queue:
+                    continue
+                lines = list(queue)
+                queue.clear()
+                for i in range(0, len(lines), self.max_batch_lines):
+                    batches.append((server_id, lines[i:i + self.max_batch_lines]))
+            self._pending.clear()
+        return batches
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Beri jeda singkat agar baris yang datang beruntun tergabung dalam satu frame
+            await asyncio.sleep(self.flush_interval)
+            for server_id, lines in self._take_batches():
+                with self._lock:
+                    stats = self._stats.setdefault(server_id, _empty_stats())
+                    stats["frames"] += 1
+                    stats["sent"] += len(lines)
+                    stats["coalesced"] += len(lines) - 1
+                try:
+                    await self._sink(server_id, lines)
+                except Exception as e:
+                    print(f"Gagal mengirim log untuk server_id {server_id}: {e}")
+
+    def get_stats(self, server_id: int) -> dict:
+        with self._lock:
+            stats = dict(self._stats.get(server_id, _empty_stats()))
+            queue = self._queues.get(server_id)
+            stats["pending"] = len(queue) if queue else 0
+        return stats
+
+    def reset(self, server_id: int):
+        """Hapus antrean dan statistik server (misal, saat server dihapus)."""
+        with self._lock:
+            self._queues.pop(server_id, None)
+            self._stats.pop(server_id, None)
+            self._pending.discard(server_id)
+
+
+log_pipeline = LogPipeline()
@@ -0,0 +1,272 @@
+# Tailer bersama untuk file log (mis. server/logs/latest.log).
+# Satu tailer per file, berapa pun jumlah penontonnya: satu file handle, satu pembaca,
+# dan baris baru disebar ke semua subscriber. Tailer bangun lewat inotify (dengan satu
+# fd inotify bersama untuk semua file), jadi baris tiba dalam hitungan milidetik tanpa
+# polling. Rotasi dikenali dari inode yang berubah (latest.log dipindah lalu dibuat
+# ulang saat server restart) atau ukuran yang mengecil (file dipotong). Jika inotify
+# tidak tersedia, tailer kembali ke polling dengan interval pendek.
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+from typing import Callable, Dict, List, Optional, Set
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+MAX_READ_PER_WAKE = 1024 * 1024
+SAFETY_POLL_SECONDS = 2.0    # Cadangan jika ada event inotify yang terlewat
+FALLBACK_POLL_SECONDS = 0.1  # Interval polling jika inotify tidak tersedia
+
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Satu fd inotify untuk semua direktori log yang sedang dipantau."""
+
+    def __init__(self):
+        self.fd: Optional[int] = None
+        self._libc = None
+        self._watches: Dict[int, Dict[str, List[Callable[[], None]]]] = {}
+        self._dirs: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            self._libc.inotify_init1
+        except (OSError, AttributeError):
+            self._libc = None
+
+    @property
+    def available(self) -> bool:
+        return self._libc is not None
+
+    def _ensure_fd(self, loop: asyncio.AbstractEventLoop):
+        if self.fd is None:
+            fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 gagal")
+            self.fd = fd
+            self._loop = loop
+            loop.add_reader(fd, self._on_readable)
+
+    def watch(self, loop: asyncio.AbstractEventLoop, directory: str, name: str, callback: Callable[[], None]):
+        self._ensure_fd(loop)
+        wd = self._dirs.get(directory)
+        if wd is None:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch gagal untuk {directory}")
+            self._dirs[directory] = wd
+            self._watches[wd] = {}
+        self._watches[wd].setdefault(name, []).append(callback)
+
+    def unwatch(self, directory: str, name: str, callback: Callable[[], None]):
+        wd = self._dirs.get(directory)
+        if wd is None:
+            return
+        callbacks = self._watches[wd].get(name, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._watches[wd].pop(name, None)
+        if not self._watches[wd]:
+            self._libc.inotify_rm_watch(self.fd, wd)
+            del self._watches[wd]
+            del self._dirs[directory]
+        if not self._dirs and self.fd is not None:
+            self._loop.remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        woken = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            for callback in self._watches.get(wd, {}).get(name, []):
+                woken.add(callback)
+        for callback in woken:
+            callback()
+
+
+_inotify = _Inotify()
+
+
+class LogTailer:
+    def __init__(self, path: str, loop: asyncio.AbstractEventLoop):
+        self.path = os.path.abspath(path)
+        self.directory, self.name = os.path.split(self.path)
+        self.loop = loop
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._file = None
+        self._inode: Optional[int] = None
+        self._carry = b""
+        self._watching = False
+        self._poll_task: Optional[asyncio.Task] = None
+        self.rotations = 0
+        self.lines_read = 0
+
+    # --- Siklus hidup ---
+
+    def start(self):
+        self._open(seek_end=True)
+        try:
+            if not _inotify.available or not os.path.isdir(self.directory):
+                raise OSError("inotify tidak tersedia")
+            _inotify.watch(self.loop, self.directory, self.name, self.poke)
+            self._watching = True
+            interval = SAFETY_POLL_SECONDS
+        except OSError:
+            interval = FALLBACK_POLL_SECONDS
+        self._poll_task = self.loop.create_task(self._poll(interval))
+
+    def stop(self):
+        if self._watching:
+            _inotify.unwatch(self.directory, self.name, self.poke)
+            self._watching = False
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        self._close()
+
+    async def _poll(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            if not self._watching and _inotify.available and os.path.isdir(self.directory):
+                # Direktori log baru muncul (server pertama kali dijalankan): beralih ke inotify
+                try:
+                    _inotify.watch(self.loop, self.directory, self.name, self.poke)
+                    self._watching = True
+                    interval = SAFETY_POLL_SECONDS
+                except OSError:
+                    pass
+            self.poke()
+
+    # --- File ---
+
+    def _open(self, seek_end: bool):
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return
+        self._file = f
+        self._inode = os.fstat(f.fileno()).st_ino
+        self._carry = b""
+        if seek_end:
+            f.seek(0, os.SEEK_END)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._inode = None
+
+    def poke(self):
+        """Baca semua data baru. Dipanggil dari event loop saat inotify/polling membangunkan tailer."""
+        if self._file is None:
+            self._open(seek_end=False)
+            if self._file is None:
+                return
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+
+        if st is not None and st.st_ino != self._inode:
+            # Rotasi: habiskan sisa file lama, lalu mulai file baru dari awal
+            self._drain()
+            self._flush_carry()
+            self._close()
+            self.rotations += 1
+            self._open(seek_end=False)
+        elif st is not None and st.st_size < self._file.tell():
+            # File dipotong di tempat
+            self._flush_carry()
+            self._file.seek(0)
+            self.rotations += 1
+        self._drain()
+
+    def _drain(self):
+        if self._file is None:
+            return
+        data = self._file.read(MAX_READ_PER_WAKE)
+        if not data:
+            return
+        if len(data) == MAX_READ_PER_WAKE:
+            # Masih ada sisa; lanjutkan di iterasi loop berikutnya agar loop tidak tertahan
+            self.loop.call_soon(self.poke)
+        data = self._carry + data
+        cut = data.rfind(b"\n") + 1
+        self._carry = data[cut:]
+        if cut:
+            self._publish(data[:cut].decode("utf-8", errors="replace").splitlines(keepends=True))
+
+    def _flush_carry(self):
+        if self._carry:
+            self._publish([self._carry.decode("utf-8", errors="replace")])
+            self._carry = b""
+
+    def _publish(self, lines: List[str]):
+        self.lines_read += len(lines)
+        for queue in self.subscribers:
+            for line in lines:
+                if queue.full():
+                    # Penonton yang lambat kehilangan baris tertua, bukan memperlambat yang lain
+                    queue.get_nowait()
+                queue.put_nowait(line)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "subscribers": len(self.subscribers),
+            "inotify": self._watching,
+            "open": self._file is not None,
+            "rotations": self.rotations,
+            "lines_read": self.lines_read,
+        }
+
+
+class LogTailerRegistry:
+    def __init__(self):
+        self._tailers: Dict[str, LogTailer] = {}
+
+    def subscribe(self, path: str) -> asyncio.Queue:
+        """Harus dipanggil dari event loop. Queue menerima setiap baris baru (termasuk newline)."""
+        key = os.path.abspath(path)
+        tailer = self._tailers.get(key)
+        if tailer is None:
+            tailer = LogTailer(key, asyncio.get_running_loop())
+            tailer.start()
+            self._tailers[key] = tailer
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        tailer.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, path: str, queue: asyncio.Queue):
+        key = os.path.abspath(path)
+        tailer = self._tailers.get(key)
+        if tailer is None:
+            return
+        tailer.subscribers.discard(queue)
+        if not tailer.subscribers:
+            tailer.stop()
+            del self._tailers[key]
+
+    def stats(self) -> List[dict]:
+        return [tailer.stats() for tailer in self._tailers.values()]
+
+
+log_tailers = LogTailerRegistry()
@@ -1,14 +1,26 @@
+import asyncio
+import sqlite3
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from backend.routes import filemanager, server, command, config, tunnel, upload, websocket
-from backend.database import initialize_database, create_connection
-from backend import auth, models
+from backend.database import initialize_database
+from backend import auth, models, repositories, ws_log
+from backend.auth_cache import invalidate_user
 from datetime import timedelta
 from backend.routes import webhooks
 from backend.routes import versions
 from backend.routes import manage_servers
+from backend.routes import backups
+from backend.routes import world
+from backend.routes import console_log
 from backend.server_watcher import start_watcher
+from backend.log_pipeline import log_pipeline
+from backend.version_manifest import manifest_cache
+from backend.upload_sessions import upload_sessions
+from backend.telemetry import resource_sampler
+from backend.status_hub import status_hub
+from backend.console_log import console_logs
 
 # Inisialisasi database saat aplikasi dimulai
 initialize_database()
@@ -16,6 +28,22 @@ start_watcher()
 
 app = FastAPI(title="Minecraft Manager API")
 
+@app.on_event("startup")
+async def start_log_pipeline():
+    # Pipeline log harus berjalan di event loop utama agar WebSocket diakses dari loop yang sama
+    log_pipeline.start(websocket.manager.broadcast_lines)
+    upload_sessions.start_cleanup()
+    resource_sampler.start()
+    status_hub.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await log_pipeline.stop()
+    await upload_sessions.stop_cleanup()
+    resource_sampler.stop()
+    console_logs.flush()
+    await manifest_cache.aclose()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://mc.nggo.site", "https://mc.nggo.site"],
@@ -25,38 +53,28 @@ app.add_middleware(
 
 # Endpoint untuk registrasi pengguna baru
 @app.post("/register", response_model=models.User)
-def register_user(user: models.UserCreate):
-    conn = create_connection()
-    if db_user := auth.get_user(conn, user.username):
-        if conn:
-            conn.close()
+async def register_user(user: models.UserCreate):
+    # Pool koneksi bisa menunggu koneksi kosong: jangan memblokir event loop
+    if await asyncio.to_thread(auth.get_user, user.username):
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await auth.password_hasher.hash(user.password)
     # Anda bisa mengatur path default di sini
     default_server_path = f"servers/{user.username}"
     
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO users (username, hashed_password, server_path) VALUES (?, ?, ?)",
-        (user.username, hashed_password, default_server_path)
-    )
-    conn.commit()
-    conn.close()
+    try:
+        await asyncio.to_thread(repositories.users.create, user.username, hashed_password, default_server_path)
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=400, detail="Username already registered")
+    invalidate_user(user.username)
     
     return models.User(username=user.username, server_path=default_server_path)
 
 # Endpoint untuk login dan mendapatkan token
 @app.post("/token", response_model=models.Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    conn = create_connection()
-    user = auth.get_user(conn, form_data.username)
-    if conn:
-        conn.close()
-    if not user or not auth.verify_password(form_data.password, user["hashed_password"]):
+    user = await asyncio.to_thread(auth.get_user, form_data.username)
+    if not user or not await auth.password_hasher.verify(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -68,6 +86,15 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.get("/metrics/password-hashing", dependencies=[Depends(auth.get_current_user)])
+def get_password_hashing_metrics():
+    return auth.password_hasher.stats()
+
+@app.get("/metrics/telemetry", dependencies=[Depends(auth.get_current_user)])
+def get_telemetry_metrics():
+    # Biaya sampler sendiri (durasi putaran terakhir dan total waktu CPU thread sampler)
+    return resource_sampler.stats()
+
 # Melindungi router yang ada dengan otentikasi
 # Perhatikan penambahan `dependencies=[Depends(auth.get_current_user)]`
 app.include_router(
@@ -111,6 +138,21 @@ app.include_router(
     dependencies=[Depends(auth.get_current_user)],
     tags=["manage_servers"]
     )
+app.include_router(
+    backups.router,
+    dependencies=[Depends(auth.get_current_user)],
+    tags=["backups"]
+)
+app.include_router(
+    world.router,
+    dependencies=[Depends(auth.get_current_user)],
+    tags=["world"]
+)
+app.include_router(
+    console_log.router,
+    dependencies=[Depends(auth.get_current_user)],
+    tags=["console_log"]
+)
 
 
 # Daftarkan router upload tanpa prefix
@@ -125,6 +167,10 @@ app.include_router(
     websocket.router,
     tags=["WebSockets"]
 )
+app.include_router(
+    ws_log.router,
+    tags=["WebSockets"]
+)
 
 if __name__ == "__main__":
     import uvicorn
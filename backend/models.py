@@ -88,4 +88,54 @@ class WebhookCreate(BaseModel):
     """
     Model untuk membuat webhook baru.
     """
-    webhook_url: HttpUrl
\ No newline at end of file
+    webhook_url: HttpUrl
+class UploadSessionCreate(BaseModel):
+    """
+    Model untuk membuat sesi unggah bertahap (chunked).
+    """
+    filename: str
+    size: int
+    path: str = ""
+    chunk_size: Optional[int] = None
+    sha256: Optional[str] = None
+    overwrite: bool = False
+
+class ContentSearchRequest(BaseModel):
+    """
+    Model untuk pencarian isi file (grep) di direktori server.
+    """
+    query: str
+    path: str = ""
+    regex: bool = False
+    case_sensitive: bool = False
+    include: Optional[str] = None
+    max_file_size: Optional[int] = None
+    max_matches: Optional[int] = None
+
+class IdleTimeoutUpdate(BaseModel):
+    """
+    Model untuk mengatur batas waktu idle server dalam menit.
+    """
+    minutes: float
+
+class BackupRetention(BaseModel):
+    """
+    Model aturan retensi snapshot backup dunia.
+    """
+    keep_last: int = 7
+    keep_daily: int = 7
+    keep_weekly: int = 4
+
+class WorldPruneRequest(BaseModel):
+    """
+    Model pemangkasan dunia: chunk dibuang jika berada di luar area (radius/poligon, koordinat blok)
+    atau InhabitedTime-nya di bawah min_inhabited_ticks (20 tick = 1 detik).
+    """
+    dry_run: bool = True
+    compact: bool = True
+    min_inhabited_ticks: Optional[int] = None
+    center_x: int = 0
+    center_z: int = 0
+    radius: Optional[int] = None
+    polygon: Optional[List[List[int]]] = None
+    dimensions: Optional[List[str]] = None
@@ -0,0 +1,147 @@
+# Lapisan akses data. Handler memanggil repository ini alih-alih menulis cursor sendiri;
+# semua query berjalan lewat pool koneksi bersama di backend.database.
+
+from typing import List, Optional
+
+from backend.database import ConnectionPool, pool
+
+
+class UserRepository:
+    def __init__(self, db: ConnectionPool):
+        self.db = db
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        return self.db.fetch_one(
+            "SELECT id, username, hashed_password, server_path FROM users WHERE username = ?",
+            (username,),
+        )
+
+    def get_id(self, username: str) -> Optional[int]:
+        row = self.db.fetch_one("SELECT id FROM users WHERE username = ?", (username,))
+        return row["id"] if row else None
+
+    def create(self, username: str, hashed_password: str, server_path: str) -> int:
+        cursor = self.db.execute(
+            "INSERT INTO users (username, hashed_password, server_path) VALUES (?, ?, ?)",
+            (username, hashed_password, server_path),
+        )
+        return cursor.lastrowid
+
+    def set_server_version(self, username: str, version: str) -> int:
+        """Kolom lama users.server_version; mengembalikan jumlah baris yang diubah."""
+        cursor = self.db.execute(
+            "UPDATE users SET server_version = ? WHERE username = ?",
+            (version, username),
+        )
+        return cursor.rowcount
+
+
+class ServerRepository:
+    def __init__(self, db: ConnectionPool):
+        self.db = db
+
+    def get_owned(self, server_id: int, username: str) -> Optional[dict]:
+        """Detail server jika dimiliki oleh pengguna, selain itu None."""
+        return self.db.fetch_one("""
+            SELECT s.id, s.path, s.version FROM servers s
+            JOIN users u ON s.user_id = u.id
+            WHERE s.id = ? AND u.username = ?
+        """, (server_id, username))
+
+    def list_for_user(self, username: str) -> List[dict]:
+        return self.db.fetch_all("""
+            SELECT s.id, s.name, s.version, s.path FROM servers s
+            JOIN users u ON s.user_id = u.id
+            WHERE u.username = ?
+        """, (username,))
+
+    def list_all(self) -> List[dict]:
+        return self.db.fetch_all("SELECT id, user_id, name, version, path FROM servers")
+
+    def create(self, user_id: int, name: str, version: str, path: str) -> int:
+        """Raises sqlite3.IntegrityError jika path sudah terdaftar."""
+        cursor = self.db.execute(
+            "INSERT INTO servers (user_id, name, version, path) VALUES (?, ?, ?, ?)",
+            (user_id, name, version, path),
+        )
+        return cursor.lastrowid
+
+    def delete(self, server_id: int) -> int:
+        return self.db.execute("DELETE FROM servers WHERE id = ?", (server_id,)).rowcount
+
+    def get_idle_timeout(self, server_id: int) -> Optional[float]:
+        """Batas idle dalam menit; None berarti memakai bawaan."""
+        row = self.db.fetch_one("SELECT idle_timeout_minutes FROM servers WHERE id = ?", (server_id,))
+        return row["idle_timeout_minutes"] if row else None
+
+    def set_idle_timeout(self, server_id: int, minutes: Optional[float]) -> int:
+        cursor = self.db.execute(
+            "UPDATE servers SET idle_timeout_minutes = ? WHERE id = ?", (minutes, server_id)
+        )
+        return cursor.rowcount
+
+
+class WebhookRepository:
+    def __init__(self, db: ConnectionPool):
+        self.db = db
+
+    def create(self, user_id: int, webhook_url: str) -> int:
+        cursor = self.db.execute(
+            "INSERT INTO user_webhooks (user_id, webhook_url) VALUES (?, ?)",
+            (user_id, webhook_url),
+        )
+        return cursor.lastrowid
+
+    def list_for_user(self, user_id: int) -> List[dict]:
+        return self.db.fetch_all(
+            "SELECT id, webhook_url FROM user_webhooks WHERE user_id = ?", (user_id,)
+        )
+
+    def list_urls_for_username(self, username: str) -> List[str]:
+        rows = self.db.fetch_all("""
+            SELECT wh.webhook_url
+            FROM user_webhooks wh
+            JOIN users u ON wh.user_id = u.id
+            WHERE u.username = ?
+        """, (username,))
+        return [row["webhook_url"] for row in rows]
+
+    def delete(self, webhook_id: int, user_id: int) -> int:
+        cursor = self.db.execute(
+            "DELETE FROM user_webhooks WHERE id = ? AND user_id = ?",
+            (webhook_id, user_id),
+        )
+        return cursor.rowcount
+
+
+class StartupTimeRepository:
+    def __init__(self, db: ConnectionPool):
+        self.db = db
+
+    def record(self, server_id: int, version: str, started_at: float, ready_at: float,
+               reported_seconds: Optional[float], init_seconds: Optional[float]):
+        self.db.execute(
+            """INSERT INTO server_startups
+               (server_id, version, started_at, ready_at, duration_seconds, reported_seconds, init_seconds)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (server_id, version, started_at, ready_at, ready_at - started_at, reported_seconds, init_seconds),
+        )
+
+    def recent(self, server_id: int, limit: int = 50) -> List[dict]:
+        return self.db.fetch_all("""
+            SELECT version, started_at, ready_at, duration_seconds, reported_seconds, init_seconds
+            FROM server_startups WHERE server_id = ? ORDER BY started_at DESC LIMIT ?
+        """, (server_id, limit))
+
+    def by_version(self, server_id: int) -> List[dict]:
+        return self.db.fetch_all("""
+            SELECT version, COUNT(*) AS starts, AVG(duration_seconds) AS avg_seconds,
+                   MIN(duration_seconds) AS min_seconds, MAX(duration_seconds) AS max_seconds
+            FROM server_startups WHERE server_id = ? GROUP BY version ORDER BY version
+        """, (server_id,))
+
+
+users = UserRepository(pool)
+servers = ServerRepository(pool)
+webhooks = WebhookRepository(pool)
+startup_times = StartupTimeRepository(pool)
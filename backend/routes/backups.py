@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException
+from backend import models
+from backend.dependencies import get_server_details
+from backend.world_backup import BackupError, world_backups
+from backend.world_pruner import world_pruner
+
+router = APIRouter()
+
+@router.post("/servers/{server_id}/backups", summary="Membuat snapshot backup dunia (inkremental)")
+def create_backup(server_details: dict = Depends(get_server_details)):
+    """
+    Menjalankan backup di latar belakang dan langsung mengembalikan status job.
+    Jika server berjalan, penyimpanan otomatis dimatikan sementara (save-off + save-all flush).
+    """
+    server_id = server_details['id']
+
+    def not_pruning():
+        # Snapshot dari region yang setengah dipadatkan tidak konsisten
+        if world_pruner.is_rewriting(server_id):
+            raise BackupError(409, "Dunia server sedang dipangkas. Tunggu hingga selesai.")
+
+    try:
+        job = world_backups.start_backup(server_id, server_details['path'], not_pruning)
+    except BackupError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return job.status()
+
+@router.get("/servers/{server_id}/backups", summary="Melihat snapshot backup, aturan retensi, dan ukuran store")
+def list_backups(server_details: dict = Depends(get_server_details)):
+    return world_backups.overview(server_details['id'])
+
+@router.get("/servers/{server_id}/backups/jobs/{job_id}", summary="Melihat progres job backup/restore")
+def get_backup_job(job_id: str, server_details: dict = Depends(get_server_details)):
+    try:
+        return world_backups.get_job(server_details['id'], job_id).status()
+    except BackupError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.post("/servers/{server_id}/backups/{snapshot_id}/restore", summary="Memulihkan dunia dari snapshot")
+def restore_backup(snapshot_id: str, server_details: dict = Depends(get_server_details)):
+    """Hanya file yang berbeda (ukuran/mtime) yang ditulis ulang. Server harus dalam keadaan berhenti."""
+    try:
+        job = world_backups.start_restore(server_details['id'], server_details['path'], snapshot_id)
+    except BackupError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return job.status()
+
+@router.delete("/servers/{server_id}/backups/{snapshot_id}", summary="Menghapus snapshot backup")
+def delete_backup(snapshot_id: str, server_details: dict = Depends(get_server_details)):
+    try:
+        return world_backups.delete_snapshot(server_details['id'], snapshot_id)
+    except BackupError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.put("/servers/{server_id}/backups/retention", summary="Mengatur aturan retensi snapshot backup")
+def set_backup_retention(payload: models.BackupRetention, server_details: dict = Depends(get_server_details)):
+    try:
+        return world_backups.set_retention(server_details['id'], payload.model_dump())
+    except BackupError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
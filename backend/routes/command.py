@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from backend import models
 from backend.dependencies import get_server_details
 from backend.shared_state import server_processes # <-- PERBAIKAN: Impor dari file 'shared_state.py' yang netral
+from backend.server_watcher import update_activity
 
 router = APIRouter()
 
@@ -23,8 +24,8 @@ def send_command(
         
     try:
         # Menulis perintah ke proses server yang benar
-        process.stdin.write(command_data.command + '\n')
-        process.stdin.flush()
+        process.send_command(command_data.command)
+        update_activity(server_id)
         return {"status": "command_sent", "server_id": server_id, "command": command_data.command}
     except Exception as e:
         # Menangani error jika terjadi masalah saat menulis ke proses
@@ -0,0 +1,40 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from backend.console_log import ConsoleLogError, console_logs
+from backend.dependencies import get_server_details
+
+router = APIRouter()
+
+def _split(value: Optional[str]):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+@router.get("/servers/{server_id}/console-log", summary="Mencari log konsol terstruktur")
+def query_console_log(
+    since: Optional[float] = Query(None, description="Unix timestamp awal (inklusif)"),
+    until: Optional[float] = Query(None, description="Unix timestamp akhir (eksklusif)"),
+    level: Optional[str] = Query(None, description="Satu atau beberapa level, dipisah koma: INFO,WARN,ERROR"),
+    event: Optional[str] = Query(None, description="join, leave, chat, death, atau lag (dipisah koma)"),
+    player: Optional[str] = None,
+    q: Optional[str] = Query(None, description="Pencarian teks penuh pada pesan"),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+    limit: int = 100,
+    server_details: dict = Depends(get_server_details),
+):
+    """Record terbaru lebih dulu. Contoh: semua peringatan lag seminggu terakhir: ?event=lag&since=<now-604800>."""
+    try:
+        return console_logs.query(server_details['id'], since, until, _split(level), _split(event), player, q,
+                                  cursor, limit)
+    except ConsoleLogError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/servers/{server_id}/console-log/stats", summary="Ringkasan log konsol tersimpan")
+def get_console_log_stats(server_details: dict = Depends(get_server_details)):
+    return console_logs.stats(server_details['id'])
+
+@router.post("/servers/{server_id}/console-log/import", summary="Mengimpor arsip logs/*.log.gz ke log terstruktur")
+def import_console_logs(server_details: dict = Depends(get_server_details)):
+    """Arsip yang sudah diimpor (nama dan ukuran sama) dilewati."""
+    try:
+        return console_logs.start_import(server_details['id'], server_details['path'])
+    except ConsoleLogError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
@@ -1,19 +1,32 @@
 import os
 import shutil
+import stat
 import mimetypes
-import zipfile
-import io
 from datetime import datetime
 from fastapi import (
     APIRouter, Depends, UploadFile, File, Form, HTTPException, 
-    Path, Query, Body, Response
+    Path, Query, Body, Response, Request, Header
 )
 from fastapi.responses import StreamingResponse
-from typing import List
+import asyncio
+import json
+from typing import List, Optional
+from backend import models
 from backend.dependencies import get_server_details
+from backend.content_search import ContentSearchError, content_search
+from backend.file_index import FileIndexError, file_index
+from backend.upload_sessions import UploadError, check_filename, upload_sessions
+from backend.utils.line_index import MAX_PREVIEW_BYTES, MAX_PREVIEW_LINES, line_index_cache
+from backend.utils.dir_listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ListingError, directory_lister
+from backend.utils.file_manager import (
+    DownloadResponse, is_not_modified, not_modified_response, iter_zip_sources, stream_zip, ZipBusyError,
+    atomic_copy_fileobj
+)
 
 router = APIRouter()
 
+PREVIEW_FULL_LIMIT = 2 * 1024 * 1024  # Batas 2MB untuk mode full
+
 # --- DEPENDENCY HELPER ---
 def get_server_path(server_details: dict = Depends(get_server_details)) -> str:
     """Dependency untuk mendapatkan path dari detail server yang sudah divalidasi."""
@@ -47,36 +60,48 @@ def secure_path(base_dir: str, relative_path: str):
 @router.get("/files/{server_id}", summary="Melihat daftar file di server spesifik")
 def list_files_in_server(
     server_path: str = Depends(get_server_path),
-    path: str = Query("", description="Path relatif di dalam server")
+    path: str = Query("", description="Path relatif di dalam server"),
+    sort: str = Query("name", description="Urutkan berdasarkan: name, size, atau mtime"),
+    order: str = Query("asc", description="asc atau desc"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Nilai next_cursor dari halaman sebelumnya"),
+    pattern: Optional[str] = Query(None, description="Filter glob, mis. *.mca")
 ):
     abs_path = secure_path(server_path, path)
     if not os.path.isdir(abs_path):
         raise HTTPException(status_code=404, detail="Path tidak ditemukan atau bukan direktori.")
-    
+
+    try:
+        page = directory_lister.list(abs_path, sort=sort, order=order, limit=limit, cursor=cursor, pattern=pattern)
+    except ListingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     items = []
-    for item_name in sorted(os.listdir(abs_path)):
-        try:
-            item_path = os.path.join(abs_path, item_name)
-            is_dir = os.path.isdir(item_path)
-            stat = os.stat(item_path)
-            items.append({
-                "name": item_name, "type": "folder" if is_dir else "file",
-                "path": os.path.join(path, item_name).replace("\\", "/"),
-                "icon": get_file_icon(item_name, is_dir), "size": stat.st_size,
-                "size_formatted": format_file_size(stat.st_size) if not is_dir else "",
-                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            })
-        except OSError:
-            continue
-    folders = [i for i in items if i['type'] == 'folder']
-    files = [i for i in items if i['type'] == 'file']
-    return {"current_path": path, "files": folders + files}
+    for entry in page["entries"]:
+        items.append({
+            "name": entry.name, "type": "folder" if entry.is_dir else "file",
+            "path": os.path.join(path, entry.name).replace("\\", "/"),
+            "icon": get_file_icon(entry.name, entry.is_dir), "size": entry.size,
+            "size_formatted": format_file_size(entry.size) if not entry.is_dir else "",
+            "modified": datetime.fromtimestamp(entry.mtime).isoformat(),
+        })
+    return {"current_path": path, "files": items, "total": page["total"], "next_cursor": page["next_cursor"]}
 
 @router.get("/files/{server_id}/preview", summary="Melihat pratinjau file teks")
 def preview_file(
     server_path: str = Depends(get_server_path),
-    path: str = Query(..., description="Path lengkap ke file")
+    path: str = Query(..., description="Path lengkap ke file"),
+    mode: Optional[str] = Query(None, description="full, head, tail, lines, atau bytes"),
+    lines: int = Query(200, ge=1, le=MAX_PREVIEW_LINES, description="Jumlah baris untuk head/tail/lines"),
+    start_line: int = Query(1, ge=1, description="Baris awal (1-based) untuk mode lines"),
+    offset: int = Query(0, ge=0, description="Offset byte untuk mode bytes"),
+    length: int = Query(64 * 1024, ge=1, le=MAX_PREVIEW_BYTES, description="Jumlah byte untuk mode bytes")
 ):
+    """
+    Pratinjau bertahap: head/tail/lines memakai indeks offset baris yang di-cache per file
+    (dipakai ulang selama ukuran dan mtime tidak berubah), sehingga membuka bagian mana
+    pun dari log ratusan MB tetap cepat dan memakai memori yang tetap.
+    """
     abs_path = secure_path(server_path, path)
     if not os.path.isfile(abs_path):
         raise HTTPException(status_code=404, detail="File tidak ditemukan.")
@@ -101,26 +126,49 @@ def preview_file(
     if not is_text_file:
         raise HTTPException(status_code=400, detail="Pratinjau hanya untuk file berbasis teks.")
     
-    if os.path.getsize(abs_path) > 2 * 1024 * 1024: # Batas 2MB
-        raise HTTPException(status_code=400, detail="File terlalu besar untuk pratinjau.")
+    if mode is None:
+        # Perilaku lama untuk file kecil: seluruh isi; file besar otomatis tampil bagian akhirnya
+        mode = "full" if os.path.getsize(abs_path) <= PREVIEW_FULL_LIMIT else "tail"
+    if mode == "full":
+        if os.path.getsize(abs_path) > PREVIEW_FULL_LIMIT:
+            raise HTTPException(status_code=400, detail="File terlalu besar untuk pratinjau penuh; gunakan mode head, tail, lines, atau bytes.")
+        with open(abs_path, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+        return {"content": content, "mode": "full"}
+    if mode not in ("head", "tail", "lines", "bytes"):
+        raise HTTPException(status_code=400, detail="Mode pratinjau harus full, head, tail, lines, atau bytes.")
 
-    with open(abs_path, 'r', encoding='utf-8', errors='replace') as f:
-        content = f.read()
-    return {"content": content}
+    result = line_index_cache.read(abs_path, mode=mode, start_line=start_line, lines=lines, offset=offset, length=length)
+    result["mode"] = mode
+    return result
 
 @router.get("/files/{server_id}/download", summary="Mengunduh satu file")
 def download_single_file(
+    request: Request,
     server_path: str = Depends(get_server_path),
     path: str = Query(..., description="Path ke file yang akan diunduh")
 ):
+    """
+    File dialirkan per potongan (tidak dibaca utuh ke memori), mendukung header Range
+    untuk melanjutkan atau mengunduh paralel, serta ETag/Last-Modified untuk respons 304.
+    """
     abs_path = secure_path(server_path, path)
-    if not os.path.isfile(abs_path):
+    try:
+        stat_result = os.stat(abs_path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="File tidak ditemukan.")
+    if not stat.S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="File tidak ditemukan.")
-    
-    with open(abs_path, "rb") as f:
-        content = f.read()
-        
-    return Response(content=content, media_type="application/octet-stream", headers={"Content-Disposition": f"attachment; filename={os.path.basename(abs_path)}"})
+
+    response = DownloadResponse(
+        abs_path,
+        media_type="application/octet-stream",
+        filename=os.path.basename(abs_path),
+        stat_result=stat_result,
+    )
+    if is_not_modified(request.headers, response):
+        return not_modified_response(response)
+    return response
 
 @router.post("/files/{server_id}/upload", summary="Mengunggah satu atau lebih file")
 async def upload_files(
@@ -133,12 +181,83 @@ async def upload_files(
         raise HTTPException(status_code=400, detail="Path tujuan bukan direktori.")
     
     for file in files:
-        file_location = os.path.join(upload_dir, file.filename)
-        with open(file_location, "wb+") as file_object:
-            shutil.copyfileobj(file.file, file_object)
+        try:
+            filename = check_filename(file.filename)
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        # Tulis ke file sementara lalu rename, agar tidak ada file setengah jadi jika unggahan gagal
+        await asyncio.to_thread(atomic_copy_fileobj, file.file, os.path.join(upload_dir, filename))
             
     return {"info": f"{len(files)} file berhasil diunggah."}
 
+# --- UNGGAH BERTAHAP (CHUNKED) ---
+# Alur: buat sesi -> PUT potongan (boleh paralel) -> GET status untuk melanjutkan -> complete.
+
+@router.post("/files/{server_id}/uploads", summary="Membuat sesi unggah bertahap")
+def create_upload_session(
+    server_id: int,
+    payload: models.UploadSessionCreate,
+    server_path: str = Depends(get_server_path)
+):
+    upload_dir = secure_path(server_path, payload.path)
+    try:
+        filename = check_filename(payload.filename)
+        session = upload_sessions.create(
+            server_id, os.path.join(upload_dir, filename), payload.size,
+            payload.chunk_size, payload.sha256, payload.overwrite,
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return session.status()
+
+@router.get("/files/{server_id}/uploads/{upload_id}", summary="Status sesi unggah dan rentang yang sudah diterima")
+def get_upload_session(server_id: int, upload_id: str, server_path: str = Depends(get_server_path)):
+    try:
+        return upload_sessions.get(upload_id, server_id).status()
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.put("/files/{server_id}/uploads/{upload_id}/chunks/{index}", summary="Mengunggah satu potongan")
+async def upload_chunk(
+    request: Request,
+    server_id: int,
+    upload_id: str,
+    index: int,
+    server_path: str = Depends(get_server_path),
+    x_chunk_sha256: Optional[str] = Header(None, description="SHA-256 (hex) isi potongan")
+):
+    """Body request adalah data mentah potongan. Mengirim ulang potongan yang sama aman."""
+    try:
+        session = upload_sessions.get(upload_id, server_id)
+        content_length = request.headers.get("content-length")
+        if content_length is not None and int(content_length) > session.chunk_size:
+            raise UploadError(413, "Potongan lebih besar dari ukuran potongan sesi.")
+        data = await request.body()
+        return await asyncio.to_thread(upload_sessions.write_chunk, session, index, data, x_chunk_sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.post("/files/{server_id}/uploads/{upload_id}/complete", summary="Menyelesaikan sesi unggah")
+async def complete_upload_session(server_id: int, upload_id: str, server_path: str = Depends(get_server_path)):
+    try:
+        session = upload_sessions.get(upload_id, server_id)
+        dest_path = await asyncio.to_thread(upload_sessions.finalize, session)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {
+        "status": "uploaded",
+        "path": os.path.relpath(dest_path, server_path).replace("\\", "/"),
+        "size": session.size,
+    }
+
+@router.delete("/files/{server_id}/uploads/{upload_id}", summary="Membatalkan sesi unggah")
+def abort_upload_session(server_id: int, upload_id: str, server_path: str = Depends(get_server_path)):
+    try:
+        upload_sessions.abort(upload_sessions.get(upload_id, server_id))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {"status": "aborted", "upload_id": upload_id}
+
 @router.post("/files/{server_id}/rename", summary="Mengganti nama file atau folder")
 def rename_item(
     server_path: str = Depends(get_server_path),
@@ -222,32 +341,103 @@ def move_item(
 
 @router.post("/files/{server_id}/search", summary="Mencari file di direktori server")
 def search_files(
+    server_id: int,
     server_path: str = Depends(get_server_path),
-    query: str = Form(...),
-    path: str = Form("")
+    query: str = Form(""),
+    path: str = Form(""),
+    mode: str = Form("substring", description="substring, prefix, atau glob"),
+    ext: str = Form("", description="Filter ekstensi dipisah koma, mis. yml,json"),
+    type: Optional[str] = Form(None, description="file atau folder"),
+    limit: int = Form(100),
+    offset: int = Form(0)
 ):
-    search_dir = secure_path(server_path, path)
-    results = []
-    for root, _, files in os.walk(search_dir):
-        for file_name in files:
-            if query.lower() in file_name.lower():
-                full_path = os.path.join(root, file_name)
-                results.append({
-                    "name": file_name,
-                    "path": os.path.relpath(full_path, server_path).replace("\\", "/"),
-                })
-    return {"results": results}
+    """
+    Mencari lewat indeks nama file per server (SQLite FTS5 trigram). Indeks diperbarui
+    di latar belakang; selama pembangunan pertama, field index.ready bernilai false dan
+    hasil bisa belum lengkap.
+    """
+    secure_path(server_path, path)
+    extensions = [e.strip() for e in ext.split(",") if e.strip()]
+    try:
+        return file_index.search(
+            server_id, server_path, query=query, mode=mode, extensions=extensions,
+            kind=type, under=path, limit=limit, offset=max(offset, 0),
+        )
+    except FileIndexError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/files/{server_id}/search/reindex", summary="Memindai ulang indeks file sekarang")
+def reindex_files(server_id: int, server_path: str = Depends(get_server_path)):
+    file_index.request_refresh(server_id, server_path, force=True)
+    return {"status": "queued", "index": file_index.status(server_id)}
+
+@router.post("/files/{server_id}/grep", summary="Mencari isi file (grep) dengan hasil streaming")
+async def grep_files(
+    server_id: int,
+    payload: models.ContentSearchRequest,
+    server_path: str = Depends(get_server_path)
+):
+    """
+    Hasil dikirim sebagai NDJSON (satu objek JSON per baris) begitu ditemukan:
+    baris pertama {"type": "job", "job_id": ...}, lalu {"type": "match", ...}, dan
+    ditutup {"type": "done", ...}. Job bisa dihentikan lewat DELETE .../grep/{job_id}
+    atau dengan menutup koneksi.
+    """
+    start_dir = secure_path(server_path, payload.path)
+    if not os.path.exists(start_dir):
+        raise HTTPException(status_code=404, detail="Path tidak ditemukan.")
+    options = {k: v for k, v in (("max_file_size", payload.max_file_size), ("max_matches", payload.max_matches)) if v}
+    try:
+        job = content_search.start(
+            server_id, server_path, start_dir, payload.query, regex=payload.regex,
+            case_sensitive=payload.case_sensitive, include=payload.include, **options,
+        )
+    except ContentSearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    async def stream_results():
+        yield json.dumps({"type": "job", "job_id": job.job_id}) + "\n"
+        try:
+            async for item in job.iter_results():
+                yield json.dumps(item) + "\n"
+        finally:
+            # Klien memutus koneksi: hentikan pemindaian
+            job.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson", headers={"X-Search-Job": job.job_id})
+
+@router.get("/files/{server_id}/grep/{job_id}", summary="Status job pencarian isi file")
+def get_grep_job(server_id: int, job_id: str, server_path: str = Depends(get_server_path)):
+    try:
+        return content_search.get(job_id, server_id).status()
+    except ContentSearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.delete("/files/{server_id}/grep/{job_id}", summary="Membatalkan job pencarian isi file")
+def cancel_grep_job(server_id: int, job_id: str, server_path: str = Depends(get_server_path)):
+    try:
+        job = content_search.get(job_id, server_id)
+    except ContentSearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    job.cancel()
+    return job.status()
 
 @router.post("/files/{server_id}/zip-selection", summary="Membuat ZIP dari file-file yang dipilih")
 def download_selected_as_zip(
     server_path: str = Depends(get_server_path),
     files: List[str] = Body(..., embed=True)
 ):
-    zip_io = io.BytesIO()
-    with zipfile.ZipFile(zip_io, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for relative_path in files:
-            abs_path = secure_path(server_path, relative_path)
-            if os.path.exists(abs_path):
-                zf.write(abs_path, relative_path)
-    zip_io.seek(0)
-    return StreamingResponse(zip_io, media_type="application/zip", headers={"Content-Disposition": "attachment; filename=selection.zip"})
\ No newline at end of file
+    """
+    Arsip dibuat secara streaming: folder ditelusuri rekursif, data dikirim begitu
+    setiap entri selesai dikompresi, dan file yang sudah terkompresi (.mca, .jar, .png)
+    disimpan tanpa kompresi ulang.
+    """
+    for relative_path in files:
+        if not os.path.exists(secure_path(server_path, relative_path)):
+            raise HTTPException(status_code=404, detail=f"Item tidak ditemukan: {relative_path}")
+    sources = iter_zip_sources(server_path, files)
+    try:
+        body = stream_zip(sources)
+    except ZipBusyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return StreamingResponse(body, media_type="application/zip", headers={"Content-Disposition": "attachment; filename=selection.zip"})
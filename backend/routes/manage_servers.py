@@ -4,8 +4,18 @@ from pydantic import BaseModel
 from typing import List
 import os
 import shutil
-from backend import auth, models
-from backend.database import create_connection
+from backend import auth, models, repositories
+from backend.auth_cache import invalidate_server
+from backend.console_log import console_logs
+from backend.file_index import file_index
+from backend.log_pipeline import log_pipeline
+from backend.scrollback import scrollback
+from backend.status_hub import status_hub
+from backend.telemetry import resource_sampler
+from backend.utils.server_control import lifecycle
+from backend.world_backup import BackupError, world_backups
+from backend.world_inspector import world_inspector
+from backend.world_pruner import world_pruner
 
 router = APIRouter()
 
@@ -32,50 +42,27 @@ def create_server(
     
     os.makedirs(server_path, exist_ok=True)
     
-    conn = create_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Gagal terhubung ke database.")
-    cursor = conn.cursor()
+    # Dapatkan user_id dari username
+    user_id = repositories.users.get_id(current_user.username)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="Pengguna tidak ditemukan")
     try:
-        # Dapatkan user_id dari username
-        cursor.execute("SELECT id FROM users WHERE username = ?", (current_user.username,))
-        user_row = cursor.fetchone()
-        if not user_row:
-            raise HTTPException(status_code=404, detail="Pengguna tidak ditemukan")
-        user_id = user_row['id']
-        
-        cursor.execute(
-            "INSERT INTO servers (user_id, name, version, path) VALUES (?, ?, ?, ?)",
-            (user_id, server_name, server_data.version, server_path)
-        )
-        new_server_id = cursor.lastrowid
-        conn.commit()
+        new_server_id = repositories.servers.create(user_id, server_name, server_data.version, server_path)
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400, detail="Path server sudah terdaftar.")
-    finally:
-        conn.close()
+    invalidate_server(new_server_id, current_user.username)
     
     if new_server_id is None:
         raise HTTPException(status_code=500, detail="Gagal mendapatkan ID server baru.")
+    status_hub.register_server(new_server_id, current_user.username)
         
     return ServerInfo(id=new_server_id, name=server_name, version=server_data.version)
 
 @router.get("/servers", response_model=List[ServerInfo], summary="Melihat semua server milik pengguna")
 def list_servers(current_user: models.User = Depends(auth.get_current_user)):
     """Mengambil daftar semua server yang telah dibuat oleh pengguna."""
-    conn = create_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Gagal terhubung ke database.")
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.id, s.name, s.version FROM servers s
-        JOIN users u ON s.user_id = u.id
-        WHERE u.username = ?
-    """, (current_user.username,))
-    
-    servers = [ServerInfo(id=row['id'], name=row['name'], version=row['version']) for row in cursor.fetchall()]
-    conn.close()
-    return servers
+    rows = repositories.servers.list_for_user(current_user.username)
+    return [ServerInfo(id=row['id'], name=row['name'], version=row['version']) for row in rows]
 
 @router.delete("/servers/{server_id}", status_code=204, summary="Menghapus server")
 def delete_server(
@@ -83,29 +70,37 @@ def delete_server(
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Menghapus server dari database dan menghapus direktorinya dari sistem file."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    
     # Verifikasi kepemilikan dan dapatkan path
-    cursor.execute("""
-        SELECT s.path FROM servers s JOIN users u ON s.user_id = u.id
-        WHERE s.id = ? AND u.username = ?
-    """, (server_id, current_user.username))
-    server_row = cursor.fetchone()
-
+    server_row = repositories.servers.get_owned(server_id, current_user.username)
     if not server_row:
-        conn.close()
         raise HTTPException(status_code=404, detail="Server tidak ditemukan atau bukan milik Anda.")
     
     server_path = server_row['path']
+
+    # Store backup dihapus lebih dulu: tolak penghapusan selama backup/restore masih memakainya
+    try:
+        world_backups.drop(server_id)
+    except BackupError as e:
+        raise HTTPException(status_code=e.status_code,
+                            detail="Backup atau restore sedang berjalan untuk server ini. Tunggu hingga selesai.")
     
     # Hapus dari database
-    cursor.execute("DELETE FROM servers WHERE id = ?", (server_id,))
-    conn.commit()
-    conn.close()
+    repositories.servers.delete(server_id)
+    invalidate_server(server_id)
     
     # Hapus direktori dari sistem file
     if os.path.exists(server_path):
         shutil.rmtree(server_path)
+
+    # Bersihkan riwayat konsol yang masih tersimpan di memori
+    log_pipeline.reset(server_id)
+    scrollback.drop(server_id)
+    lifecycle.forget(server_id)
+    file_index.drop(server_id)
+    resource_sampler.drop(server_id)
+    status_hub.forget_server(server_id)
+    world_inspector.drop(server_id)
+    world_pruner.drop(server_id)
+    console_logs.drop(server_id)
         
     return
\ No newline at end of file
@@ -1,121 +1,64 @@
-import subprocess
-import os
-import time
-import httpx
-import threading
-import asyncio
 from fastapi import APIRouter, Depends, HTTPException
-from backend import models
+from backend import models, repositories
 from backend.dependencies import get_server_details
 from backend.shared_state import server_processes
+from backend.log_pipeline import log_pipeline
 from backend.routes.websocket import manager
+from backend.scrollback import scrollback
+from backend.server_watcher import activity, update_activity
+from backend.status_hub import status_hub
+from backend.telemetry import resource_sampler, heap_limit_bytes
+from backend.utils.server_control import lifecycle, get_startup_times, JAVA_ARGS
+from backend.world_backup import world_backups
+from backend.world_pruner import world_pruner
 
 router = APIRouter()
 
-def log_streamer(server_id: int, process: subprocess.Popen):
-    """
-    Fungsi ini berjalan di thread terpisah. Tugasnya hanya membaca output
-    dari proses server dan menyiarkannya melalui ConnectionManager.
-    """
-    try:
-        # Loop ini akan berjalan selama proses server menghasilkan output
-        for line in iter(process.stdout.readline, ''):
-            # Kirim setiap baris ke semua klien yang relevan secara async
-            asyncio.run(manager.broadcast_to_server(server_id, line))
-    except Exception as e:
-        print(f"Error di dalam log_streamer untuk server_id {server_id}: {e}")
-    finally:
-        process.stdout.close()
-        print(f"Log streamer untuk server_id: {server_id} telah berhenti.")
-
-async def download_server_jar(version: str, path: str) -> str:
-    jar_name = f"server-{version}.jar"
-    jar_path = os.path.join(path, jar_name)
-    if os.path.exists(jar_path): return jar_name
-    MOJANG_VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
-    try:
-        async with httpx.AsyncClient() as client:
-            manifest_res = await client.get(MOJANG_VERSION_MANIFEST_URL)
-            version_url = next((v['url'] for v in manifest_res.json()['versions'] if v['id'] == version), None)
-            if not version_url: raise ValueError(f"Versi {version} tidak ditemukan.")
-            version_detail_res = await client.get(version_url)
-            server_download_url = version_detail_res.json().get("downloads", {}).get("server", {}).get("url")
-            if not server_download_url: raise ValueError(f"URL download untuk versi {version} tidak ditemukan.")
-            with open(jar_path, "wb") as f:
-                async with client.stream("GET", server_download_url, timeout=300.0) as response:
-                    async for chunk in response.aiter_bytes(): f.write(chunk)
-            return jar_name
-    except Exception as e:
-        if os.path.exists(jar_path): os.remove(jar_path)
-        raise HTTPException(status_code=500, detail=f"Gagal mengunduh server jar: {str(e)}")
-
-def initialize_server_files(server_path: str, jar_name: str):
-    properties_path = os.path.join(server_path, "server.properties")
-    if os.path.exists(properties_path): return
-    try:
-        init_process = subprocess.Popen(["java", "-Xmx1024M", "-Xms1024M", "-jar", jar_name, "nogui"], cwd=server_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        time.sleep(7) # Beri waktu lebih untuk inisialisasi
-        init_process.kill()
-    except Exception as e:
-        print(f"Peringatan: Gagal saat inisialisasi file server: {e}")
-
 @router.post("/servers/{server_id}/start", summary="Memulai server spesifik")
 async def start_server(server_details: dict = Depends(get_server_details)):
+    """
+    Menjadwalkan start server dan langsung mengembalikan operation id.
+    Progres (download, inisialisasi, start) dipantau lewat endpoint operasi atau /ws/lifecycle.
+    """
     server_id = server_details['id']
-    server_path = server_details['path']
-    server_version = server_details['version']
-
-    if server_processes.get(server_id) and server_processes[server_id].poll() is None:
-        raise HTTPException(status_code=400, detail="Server ini sudah berjalan.")
-
-    eula_path = os.path.join(server_path, "eula.txt")
-    if not os.path.exists(eula_path):
-        with open(eula_path, "w") as f: f.write("eula=true\n")
-
-    jar_to_run = await download_server_jar(server_version, server_path)
-    initialize_server_files(server_path, jar_to_run)
-
-    try:
-        process = subprocess.Popen(
-            ["java", "-Xmx1024M", "-Xms1024M", "-jar", jar_to_run, "nogui"],
-            cwd=server_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE,
-            text=True, encoding='utf-8', errors='replace'
-        )
-        server_processes[server_id] = process
-
-        stream_thread = threading.Thread(target=log_streamer, args=(server_id, process))
-        stream_thread.daemon = True
-        stream_thread.start()
-        
-        return {"status": "starting", "server_id": server_id}
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail=f"Perintah 'java' tidak ditemukan. Pastikan Java terinstall dan ada di PATH sistem Anda.")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gagal memulai server: {str(e)}")
+    if world_pruner.is_rewriting(server_id):
+        raise HTTPException(status_code=409, detail="Dunia server sedang dipangkas. Tunggu hingga selesai.")
+    if world_backups.is_restoring(server_id):
+        raise HTTPException(status_code=409, detail="Dunia server sedang dipulihkan dari backup. Tunggu hingga selesai.")
+    op = lifecycle.start(server_id, server_details['path'], server_details['version'])
+    return {"status": "starting", "server_id": server_id, "operation_id": op.id}
 
 @router.post("/servers/{server_id}/stop", summary="Menghentikan server spesifik")
-def stop_server(server_details: dict = Depends(get_server_details)):
+async def stop_server(server_details: dict = Depends(get_server_details)):
     server_id = server_details['id']
-    process = server_processes.get(server_id)
-    if not process or process.poll() is not None:
-        raise HTTPException(status_code=404, detail="Server ini tidak sedang berjalan.")
-    try:
-        process.stdin.write("stop\n")
-        process.stdin.flush()
-        process.wait(timeout=30)
-    except subprocess.TimeoutExpired:
-        process.kill()
-    finally:
-        server_processes.pop(server_id, None)
-    return {"status": "stopped", "server_id": server_id}
+    op = lifecycle.stop(server_id)
+    return {"status": "stopping", "server_id": server_id, "operation_id": op.id}
+
+@router.get("/servers/{server_id}/operations/{operation_id}", summary="Melihat progres operasi start/stop")
+def get_operation(operation_id: str, server_details: dict = Depends(get_server_details)):
+    op = lifecycle.get_operation(operation_id)
+    if op is None or op.server_id != server_details['id']:
+        raise HTTPException(status_code=404, detail="Operasi tidak ditemukan.")
+    return op.to_dict()
 
 @router.get("/servers/{server_id}/status", summary="Melihat status server spesifik")
 def get_server_status(server_details: dict = Depends(get_server_details)):
-    server_id = server_details['id']
-    process = server_processes.get(server_id)
-    if process and process.poll() is None:
-        return {"running": True}
-    return {"running": False}
+    # Snapshot dari tabel status di memori; perubahan didorong lewat /ws/status
+    return status_hub.server_status(server_details['id'])
+
+@router.get("/servers/{server_id}/startup-times", summary="Riwayat durasi startup server per versi")
+def get_server_startup_times(server_details: dict = Depends(get_server_details)):
+    return get_startup_times(server_details['id'])
+
+@router.get("/servers/{server_id}/logs/stats", summary="Statistik pipeline log konsol server")
+def get_log_stats(server_details: dict = Depends(get_server_details)):
+    stats = log_pipeline.get_stats(server_details['id'])
+    stats["scrollback"] = scrollback.get(server_details['id']).stats()
+    return stats
+
+@router.get("/servers/{server_id}/logs/connections", summary="Metrik buffer dan lag setiap klien konsol")
+def get_log_connections(server_details: dict = Depends(get_server_details)):
+    return {"connections": manager.get_connection_stats(server_details['id'])}
 
 @router.post("/servers/{server_id}/command", summary="Mengirim perintah ke server spesifik")
 def send_command(
@@ -127,8 +70,45 @@ def send_command(
     if not process or process.poll() is not None:
         raise HTTPException(status_code=404, detail="Server tidak berjalan.")
     try:
-        process.stdin.write(command_data.command + '\n')
-        process.stdin.flush()
+        process.send_command(command_data.command)
+        update_activity(server_id)
         return {"status": "command_sent", "command": command_data.command}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gagal mengirim perintah: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Gagal mengirim perintah: {str(e)}")
+
+@router.get("/servers/{server_id}/idle", summary="Status aktivitas, pemain online, dan batas idle server")
+def get_idle_status(server_details: dict = Depends(get_server_details)):
+    server_id = server_details['id']
+    return {
+        "idle_timeout_minutes": repositories.servers.get_idle_timeout(server_id),
+        **activity.get_status(server_id),
+    }
+
+@router.put("/servers/{server_id}/idle", summary="Mengatur batas idle server (0 = tidak pernah dimatikan otomatis)")
+def set_idle_timeout(payload: models.IdleTimeoutUpdate, server_details: dict = Depends(get_server_details)):
+    if payload.minutes < 0:
+        raise HTTPException(status_code=400, detail="Batas idle tidak boleh negatif.")
+    server_id = server_details['id']
+    repositories.servers.set_idle_timeout(server_id, payload.minutes)
+    activity.set_timeout(server_id, payload.minutes * 60)
+    return {"idle_timeout_minutes": payload.minutes, **activity.get_status(server_id)}
+
+@router.get("/servers/{server_id}/metrics", summary="Deret waktu CPU, memori, thread, dan I/O server")
+def get_server_metrics(
+    resolution: str = "1s",
+    since: float = 0.0,
+    server_details: dict = Depends(get_server_details)
+):
+    """
+    resolution "1s": sampel per interval sampler selama 1 jam terakhir.
+    resolution "1m": rata-rata (dan puncak) per menit selama 1 hari terakhir.
+    `since` (epoch detik) membatasi titik yang dikirim agar dashboard cukup mengambil data baru.
+    """
+    if resolution not in ("1s", "1m"):
+        raise HTTPException(status_code=400, detail="Resolusi harus '1s' atau '1m'.")
+    server_id = server_details['id']
+    process = server_processes.get(server_id)
+    result = resource_sampler.query(server_id, "coarse" if resolution == "1m" else "fine", since)
+    result["running"] = bool(process and process.poll() is None)
+    result["heap_limit_bytes"] = heap_limit_bytes(JAVA_ARGS)
+    return result
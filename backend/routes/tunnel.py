@@ -5,37 +5,26 @@ import os
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, Body
 from typing import Annotated
-from backend import auth, models
-from backend.database import create_connection
+from backend import auth, models, repositories
+from backend.status_hub import status_hub
 
 router = APIRouter()
 
-# Dictionary untuk mengelola proses dan status tunnel untuk setiap pengguna
-# Key: username, Value: {"process": Popen, "status": dict}
+# Dictionary untuk mengelola proses tunnel untuk setiap pengguna
+# Key: username, Value: {"process": Popen}
+# Status (running, url, error) disimpan di status_hub agar perubahan langsung didorong ke dashboard
 user_tunnels = {}
 
 def send_notifications_to_user_webhooks(username: str, url: str):
     """
     Mengambil semua URL webhook milik pengguna dari database dan mengirim notifikasi.
     """
-    conn = create_connection()
-    if conn is None:
-        print("Gagal membuat koneksi ke database.")
-        return
-    cursor = conn.cursor()
-    
     try:
         # Dapatkan semua URL webhook untuk pengguna ini
-        cursor.execute("""
-            SELECT wh.webhook_url 
-            FROM user_webhooks wh
-            JOIN users u ON wh.user_id = u.id
-            WHERE u.username = ?
-        """, (username,))
-        
-        webhook_urls = [row['webhook_url'] for row in cursor.fetchall()]
-    finally:
-        conn.close()
+        webhook_urls = repositories.webhooks.list_urls_for_username(username)
+    except Exception as e:
+        print(f"Gagal membaca webhook dari database: {e}")
+        return
 
     content = f"🎉 Tunnel untuk pengguna **{username}** aktif!\n🔗 Alamat Server: `{url}`"
     
@@ -63,7 +52,7 @@ def wait_for_ngrok_url(username: str, timeout=20):
                 if t.get("proto") == "tcp" and t.get("public_url"):
                     url = t["public_url"]
                     if username in user_tunnels:
-                        user_tunnels[username]["status"] = {"running": True, "url": url}
+                        status_hub.set_tunnel(username, {"running": True, "url": url})
                         # Jalankan pengiriman notifikasi di thread baru agar tidak memblokir
                         threading.Thread(target=send_notifications_to_user_webhooks, args=(username, url)).start()
                         return
@@ -76,7 +65,18 @@ def wait_for_ngrok_url(username: str, timeout=20):
             
     # Jika loop selesai tanpa menemukan URL
     if username in user_tunnels:
-        user_tunnels[username]["status"] = {"running": False, "url": None, "error": "Gagal mendapatkan URL dari Ngrok API."}
+        status_hub.set_tunnel(username, {"running": False, "url": None, "error": "Gagal mendapatkan URL dari Ngrok API."})
+
+def watch_tunnel_exit(username: str, process: subprocess.Popen):
+    """
+    Menunggu proses Ngrok berhenti (misal, crash) lalu menandai tunnel mati,
+    sehingga endpoint status tidak perlu memeriksa proses di setiap request.
+    """
+    process.wait()
+    tunnel_info = user_tunnels.get(username)
+    if tunnel_info and tunnel_info.get("process") is process:
+        user_tunnels.pop(username, None)
+        status_hub.set_tunnel(username, None)
 
 @router.post("/tunnel/start", summary="Memulai Ngrok tunnel untuk pengguna")
 def start_tunnel_for_user(
@@ -97,13 +97,12 @@ def start_tunnel_for_user(
             stderr=subprocess.DEVNULL  # Sembunyikan output error
         )
         
-        user_tunnels[username] = {
-            "process": process,
-            "status": {"running": True, "url": None, "error": None}
-        }
+        user_tunnels[username] = {"process": process}
+        status_hub.set_tunnel(username, {"running": True, "url": None, "error": None})
 
         # Jalankan thread untuk memonitor URL tanpa memblokir response API
         threading.Thread(target=wait_for_ngrok_url, args=(username,)).start()
+        threading.Thread(target=watch_tunnel_exit, args=(username, process), daemon=True).start()
 
         return {"status": "starting", "detail": "Ngrok tunnel sedang dimulai..."}
     except FileNotFoundError:
@@ -125,20 +124,12 @@ def stop_tunnel_for_user(current_user: models.User = Depends(auth.get_current_us
             tunnel_info["process"].kill() # Paksa berhenti jika terminate gagal
         
         user_tunnels.pop(username, None)
+        status_hub.set_tunnel(username, None)
         return {"status": "stopped"}
         
     raise HTTPException(status_code=404, detail="Tunnel untuk pengguna ini tidak sedang berjalan.")
 
 @router.get("/tunnel/status", summary="Melihat status tunnel milik pengguna")
 def get_tunnel_status_for_user(current_user: models.User = Depends(auth.get_current_user)):
-    username = current_user.username
-    tunnel_info = user_tunnels.get(username)
-
-    if not tunnel_info or not tunnel_info.get("process") or tunnel_info["process"].poll() is not None:
-        # Jika proses tidak ada atau sudah berhenti, pastikan data lama dibersihkan
-        if username in user_tunnels:
-            user_tunnels.pop(username, None)
-        return {"running": False, "url": None}
-    
-    # Kembalikan status terakhir yang disimpan oleh thread worker
-    return user_tunnels[username].get("status", {"running": True, "url": None})
\ No newline at end of file
+    # Dibaca dari tabel status di memori; perubahan juga didorong lewat /ws/status
+    return status_hub.get_tunnel(current_user.username)
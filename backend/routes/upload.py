@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+import asyncio
 import os
-import shutil
 from backend import models
 from backend.dependencies import get_server_details # <-- Impor dari file dependencies
+from backend.upload_sessions import UploadError, check_filename, upload_sessions
+from backend.utils.file_manager import atomic_copy_fileobj
 
 router = APIRouter()
 
@@ -11,7 +13,7 @@ def get_server_path(server_details: dict = Depends(get_server_details)) -> str:
     return server_details['path']
 
 @router.post("/upload/{server_id}/plugin", summary="Mengunggah plugin ke server spesifik")
-def upload_plugin_to_server(
+async def upload_plugin_to_server(
     server_path: str = Depends(get_server_path),
     uploaded_file: UploadFile = File(...)
 ):
@@ -20,15 +22,44 @@ def upload_plugin_to_server(
     """
     if not uploaded_file.filename.endswith(".jar"):
         raise HTTPException(status_code=400, detail="Hanya file dengan ekstensi .jar yang diizinkan.")
+    try:
+        filename = check_filename(uploaded_file.filename)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
     plugin_dir = os.path.join(server_path, "plugins")
     os.makedirs(plugin_dir, exist_ok=True)
 
-    file_path = os.path.join(plugin_dir, uploaded_file.filename)
+    file_path = os.path.join(plugin_dir, filename)
     
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(uploaded_file.file, buffer)
-        return {"status": "uploaded", "file": uploaded_file.filename}
+        # File sementara + rename: .jar setengah jadi tidak pernah muncul di folder plugins
+        await asyncio.to_thread(atomic_copy_fileobj, uploaded_file.file, file_path)
+        return {"status": "uploaded", "file": filename}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gagal mengunggah plugin: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Gagal mengunggah plugin: {e}")
+
+@router.post("/upload/{server_id}/plugin/session", summary="Membuat sesi unggah bertahap untuk plugin")
+def create_plugin_upload_session(
+    server_id: int,
+    payload: models.UploadSessionCreate,
+    server_path: str = Depends(get_server_path)
+):
+    """
+    Potongan dikirim dan sesi diselesaikan lewat endpoint /files/{server_id}/uploads/{upload_id}/...
+    File baru muncul di folder 'plugins' setelah semua potongan lengkap.
+    """
+    if not payload.filename.endswith(".jar"):
+        raise HTTPException(status_code=400, detail="Hanya file dengan ekstensi .jar yang diizinkan.")
+
+    plugin_dir = os.path.join(server_path, "plugins")
+    os.makedirs(plugin_dir, exist_ok=True)
+    try:
+        filename = check_filename(payload.filename)
+        session = upload_sessions.create(
+            server_id, os.path.join(plugin_dir, filename), payload.size,
+            payload.chunk_size, payload.sha256, payload.overwrite,
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return session.status()
\ No newline at end of file
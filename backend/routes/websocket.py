@@ -1,47 +1,341 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from typing import List, Dict
-from backend import auth
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Query
+from typing import Deque, Dict, List, Optional, Tuple
+from backend import auth, repositories
+from backend.console_log import console_logs
+from backend.dependencies import get_owned_server
+from backend.scrollback import scrollback, DEFAULT_REPLAY_LINES
+from backend.status_hub import status_hub
+from backend.utils.server_control import lifecycle
 
 router = APIRouter()
 
+# Kebijakan buffer per koneksi saat klien lebih lambat dari produsen log:
+# - "drop_oldest": frame tertua dibuang ketika buffer penuh
+# - "coalesce"   : isi buffer digabung menjadi satu frame multi-baris
+# - "disconnect" : klien diputus jika tertinggal lebih dari MAX_LAG_SECONDS
+BUFFER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+DEFAULT_BUFFER_POLICY = "coalesce"
+MAX_BUFFERED_FRAMES = 256
+# Batas ukuran frame hasil coalesce; baris tertua dibuang dan diganti penanda celah
+MAX_COALESCED_BYTES = 1024 * 1024
+GAP_MARKER = "[... {lines} baris log dilewati karena klien tertinggal ...]\n"
+MAX_LAG_SECONDS = 30.0
+
+# Format frame: "text" mengirim teks mentah (kompatibel dengan frontend lama),
+# "json" membungkus teks dengan rentang seq agar klien bisa melanjutkan dari
+# seq terakhir saat tersambung ulang.
+FRAME_FORMATS = ("text", "json")
+
+_connection_ids = itertools.count(1)
+
+
+class ClientConnection:
+    """Satu klien WebSocket dengan buffer keluar dan task pengirimnya sendiri."""
+
+    def __init__(self, websocket: WebSocket, policy: str, max_buffered: int, max_lag: float, frame_format: str = "text"):
+        self.id = next(_connection_ids)
+        self.websocket = websocket
+        self.policy = policy
+        self.frame_format = frame_format
+        self.max_buffered = max_buffered
+        self.max_lag = max_lag
+        # Isi buffer: (waktu masuk, seq pertama, seq terakhir, pesan, jenis frame)
+        self.buffer: Deque[Tuple[float, int, int, str, str]] = deque()
+        self.last_seq = 0
+        self.connected_at = time.time()
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self.dropped_frames = 0
+        self.coalesced_frames = 0
+        self.skipped_lines = 0
+        self._pending_skipped = 0  # Baris yang sudah dihitung dibuang pada frame gabungan di buffer[0]
+        self.closed = False
+        # Sejak kapan klien tertinggal: diisi saat ada frame belum terkirim,
+        # tidak direset oleh frame yang dibuang, hanya oleh pengiriman yang berhasil
+        self._behind_since: Optional[float] = None
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._sender())
+
+    def enqueue(self, message: str, first_seq: int, last_seq: int, kind: str = "log"):
+        if len(self.buffer) >= self.max_buffered:
+            if self.policy == "coalesce":
+                first_enqueued_at, merged_first_seq, _, _, merged_kind = self.buffer[0]
+                merged = "".join(entry[3] for entry in self.buffer)
+                merged_last_seq = self.buffer[-1][2]
+                merged = self._cap_coalesced(merged, merged_first_seq, merged_last_seq)
+                self.coalesced_frames += len(self.buffer) - 1
+                self.buffer.clear()
+                self.buffer.append((first_enqueued_at, merged_first_seq, merged_last_seq, merged, merged_kind))
+            else:
+                self.buffer.popleft()
+                self.dropped_frames += 1
+        now = time.monotonic()
+        self.buffer.append((now, first_seq, last_seq, message, kind))
+        if self._behind_since is None:
+            self._behind_since = now
+        self._ready.set()
+
+    def _cap_coalesced(self, merged: str, first_seq: int, last_seq: int) -> str:
+        """
+        Potong frame gabungan ke MAX_COALESCED_BYTES dengan membuang baris tertua.
+        Rentang seq frame tetap; baris yang dibuang diwakili satu penanda celah di awal
+        (penanda dari pemotongan sebelumnya selalu ikut terbuang karena berada paling depan).
+        """
+        data = merged.encode("utf-8")
+        if len(data) <= MAX_COALESCED_BYTES:
+            return merged
+        tail = data[len(data) - MAX_COALESCED_BYTES:]
+        # Mulai dari awal baris utuh pertama di bagian yang dipertahankan
+        newline = tail.find(b"\n")
+        kept = tail[newline + 1:].decode("utf-8", errors="ignore") if newline >= 0 else ""
+        kept_lines = kept.count("\n") + (1 if kept and not kept.endswith("\n") else 0)
+        skipped = max(0, last_seq - first_seq + 1 - kept_lines)
+        self.skipped_lines += skipped - self._pending_skipped
+        self._pending_skipped = skipped
+        return GAP_MARKER.format(lines=skipped) + kept
+
+    def lag(self) -> float:
+        """Berapa detik frame tertua yang belum terkirim sudah menunggu."""
+        if self._behind_since is None:
+            return 0.0
+        return time.monotonic() - self._behind_since
+
+    def is_too_slow(self) -> bool:
+        return self.policy == "disconnect" and self.lag() > self.max_lag
+
+    async def _sender(self):
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                while self.buffer:
+                    _, first_seq, last_seq, message, kind = self.buffer.popleft()
+                    self._pending_skipped = 0
+                    if self.frame_format == "json":
+                        payload = json.dumps({"type": kind, "from": first_seq, "seq": last_seq, "data": message})
+                    else:
+                        payload = message
+                    await self.websocket.send_text(payload)
+                    self.last_seq = last_seq
+                    self.sent_frames += 1
+                    self.sent_bytes += len(payload)
+                    self._behind_since = self.buffer[0][0] if self.buffer else None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Koneksi terputus saat mengirim; endpoint akan membersihkan sisanya
+            self.closed = True
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "policy": self.policy,
+            "format": self.frame_format,
+            "last_seq": self.last_seq,
+            "connected_at": self.connected_at,
+            "buffered_frames": len(self.buffer),
+            "lag_seconds": round(self.lag(), 3),
+            "sent_frames": self.sent_frames,
+            "sent_bytes": self.sent_bytes,
+            "dropped_frames": self.dropped_frames,
+            "coalesced_frames": self.coalesced_frames,
+            "skipped_lines": self.skipped_lines,
+        }
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+    def __init__(
+        self,
+        policy: str = DEFAULT_BUFFER_POLICY,
+        max_buffered: int = MAX_BUFFERED_FRAMES,
+        max_lag: float = MAX_LAG_SECONDS,
+    ):
+        if policy not in BUFFER_POLICIES:
+            raise ValueError(f"Kebijakan buffer tidak dikenal: {policy}")
+        self.policy = policy
+        self.max_buffered = max_buffered
+        self.max_lag = max_lag
+        self.active_connections: Dict[int, List[ClientConnection]] = {}
 
-    async def connect(self, websocket: WebSocket, server_id: int):
+    async def connect(
+        self,
+        websocket: WebSocket,
+        server_id: int,
+        since: Optional[int] = None,
+        replay_lines: int = DEFAULT_REPLAY_LINES,
+        frame_format: str = "text",
+    ) -> ClientConnection:
         await websocket.accept()
-        if server_id not in self.active_connections:
-            self.active_connections[server_id] = []
-        self.active_connections[server_id].append(websocket)
+        client = ClientConnection(websocket, self.policy, self.max_buffered, self.max_lag, frame_format)
+        # Snapshot scrollback dan pendaftaran klien dilakukan tanpa await di antaranya,
+        # sehingga tidak ada baris yang terlewat atau terkirim dua kali.
+        first_seq, last_seq, lines = scrollback.get(server_id).snapshot(since=since, limit=replay_lines)
+        if lines:
+            client.enqueue("".join(lines), first_seq, last_seq, kind="replay")
+        client.start()
+        self.active_connections.setdefault(server_id, []).append(client)
+        return client
+
+    def _find(self, websocket: WebSocket, server_id: int) -> Optional[ClientConnection]:
+        for client in self.active_connections.get(server_id, []):
+            if client.websocket is websocket:
+                return client
+        return None
 
     def disconnect(self, websocket: WebSocket, server_id: int):
-        if server_id in self.active_connections and websocket in self.active_connections[server_id]:
-            self.active_connections[server_id].remove(websocket)
+        client = self._find(websocket, server_id)
+        if client is None:
+            return
+        self.active_connections[server_id].remove(client)
+        if client._task is not None:
+            client._task.cancel()
+        if not self.active_connections[server_id]:
+            del self.active_connections[server_id]
+
+    async def broadcast_lines(self, server_id: int, lines: List[str]):
+        """
+        Mencatat baris ke scrollback lalu memasukkannya sebagai satu frame ke buffer
+        setiap klien tanpa menunggu pengiriman, sehingga klien yang lambat tidak
+        menahan klien lain maupun produsen.
+        """
+        first_seq, last_seq = scrollback.get(server_id).extend(lines)
+        console_logs.ingest(server_id, lines)
+        message = "".join(lines)
+        for client in self.active_connections.get(server_id, [])[:]:
+            if client.closed:
+                self.disconnect(client.websocket, server_id)
+                continue
+            client.enqueue(message, first_seq, last_seq)
+            if client.is_too_slow():
+                self.disconnect(client.websocket, server_id)
+                asyncio.get_running_loop().create_task(
+                    client.close(code=1013, reason="Klien terlalu lambat menerima log")
+                )
 
     async def broadcast_to_server(self, server_id: int, message: str):
-        if server_id in self.active_connections:
-            for connection in self.active_connections[server_id][:]:
-                try:
-                    await connection.send_text(message)
-                except Exception:
-                    self.disconnect(connection, server_id)
+        await self.broadcast_lines(server_id, [message])
+
+    def get_connection_stats(self, server_id: int) -> List[dict]:
+        return [client.stats() for client in self.active_connections.get(server_id, [])]
 
 manager = ConnectionManager()
 
 @router.websocket("/ws/log/{server_id}")
 async def websocket_log_for_server(
+    websocket: WebSocket,
+    server_id: int,
+    token: str = Query(...),
+    since: Optional[int] = Query(None, description="Lanjutkan dari seq terakhir yang sudah diterima"),
+    replay: int = Query(DEFAULT_REPLAY_LINES, ge=0, description="Jumlah baris riwayat yang dikirim saat tersambung"),
+    format: str = Query("text", description="Format frame: text atau json"),
+):
+    if not await _authorize_server(websocket, token, server_id):
+        return
+
+    if format not in FRAME_FORMATS:
+        await websocket.close(code=1008, reason="Format frame tidak dikenal")
+        return
+
+    await manager.connect(websocket, server_id, since=since, replay_lines=replay, frame_format=format)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket, server_id)
+
+async def _authorize_server(websocket: WebSocket, token: str, server_id: int) -> Optional[dict]:
+    """Token dan kepemilikan server diperiksa sebelum accept(); koneksi ditutup dengan 1008 jika gagal."""
+    try:
+        user = await auth.get_current_user(token)
+    except HTTPException:
+        user = None
+    if not user:
+        await websocket.close(code=1008, reason="Token tidak valid")
+        return None
+    server_data = await asyncio.to_thread(get_owned_server, user.username, server_id)
+    if not server_data:
+        await websocket.close(code=1008, reason="Server tidak ditemukan atau Anda tidak memiliki akses.")
+        return None
+    return server_data
+
+async def _pump_lifecycle_events(websocket: WebSocket, queue: asyncio.Queue):
+    while True:
+        event = await queue.get()
+        await websocket.send_json(event)
+
+@router.websocket("/ws/lifecycle/{server_id}")
+async def websocket_lifecycle_for_server(
     websocket: WebSocket,
     server_id: int,
     token: str = Query(...)
 ):
-    user = await auth.get_current_user(token)
+    """Mengalirkan perubahan state server (creating, downloading, ..., running, crashed)."""
+    if not await _authorize_server(websocket, token, server_id):
+        return
+
+    await websocket.accept()
+    queue = lifecycle.subscribe(server_id)
+    await websocket.send_json({"type": "snapshot", "server_id": server_id, **lifecycle.get_state(server_id)})
+    pump = asyncio.get_running_loop().create_task(_pump_lifecycle_events(websocket, queue))
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pump.cancel()
+        lifecycle.unsubscribe(server_id, queue)
+
+@router.websocket("/ws/status")
+async def websocket_status_for_user(
+    websocket: WebSocket,
+    token: str = Query(...)
+):
+    """
+    Mengalirkan status semua server milik pengguna dan tunnel-nya.
+    Frame pertama adalah snapshot lengkap; setelahnya hanya perubahan
+    (server_state, players, tunnel, server_removed).
+    """
+    try:
+        user = await auth.get_current_user(token)
+    except HTTPException:
+        user = None
     if not user:
         await websocket.close(code=1008, reason="Token tidak valid")
         return
-    
-    await manager.connect(websocket, server_id)
+
+    await websocket.accept()
+    # Satu kali baca database saat tersambung agar hub tahu server milik pengguna ini
+    rows = await asyncio.get_running_loop().run_in_executor(
+        None, repositories.servers.list_for_user, user.username
+    )
+    status_hub.register_user(user.username, [row['id'] for row in rows])
+    queue = status_hub.subscribe(user.username)
+    pump = asyncio.get_running_loop().create_task(_pump_lifecycle_events(websocket, queue))
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(websocket, server_id)
\ No newline at end of file
+        pass
+    finally:
+        pump.cancel()
+        status_hub.unsubscribe(user.username, queue)
@@ -0,0 +1,66 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from backend import models
+from backend.dependencies import get_server_details
+from backend.world_inspector import WorldInspectionError, world_inspector
+from backend.world_pruner import PruneError, world_pruner
+
+router = APIRouter()
+
+@router.post("/servers/{server_id}/world/analyze", summary="Menganalisis file region dunia (.mca)")
+def analyze_world(server_details: dict = Depends(get_server_details)):
+    """
+    Membaca header semua file region di latar belakang. Hanya file yang ukuran/mtime-nya
+    berubah sejak analisis terakhir yang dibaca ulang.
+    """
+    try:
+        job = world_inspector.start(server_details['id'], server_details['path'])
+    except WorldInspectionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return job.status()
+
+@router.get("/servers/{server_id}/world/analysis", summary="Ringkasan analisis dunia per dimensi")
+def get_world_analysis(server_details: dict = Depends(get_server_details)):
+    return world_inspector.summary(server_details['id'])
+
+@router.get("/servers/{server_id}/world/regions", summary="Daftar file region hasil analisis")
+def list_world_regions(dimension: Optional[str] = None, kind: Optional[str] = None, sort: str = "reclaimable",
+                       limit: int = 100, offset: int = 0, server_details: dict = Depends(get_server_details)):
+    """sort: reclaimable, size, chunks, fragments, atau oldest (region yang paling lama tidak disentuh)."""
+    try:
+        return world_inspector.regions(server_details['id'], dimension, kind, sort, limit, offset)
+    except WorldInspectionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/servers/{server_id}/world/region", summary="Detail chunk dalam satu file region")
+def get_world_region(path: str, server_details: dict = Depends(get_server_details)):
+    try:
+        return world_inspector.region_detail(server_details['path'], path)
+    except WorldInspectionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.post("/servers/{server_id}/world/prune", summary="Memangkas chunk dunia dan memadatkan file region")
+def prune_world(payload: models.WorldPruneRequest, server_details: dict = Depends(get_server_details)):
+    """
+    Berjalan di latar belakang dan langsung mengembalikan status job. Secara default berupa
+    dry run yang hanya melaporkan byte yang akan dibebaskan. Tanpa dry run, server harus
+    berhenti dan tidak bisa di-start sampai job selesai. Disarankan membuat backup terlebih dahulu.
+    """
+    rules = payload.model_dump(include={"min_inhabited_ticks", "center_x", "center_z", "radius", "polygon"})
+    try:
+        job = world_pruner.start(server_details['id'], server_details['path'], rules, payload.dimensions,
+                                 payload.dry_run, payload.compact)
+    except PruneError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return job.status()
+
+@router.get("/servers/{server_id}/world/prune", summary="Daftar job pemangkasan dunia")
+def list_prune_jobs(server_details: dict = Depends(get_server_details)):
+    return world_pruner.list_jobs(server_details['id'])
+
+@router.get("/servers/{server_id}/world/prune/{job_id}", summary="Melihat progres dan hasil job pemangkasan")
+def get_prune_job(job_id: str, server_details: dict = Depends(get_server_details)):
+    try:
+        return world_pruner.get_job(server_details['id'], job_id).status()
+    except PruneError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
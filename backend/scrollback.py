@@ -0,0 +1,87 @@
+# Buffer scrollback konsol per server.
+# Menyimpan baris-baris terakhir yang sudah disiarkan, masing-masing dengan nomor
+# urut (seq) yang terus naik, sehingga klien baru bisa menerima riwayat dan klien
+# yang tersambung ulang bisa melanjutkan dari seq terakhir tanpa duplikat.
+
+import itertools
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+MAX_SCROLLBACK_BYTES = 1024 * 1024  # 1 MB per server
+MAX_SCROLLBACK_LINES = 20000
+DEFAULT_REPLAY_LINES = 500
+
+
+class ScrollbackBuffer:
+    def __init__(self, max_bytes: int = MAX_SCROLLBACK_BYTES, max_lines: int = MAX_SCROLLBACK_LINES):
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        # Isi: (seq, baris, ukuran dalam byte)
+        self._lines: Deque[Tuple[int, str, int]] = deque()
+        self._bytes = 0
+        self._next_seq = 1
+        self._lock = threading.Lock()
+
+    def extend(self, lines: List[str]) -> Tuple[int, int]:
+        """Tambahkan baris dan kembalikan rentang seq (pertama, terakhir) yang diberikan."""
+        with self._lock:
+            first_seq = self._next_seq
+            for line in lines:
+                size = len(line.encode("utf-8", "replace"))
+                self._lines.append((self._next_seq, line, size))
+                self._bytes += size
+                self._next_seq += 1
+            # Buang baris tertua sampai batas byte dan jumlah baris terpenuhi
+            while self._lines and (self._bytes > self.max_bytes or len(self._lines) > self.max_lines):
+                _, _, size = self._lines.popleft()
+                self._bytes -= size
+            return first_seq, self._next_seq - 1
+
+    def snapshot(self, since: Optional[int] = None, limit: int = DEFAULT_REPLAY_LINES) -> Tuple[int, int, List[str]]:
+        """
+        Ambil baris dengan seq > since (jika diberikan), atau `limit` baris terakhir.
+        Mengembalikan (seq pertama, seq terakhir, baris). Jika kosong, seq pertama > seq terakhir.
+        """
+        with self._lock:
+            if since is not None:
+                # Jika since sudah lebih tua dari isi buffer, semua yang tersisa dikirim
+                entries = [e for e in self._lines if e[0] > since]
+            else:
+                start = max(0, len(self._lines) - limit)
+                entries = list(itertools.islice(self._lines, start, None))
+            if not entries:
+                return self._next_seq, self._next_seq - 1, []
+            return entries[0][0], entries[-1][0], [e[1] for e in entries]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "lines": len(self._lines),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "first_seq": self._lines[0][0] if self._lines else None,
+                "last_seq": self._next_seq - 1,
+            }
+
+
+class ScrollbackStore:
+    def __init__(self, max_bytes: int = MAX_SCROLLBACK_BYTES, max_lines: int = MAX_SCROLLBACK_LINES):
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self._buffers: Dict[int, ScrollbackBuffer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, server_id: int) -> ScrollbackBuffer:
+        with self._lock:
+            buffer = self._buffers.get(server_id)
+            if buffer is None:
+                buffer = self._buffers[server_id] = ScrollbackBuffer(self.max_bytes, self.max_lines)
+            return buffer
+
+    def drop(self, server_id: int):
+        with self._lock:
+            self._buffers.pop(server_id, None)
+
+
+scrollback = ScrollbackStore()
@@ -1,53 +1,267 @@
-import time
+# Pemantau server idle berbasis event.
+# Aktivitas dicatat dari baris konsol (pemain join/leave, chat, output /list) dan dari
+# perintah yang dikirim lewat API. Server dianggap idle hanya jika tidak ada pemain
+# online selama batas waktu per server. Tenggat idle disimpan di heap berurut waktu,
+# sehingga thread watcher hanya bangun saat tenggat terdekat tiba atau saat ada event,
+# bukan memindai semua server setiap 30 detik.
+
+import heapq
+import re
 import threading
-from backend.shared_state import server_processes
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
-# Menyimpan waktu terakhir ada aktivitas untuk setiap server
-# Key: server_id, Value: timestamp
-last_activity = {}
-IDLE_TIMEOUT_MINUTES = 5 # Server akan mati setelah 5 menit idle
+IDLE_TIMEOUT_MINUTES = 5 # Server akan mati setelah 5 menit idle (bisa diatur per server)
 
-def update_activity(server_id: int):
-    """Panggil fungsi ini setiap kali ada aktivitas di server (misal, command atau player join)."""
-    last_activity[server_id] = time.time()
-
-def watcher_thread_func():
-    """Fungsi yang akan berjalan di thread terpisah untuk memonitor server."""
-    print("Watcher server idle dimulai...")
-    while True:
-        # Buat salinan untuk menghindari masalah saat iterasi
-        current_processes = server_processes.copy()
-        
-        for server_id, process in current_processes.items():
-            # Cek jika proses masih berjalan
-            if process.poll() is None:
-                # Jika tidak ada aktivitas yang tercatat, catat sekarang
-                if server_id not in last_activity:
-                    update_activity(server_id)
+# Contoh baris konsol:
+#   [12:00:01] [Server thread/INFO]: Steve joined the game
+#   [12:00:09] [Server thread/INFO]: <Steve> halo
+#   [12:01:00] [Server thread/INFO]: There are 1 of a max of 20 players online: Steve
+#   [12:00:01 INFO]: Steve joined the game                                    (Paper/Spigot)
+# Pola dijangkarkan ke seluruh baris: pesan chat seperti "<Bob> x ]: Bob left the game"
+# tidak boleh terbaca sebagai event join/leave.
+SERVER_PREFIX = r"^\[\d{2}:\d{2}:\d{2}(?:\] \[Server thread/INFO\]| INFO\]): "
+JOIN_PATTERN = re.compile(SERVER_PREFIX + r"(\w{1,16}) joined the game$")
+LEAVE_PATTERN = re.compile(SERVER_PREFIX + r"(\w{1,16}) left the game$")
+CHAT_PATTERN = re.compile(SERVER_PREFIX + r"(?:\[Not Secure\] )?<(\w{1,16})> ")
+LIST_PATTERN = re.compile(SERVER_PREFIX + r"There are (\d+) (?:of a max of |/ ?)(\d+) players online:(.*)$")
+LIST_RESYNC_SECONDS = 300  # Interval /list untuk menyamakan daftar pemain yang mungkin terlewat
+
+
+class ServerActivity:
+    __slots__ = ("players", "last_activity", "timeout", "deadline", "generation")
+
+    def __init__(self, timeout: float):
+        self.players: Set[str] = set()
+        self.last_activity = time.time()
+        self.timeout = timeout
+        self.deadline: Optional[float] = None
+        self.generation = 0
+
+
+class ActivityTracker:
+    def __init__(self, default_timeout: float = IDLE_TIMEOUT_MINUTES * 60):
+        self.default_timeout = default_timeout
+        self.on_idle: Callable[[int], None] = stop_idle_server
+        self._servers: Dict[int, ServerActivity] = {}
+        self._heap: List[Tuple[float, int, int]] = []  # (tenggat, server_id, generation)
+        self._cond = threading.Condition()
+        self._listeners: List[Callable[[int, dict], None]] = []
+
+    # --- Pendaftaran server ---
+
+    def track(self, server_id: int, timeout: Optional[float] = None):
+        """Mulai memantau server yang baru dijalankan. timeout <= 0 mematikan auto-stop."""
+        with self._cond:
+            state = ServerActivity(self.default_timeout if timeout is None else timeout)
+            self._servers[server_id] = state
+            self._rearm(server_id, state)
+
+    def forget(self, server_id: int):
+        with self._cond:
+            self._servers.pop(server_id, None)
+            self._cond.notify()
+        self._notify(server_id)
+
+    def set_timeout(self, server_id: int, timeout: float):
+        with self._cond:
+            state = self._servers.get(server_id)
+            if state is not None:
+                state.timeout = timeout
+                self._rearm(server_id, state)
+
+    # --- Event ---
+
+    def touch(self, server_id: int):
+        """Catat aktivitas (perintah dari panel, chat, dll.) dan mundurkan tenggat idle."""
+        with self._cond:
+            state = self._servers.get(server_id)
+            if state is None:
+                return
+            state.last_activity = time.time()
+            if not state.players:
+                self._rearm(server_id, state)
+
+    def on_console_line(self, server_id: int, line: str):
+        """Dipanggil untuk setiap baris stdout server; hanya baris yang relevan yang di-parse."""
+        if "]: " not in line:
+            return
+        line = line.rstrip("\r\n")
+        # Chat diperiksa lebih dulu: isinya bebas dan bisa meniru baris join/leave/list
+        if "]: <" in line or "]: [Not Secure] <" in line:
+            if CHAT_PATTERN.search(line):
+                self.touch(server_id)
+                return
+        if "joined the game" in line:
+            match = JOIN_PATTERN.search(line)
+            if match:
+                self._set_players(server_id, add=match.group(1))
+        elif "left the game" in line:
+            match = LEAVE_PATTERN.search(line)
+            if match:
+                self._set_players(server_id, remove=match.group(1))
+        elif "players online" in line:
+            match = LIST_PATTERN.search(line)
+            if match:
+                names = {name.strip() for name in match.group(3).split(",") if name.strip()}
+                self._set_players(server_id, replace=names, count=int(match.group(1)))
+
+    def _set_players(self, server_id: int, add: Optional[str] = None, remove: Optional[str] = None,
+                     replace: Optional[Set[str]] = None, count: Optional[int] = None):
+        with self._cond:
+            state = self._servers.get(server_id)
+            if state is None:
+                return
+            before = set(state.players)
+            if replace is not None:
+                # Output /list bisa tanpa nama (hanya jumlah); jangan buang pemain yang sudah dikenal
+                if replace or count == 0:
+                    state.players = replace
+            if add:
+                state.players.add(add)
+            if remove:
+                state.players.discard(remove)
+            changed = state.players != before
+            # Balasan /list berkala yang tidak mengubah apa pun bukan aktivitas (server tetap bisa idle)
+            if replace is None or changed:
+                state.last_activity = time.time()
+                self._rearm(server_id, state)
+            changed = len(state.players) != len(before)
+        if changed:
+            self._notify(server_id)
+
+    def tracked_servers(self) -> List[int]:
+        with self._cond:
+            return list(self._servers)
+
+    def resync_loop(self, interval: float = LIST_RESYNC_SECONDS):
+        """Kirim /list berkala ke server yang dipantau; balasannya (LIST_PATTERN) mengganti daftar pemain."""
+        from backend.shared_state import server_processes
+
+        while True:
+            time.sleep(interval)
+            for server_id in self.tracked_servers():
+                process = server_processes.get(server_id)
+                if process is None or process.poll() is not None:
                     continue
+                try:
+                    process.send_command("list")
+                except Exception as e:
+                    print(f"Gagal mengirim /list ke server {server_id}: {e}")
+
+    # --- Pendengar perubahan jumlah pemain ---
+
+    def add_listener(self, callback: Callable[[int, dict], None]):
+        self._listeners.append(callback)
+
+    def _notify(self, server_id: int):
+        status = self.get_status(server_id)
+        for callback in self._listeners:
+            try:
+                callback(server_id, status)
+            except Exception as e:
+                print(f"Listener aktivitas gagal untuk server {server_id}: {e}")
+
+    # --- Heap tenggat ---
+
+    def _rearm(self, server_id: int, state: ServerActivity):
+        """Harus dipanggil dengan _cond dipegang. Entri lama di heap dibuang secara lazy."""
+        state.generation += 1
+        if state.players or state.timeout <= 0:
+            state.deadline = None
+        else:
+            state.deadline = state.last_activity + state.timeout
+            heapq.heappush(self._heap, (state.deadline, server_id, state.generation))
+            if len(self._heap) > 4 * len(self._servers) + 64:
+                self._compact()
+        self._cond.notify()
+
+    def _compact(self):
+        live = []
+        for entry in self._heap:
+            state = self._servers.get(entry[1])
+            if state is not None and state.generation == entry[2]:
+                live.append(entry)
+        heapq.heapify(live)
+        self._heap = live
+
+    def run(self):
+        print("Watcher server idle dimulai...")
+        while True:
+            with self._cond:
+                while True:
+                    # Buang entri yang sudah tidak berlaku (server dilupakan atau tenggat berubah)
+                    while self._heap:
+                        deadline, server_id, generation = self._heap[0]
+                        state = self._servers.get(server_id)
+                        if state is not None and state.generation == generation:
+                            break
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    _, server_id, _ = heapq.heappop(self._heap)
+                    state = self._servers[server_id]
+                    state.deadline = None
+                    state.generation += 1
+                    break
+            try:
+                self.on_idle(server_id)
+            except Exception as e:
+                print(f"Gagal mematikan server idle {server_id}: {e}")
+
+    def get_status(self, server_id: int) -> dict:
+        with self._cond:
+            state = self._servers.get(server_id)
+            if state is None:
+                return {"tracked": False, "players": [], "player_count": 0}
+            return {
+                "tracked": True,
+                "players": sorted(state.players),
+                "player_count": len(state.players),
+                "last_activity": state.last_activity,
+                "idle_timeout_seconds": state.timeout,
+                "idle_deadline": state.deadline,
+            }
+
 
-                # Cek selisih waktu
-                idle_duration = time.time() - last_activity[server_id]
-                if idle_duration > IDLE_TIMEOUT_MINUTES * 60:
-                    print(f"Server {server_id} telah idle selama lebih dari {IDLE_TIMEOUT_MINUTES} menit. Mematikan...")
-                    try:
-                        process.stdin.write("stop\n")
-                        process.stdin.flush()
-                        # Hapus dari daftar agar tidak dicek lagi
-                        server_processes.pop(server_id, None)
-                        last_activity.pop(server_id, None)
-                    except Exception as e:
-                        print(f"Gagal mematikan server idle {server_id}: {e}")
-            else:
-                # Jika proses sudah mati, bersihkan dari daftar
-                server_processes.pop(server_id, None)
-                last_activity.pop(server_id, None)
-        
-        # Cek setiap 30 detik
-        time.sleep(30)
+def stop_idle_server(server_id: int):
+    # Impor di sini: server_control juga mengimpor modul ini untuk mengirim baris konsol
+    from backend.shared_state import server_processes
+    from backend.utils.server_control import lifecycle
+
+    process = server_processes.get(server_id)
+    if process is None or process.poll() is not None:
+        return
+    print(f"Server {server_id} tidak punya pemain dan idle melewati batas waktu. Mematikan...")
+
+    def stop():
+        try:
+            lifecycle.stop(server_id)
+        except Exception as e:
+            # Misal ada operasi lain yang sedang berjalan: coba lagi setelah batas idle berikutnya
+            print(f"Gagal mematikan server idle {server_id}: {e}")
+            activity.touch(server_id)
+
+    # Lifecycle berjalan di event loop utama
+    process.loop.call_soon_threadsafe(stop)
+
+
+activity = ActivityTracker()
+
+
+def update_activity(server_id: int):
+    """Panggil fungsi ini setiap kali ada aktivitas di server (misal, command atau player join)."""
+    activity.touch(server_id)
 
 def start_watcher():
     """Memulai thread watcher."""
-    watcher = threading.Thread(target=watcher_thread_func)
+    watcher = threading.Thread(target=activity.run, name="idle-watcher")
     watcher.daemon = True # Thread akan mati saat aplikasi utama berhenti
-    watcher.start()
\ No newline at end of file
+    watcher.start()
+    resync = threading.Thread(target=activity.resync_loop, name="player-resync", daemon=True)
+    resync.start()
@@ -1,5 +1,5 @@
 # Berisi state aplikasi yang digunakan bersama, seperti proses server yang sedang berjalan.
 # Ini membantu menghindari masalah circular import.
 
-# Key: server_id (int), Value: process (subprocess.Popen)
+# Key: server_id (int), Value: process (ServerProcess dari backend.utils.server_control)
 server_processes = {}
\ No newline at end of file
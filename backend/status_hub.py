@@ -0,0 +1,149 @@
+# Aliran status per pengguna (state server, jumlah pemain, URL tunnel).
+# Dashboard tidak perlu lagi polling /servers/{id}/status dan /tunnel/status: hub menerima
+# event dari lifecycle (transisi state), ActivityTracker (jumlah pemain berubah), dan
+# route tunnel (URL muncul/berubah, proses berhenti), lalu mendorongnya ke semua koneksi
+# milik pemilik server. Semua status dibaca dari tabel di memori, jadi endpoint status
+# dan snapshot saat tersambung tidak menyentuh database maupun proses.
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from backend.server_watcher import activity
+from backend.utils.server_control import lifecycle, ServerState
+
+SUBSCRIBER_QUEUE_SIZE = 100
+# State yang berarti proses java sudah/masih hidup
+RUNNING_STATES = {ServerState.STARTING.value, ServerState.RUNNING.value, ServerState.STOPPING.value}
+
+
+class StatusHub:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._owners: Dict[int, str] = {}           # server_id -> username
+        self._user_servers: Dict[str, Set[int]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self.tunnels: Dict[str, dict] = {}
+        self.events_sent = 0
+        self.resyncs = 0
+
+    def start(self):
+        """Dipanggil saat startup di event loop utama."""
+        self._loop = asyncio.get_running_loop()
+        lifecycle.add_listener(self._on_lifecycle_event)
+        activity.add_listener(self._on_activity_change)
+
+    # --- Tabel status ---
+
+    def register_server(self, server_id: int, username: str):
+        self._owners[server_id] = username
+        self._user_servers.setdefault(username, set()).add(server_id)
+
+    def register_user(self, username: str, server_ids: List[int]):
+        for server_id in server_ids:
+            self.register_server(server_id, username)
+
+    def forget_server(self, server_id: int):
+        username = self._owners.pop(server_id, None)
+        if username is None:
+            return
+        self._user_servers.get(username, set()).discard(server_id)
+        self._emit(username, {"type": "server_removed", "server_id": server_id, "at": time.time()})
+
+    def server_status(self, server_id: int) -> dict:
+        state = lifecycle.get_state(server_id)
+        players = activity.get_status(server_id)
+        return {
+            "server_id": server_id,
+            "running": state["state"] in RUNNING_STATES,
+            **state,
+            "player_count": players["player_count"],
+            "players": players["players"],
+        }
+
+    def get_tunnel(self, username: str) -> dict:
+        return dict(self.tunnels.get(username) or {"running": False, "url": None})
+
+    def set_tunnel(self, username: str, status: Optional[dict]):
+        """Aman dipanggil dari thread mana pun (worker ngrok berjalan di thread terpisah)."""
+        if status is None:
+            self.tunnels.pop(username, None)
+        else:
+            self.tunnels[username] = status
+        self._emit(username, {"type": "tunnel", "tunnel": self.get_tunnel(username), "at": time.time()})
+
+    def snapshot(self, username: str) -> dict:
+        return {
+            "type": "snapshot",
+            "servers": [self.server_status(server_id) for server_id in sorted(self._user_servers.get(username, ()))],
+            "tunnel": self.get_tunnel(username),
+            "at": time.time(),
+        }
+
+    # --- Event masuk ---
+
+    def _on_lifecycle_event(self, server_id: int, event: dict):
+        username = self._owners.get(server_id)
+        if username is not None:
+            self._emit(username, {"type": "server_state", "server": self.server_status(server_id),
+                                  "detail": event.get("detail", ""), "at": event.get("at", time.time())})
+
+    def _on_activity_change(self, server_id: int, status: dict):
+        # Bisa dipanggil dari thread pembaca konsol atau thread watcher idle
+        username = self._owners.get(server_id)
+        if username is not None:
+            self._emit(username, {"type": "players", "server_id": server_id,
+                                  "player_count": status["player_count"], "players": status["players"],
+                                  "at": time.time()})
+
+    # --- Pengiriman ---
+
+    def _emit(self, username: str, event: dict):
+        if self._loop is None or not self._subscribers.get(username):
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._deliver(username, event)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, username, event)
+
+    def _deliver(self, username: str, event: dict):
+        for queue in self._subscribers.get(username, []):
+            if queue.full():
+                # Event status tidak boleh hilang diam-diam: ganti antrean dengan snapshot baru
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot(username))
+                self.resyncs += 1
+            else:
+                queue.put_nowait(event)
+            self.events_sent += 1
+
+    def subscribe(self, username: str) -> asyncio.Queue:
+        """Harus dipanggil dari event loop. Event pertama di antrean adalah snapshot lengkap."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(username, []).append(queue)
+        queue.put_nowait(self.snapshot(username))
+        return queue
+
+    def unsubscribe(self, username: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(username, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            self._subscribers.pop(username, None)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "connections": sum(len(queues) for queues in self._subscribers.values()),
+            "tracked_servers": len(self._owners),
+            "events_sent": self.events_sent,
+            "resyncs": self.resyncs,
+        }
+
+
+status_hub = StatusHub()
@@ -0,0 +1,271 @@
+# Telemetri sumber daya per server (CPU, RSS, thread, I/O) dari /proc.
+# Satu thread sampler membaca /proc/<pid>/stat dan io untuk semua proses di
+# server_processes dalam satu putaran per interval. Sampel disimpan di ring buffer
+# berbasis array (bukan list of dict) dengan dua resolusi: per interval selama 1 jam
+# dan rata-rata per menit selama 1 hari, sehingga memori per server tetap konstan.
+
+import array
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.shared_state import server_processes
+
+SAMPLE_INTERVAL_SECONDS = 1.0
+SAMPLE_INTERVAL_ENV = "MC_TELEMETRY_INTERVAL_SECONDS"  # Override interval tanpa mengubah kode
+MIN_SAMPLE_INTERVAL_SECONDS = 0.1
+FINE_RETENTION_SECONDS = 3600      # Resolusi interval selama 1 jam
+COARSE_BUCKET_SECONDS = 60
+COARSE_RETENTION_SECONDS = 86400   # Resolusi 1 menit selama 1 hari
+PROC_ROOT = "/proc"
+
+FIELDS = ("ts", "cpu_percent", "rss_bytes", "threads", "read_bytes_per_sec", "write_bytes_per_sec")
+COARSE_FIELDS = FIELDS + ("cpu_percent_max", "rss_bytes_max")
+
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = 100
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 8192)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def _io_value(data: bytes, key: bytes) -> int:
+    start = data.find(key)
+    if start == -1:
+        return 0
+    end = data.find(b"\n", start)
+    return int(data[start + len(key):end])
+
+
+def heap_limit_bytes(java_args: List[str]) -> Optional[int]:
+    """Batas heap dari argumen -Xmx (mis. -Xmx1024M)."""
+    units = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    for arg in java_args:
+        match = re.fullmatch(r"-Xmx(\d+)([kKmMgG]?)", arg)
+        if match:
+            return int(match.group(1)) * units[match.group(2).upper()]
+    return None
+
+
+class RingSeries:
+    """Deret waktu ukuran tetap: satu array per kolom dan indeks kepala yang berputar."""
+
+    def __init__(self, capacity: int, fields=FIELDS):
+        self.capacity = capacity
+        self.fields = fields
+        self._columns = [array.array("d", bytes(8 * capacity)) for _ in fields]
+        self._head = 0
+        self._size = 0
+
+    def append(self, values):
+        for column, value in zip(self._columns, values):
+            column[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def points(self, since: float = 0.0) -> List[list]:
+        start = (self._head - self._size) % self.capacity
+        ts_column = self._columns[0]
+        result = []
+        for offset in range(self._size):
+            i = (start + offset) % self.capacity
+            if ts_column[i] < since:
+                continue
+            result.append([column[i] for column in self._columns])
+        return result
+
+    def latest(self) -> Optional[dict]:
+        if not self._size:
+            return None
+        i = (self._head - 1) % self.capacity
+        return {field: column[i] for field, column in zip(self.fields, self._columns)}
+
+
+class ServerSeries:
+    def __init__(self, interval: float):
+        self.fine = RingSeries(max(1, int(FINE_RETENTION_SECONDS / interval)))
+        self.coarse = RingSeries(COARSE_RETENTION_SECONDS // COARSE_BUCKET_SECONDS, COARSE_FIELDS)
+        self._bucket_start: Optional[float] = None
+        self._bucket: List[tuple] = []
+        # Nilai kumulatif sampel sebelumnya untuk menghitung selisih
+        self.pid: Optional[int] = None
+        self.prev_ts = 0.0
+        self.prev_cpu_ticks = 0
+        self.prev_read = 0
+        self.prev_write = 0
+
+    def add(self, sample: tuple):
+        self.fine.append(sample)
+        bucket_start = sample[0] - sample[0] % COARSE_BUCKET_SECONDS
+        if self._bucket_start is not None and bucket_start != self._bucket_start:
+            self._flush_bucket()
+        self._bucket_start = bucket_start
+        self._bucket.append(sample)
+
+    def _flush_bucket(self):
+        if not self._bucket:
+            return
+        n = len(self._bucket)
+        columns = list(zip(*self._bucket))
+        averages = [sum(column) / n for column in columns[1:]]
+        self.coarse.append([self._bucket_start] + averages + [max(columns[1]), max(columns[2])])
+        self._bucket = []
+
+
+class ResourceSampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS, proc_root: str = PROC_ROOT):
+        self.interval = interval
+        self.proc_root = proc_root
+        self.series: Dict[int, ServerSeries] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.passes = 0
+        self.last_pass_seconds = 0.0
+        self.cpu_seconds = 0.0  # Waktu CPU yang dipakai thread sampler sendiri
+
+    @property
+    def available(self) -> bool:
+        return os.path.isdir(os.path.join(self.proc_root, "self"))
+
+    def _read_process(self, pid: int):
+        """(cpu_ticks, rss_bytes, threads, read_bytes, write_bytes) atau None jika proses hilang."""
+        stat = _read(f"{self.proc_root}/{pid}/stat")
+        if stat is None:
+            return None
+        # Nama proses (field 2) bisa berisi spasi; field lain dimulai setelah ')' terakhir.
+        # Field rss di stat sama dengan VmRSS di /proc/<pid>/status, jadi status tidak perlu dibaca.
+        fields = stat[stat.rfind(b")") + 2:].split()
+        cpu_ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        threads = int(fields[17])
+        rss = int(fields[21]) * PAGE_SIZE
+        io = _read(f"{self.proc_root}/{pid}/io") or b""
+        return cpu_ticks, rss, threads, _io_value(io, b"read_bytes:"), _io_value(io, b"write_bytes:")
+
+    def sample_once(self):
+        """Satu putaran untuk semua server yang sedang berjalan."""
+        started = time.perf_counter()
+        now = time.time()
+        readings = []
+        for server_id, process in list(server_processes.items()):
+            if process.poll() is not None:
+                continue
+            pid = process.pid
+            values = self._read_process(pid)
+            if values is not None:
+                readings.append((server_id, pid, values))
+
+        with self._lock:
+            for server_id, pid, (cpu_ticks, rss, threads, read_bytes, write_bytes) in readings:
+                series = self.series.get(server_id)
+                if series is None:
+                    series = self.series[server_id] = ServerSeries(self.interval)
+                if series.pid == pid and now > series.prev_ts:
+                    elapsed = now - series.prev_ts
+                    cpu = (cpu_ticks - series.prev_cpu_ticks) / CLOCK_TICKS / elapsed * 100
+                    read_rate = max(0, read_bytes - series.prev_read) / elapsed
+                    write_rate = max(0, write_bytes - series.prev_write) / elapsed
+                    series.add((now, round(cpu, 2), rss, threads, read_rate, write_rate))
+                # Sampel pertama (atau proses baru setelah restart) hanya menjadi acuan
+                series.pid = pid
+                series.prev_ts = now
+                series.prev_cpu_ticks = cpu_ticks
+                series.prev_read = read_bytes
+                series.prev_write = write_bytes
+        self.passes += 1
+        self.last_pass_seconds = time.perf_counter() - started
+
+    def _run(self):
+        cpu_started = time.thread_time()
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"Gagal mengambil sampel telemetri: {e}")
+            self.cpu_seconds = time.thread_time() - cpu_started
+            # Jadwal tetap (tanpa drift) walaupun satu putaran memakan waktu
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self):
+        if not self.available:
+            print("Telemetri dinonaktifkan: /proc tidak tersedia di sistem ini.")
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def drop(self, server_id: int):
+        with self._lock:
+            self.series.pop(server_id, None)
+
+    def query(self, server_id: int, resolution: str = "fine", since: float = 0.0) -> dict:
+        with self._lock:
+            series = self.series.get(server_id)
+            if series is None:
+                return {"resolution_seconds": None, "fields": list(FIELDS), "points": [], "latest": None}
+            ring = series.coarse if resolution == "coarse" else series.fine
+            return {
+                "resolution_seconds": COARSE_BUCKET_SECONDS if resolution == "coarse" else self.interval,
+                "fields": list(ring.fields),
+                "points": ring.points(since),
+                "latest": series.fine.latest(),
+            }
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval,
+            "servers": len(self.series),
+            "passes": self.passes,
+            "last_pass_ms": round(self.last_pass_seconds * 1000, 3),
+            "sampler_cpu_seconds": round(self.cpu_seconds, 3),
+        }
+
+
+def configured_interval() -> float:
+    """Interval sampling dari environment, atau SAMPLE_INTERVAL_SECONDS jika tidak diisi/tidak valid."""
+    raw = os.environ.get(SAMPLE_INTERVAL_ENV)
+    if not raw:
+        return SAMPLE_INTERVAL_SECONDS
+    try:
+        interval = float(raw)
+    except ValueError:
+        interval = 0.0
+    # Lebih dari satu bucket kasar per sampel tidak masuk akal; perbandingan ini juga menolak NaN
+    if not MIN_SAMPLE_INTERVAL_SECONDS <= interval <= COARSE_BUCKET_SECONDS:
+        print(f"Peringatan: {SAMPLE_INTERVAL_ENV}={raw!r} tidak valid (harus {MIN_SAMPLE_INTERVAL_SECONDS}-"
+              f"{COARSE_BUCKET_SECONDS} detik); memakai {SAMPLE_INTERVAL_SECONDS} detik.")
+        return SAMPLE_INTERVAL_SECONDS
+    return interval
+
+
+resource_sampler = ResourceSampler(configured_interval())
@@ -0,0 +1,285 @@
+# Sesi unggah bertahap (chunked) yang bisa dilanjutkan.
+# Klien membuat sesi, mengirim potongan bernomor (boleh paralel dan tidak berurutan),
+# menanyakan potongan yang sudah diterima setelah koneksi putus, lalu menyelesaikan sesi.
+# Data ditulis ke file sementara di direktori tujuan dan baru dipindahkan ke nama
+# akhirnya dengan os.replace setelah lengkap, sehingga server Minecraft tidak pernah
+# melihat .jar setengah jadi. Metadata sesi disimpan di disk agar tetap bisa dilanjutkan
+# setelah backend restart; sesi yang lama tidak aktif dibersihkan otomatis.
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from backend.utils.file_manager import atomic_write_text
+
+UPLOAD_SESSION_DIR = "upload_sessions"
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+MAX_UPLOAD_SIZE = 64 * 1024 * 1024 * 1024
+SESSION_TTL_SECONDS = 24 * 3600  # Sesi tanpa aktivitas selama ini dianggap basi
+CLEANUP_INTERVAL_SECONDS = 600
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """Kesalahan sesi unggah; status_code dipetakan langsung ke HTTPException oleh route."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def check_filename(filename: str) -> str:
+    """Nama file unggahan tidak boleh berisi komponen path."""
+    name = os.path.basename(filename.replace("\\", "/"))
+    if not name or name in (".", "..") or name != filename:
+        raise UploadError(400, "Nama file tidak valid.")
+    return name
+
+
+class UploadSession:
+    def __init__(self, upload_id: str, server_id: int, dest_path: str, size: int, chunk_size: int,
+                 sha256: Optional[str] = None, overwrite: bool = False,
+                 received: Optional[List[int]] = None, created_at: Optional[float] = None,
+                 updated_at: Optional[float] = None):
+        self.upload_id = upload_id
+        self.server_id = server_id
+        self.dest_path = dest_path
+        self.size = size
+        self.chunk_size = chunk_size
+        self.sha256 = sha256.lower() if sha256 else None
+        self.overwrite = overwrite
+        self.received = set(received or [])
+        self.created_at = created_at or time.time()
+        self.updated_at = updated_at or self.created_at
+        self.lock = threading.Lock()
+        self.finalizing = False
+
+    @property
+    def total_chunks(self) -> int:
+        return (self.size + self.chunk_size - 1) // self.chunk_size
+
+    @property
+    def temp_path(self) -> str:
+        # Di direktori yang sama dengan tujuan agar os.replace tetap atomik
+        return os.path.join(os.path.dirname(self.dest_path), f".upload-{self.upload_id}.part")
+
+    def expected_length(self, index: int) -> int:
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def missing(self) -> List[int]:
+        return [i for i in range(self.total_chunks) if i not in self.received]
+
+    def received_ranges(self) -> List[List[int]]:
+        """Rentang byte [awal, akhir) yang sudah diterima, digabung jika bersebelahan."""
+        ranges: List[List[int]] = []
+        for index in sorted(self.received):
+            start = index * self.chunk_size
+            end = start + self.expected_length(index)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "server_id": self.server_id,
+            "dest_path": self.dest_path,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "sha256": self.sha256,
+            "overwrite": self.overwrite,
+            "received": sorted(self.received),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    def status(self) -> dict:
+        received_bytes = sum(self.expected_length(i) for i in self.received)
+        return {
+            "upload_id": self.upload_id,
+            "filename": os.path.basename(self.dest_path),
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": self.total_chunks,
+            "received_chunks": len(self.received),
+            "received_bytes": received_bytes,
+            "received_ranges": self.received_ranges(),
+            "missing_chunks": self.missing(),
+            "complete": len(self.received) == self.total_chunks,
+            "expires_at": self.updated_at + SESSION_TTL_SECONDS,
+        }
+
+
+class UploadSessionStore:
+    def __init__(self, session_dir: str = UPLOAD_SESSION_DIR, ttl: float = SESSION_TTL_SECONDS):
+        self.session_dir = session_dir
+        self.ttl = ttl
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    # --- Metadata di disk ---
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.session_dir, f"{upload_id}.json")
+
+    def _save(self, session: UploadSession):
+        atomic_write_text(self._meta_path(session.upload_id), json.dumps(session.to_dict()))
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            os.makedirs(self.session_dir, exist_ok=True)
+            for name in os.listdir(self.session_dir):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self.session_dir, name)) as f:
+                        session = UploadSession(**json.load(f))
+                except (OSError, ValueError, TypeError):
+                    continue
+                self._sessions[session.upload_id] = session
+
+    def _remove(self, session: UploadSession, keep_temp: bool = False):
+        with self._lock:
+            self._sessions.pop(session.upload_id, None)
+        for path in ([] if keep_temp else [session.temp_path]) + [self._meta_path(session.upload_id)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # --- Operasi sesi ---
+
+    def create(self, server_id: int, dest_path: str, size: int, chunk_size: Optional[int] = None,
+               sha256: Optional[str] = None, overwrite: bool = False) -> UploadSession:
+        self._load()
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(400, f"Ukuran potongan harus antara {MIN_CHUNK_SIZE} dan {MAX_CHUNK_SIZE} byte.")
+        if size < 0 or size > MAX_UPLOAD_SIZE:
+            raise UploadError(400, "Ukuran file tidak valid.")
+        if not os.path.isdir(os.path.dirname(dest_path)):
+            raise UploadError(400, "Path tujuan bukan direktori.")
+        if os.path.exists(dest_path) and not overwrite:
+            raise UploadError(409, "File dengan nama yang sama sudah ada di tujuan.")
+
+        session = UploadSession(uuid.uuid4().hex, server_id, dest_path, size, chunk_size, sha256, overwrite)
+        # Alokasikan file sementara sepanjang ukuran akhir; potongan ditulis langsung ke offsetnya
+        with open(session.temp_path, "wb") as f:
+            f.truncate(size)
+        self._save(session)
+        with self._lock:
+            self._sessions[session.upload_id] = session
+        return session
+
+    def get(self, upload_id: str, server_id: int) -> UploadSession:
+        self._load()
+        with self._lock:
+            session = self._sessions.get(upload_id)
+        if session is None or session.server_id != server_id:
+            raise UploadError(404, "Sesi unggah tidak ditemukan atau sudah kedaluwarsa.")
+        return session
+
+    def write_chunk(self, session: UploadSession, index: int, data: bytes, sha256: Optional[str] = None) -> dict:
+        if not 0 <= index < session.total_chunks:
+            raise UploadError(400, f"Nomor potongan di luar rentang 0..{session.total_chunks - 1}.")
+        if len(data) != session.expected_length(index):
+            raise UploadError(400, f"Potongan {index} harus berukuran {session.expected_length(index)} byte, diterima {len(data)}.")
+        if sha256 and hashlib.sha256(data).hexdigest() != sha256.lower():
+            raise UploadError(422, f"Checksum potongan {index} tidak cocok.")
+        if session.finalizing:
+            raise UploadError(409, "Sesi sedang diselesaikan.")
+
+        # Potongan berbeda tidak tumpang tindih, jadi penulisan paralel aman tanpa kunci
+        fd = os.open(session.temp_path, os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, index * session.chunk_size)
+        finally:
+            os.close(fd)
+
+        with session.lock:
+            session.received.add(index)
+            session.updated_at = time.time()
+            self._save(session)
+            return {"index": index, "received_chunks": len(session.received), "total_chunks": session.total_chunks}
+
+    def finalize(self, session: UploadSession) -> str:
+        with session.lock:
+            if session.finalizing:
+                raise UploadError(409, "Sesi sedang diselesaikan.")
+            missing = session.missing()
+            if missing:
+                raise UploadError(409, f"Masih ada {len(missing)} potongan yang belum diterima.")
+            session.finalizing = True
+        try:
+            with open(session.temp_path, "rb+") as f:
+                if session.sha256:
+                    digest = hashlib.sha256()
+                    for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                        digest.update(block)
+                    if digest.hexdigest() != session.sha256:
+                        raise UploadError(422, "Checksum file tidak cocok; unggah ulang potongan yang rusak.")
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(session.dest_path) and not session.overwrite:
+                raise UploadError(409, "File dengan nama yang sama sudah ada di tujuan.")
+            os.replace(session.temp_path, session.dest_path)
+        except UploadError:
+            session.finalizing = False
+            raise
+        self._remove(session, keep_temp=True)
+        return session.dest_path
+
+    def abort(self, session: UploadSession):
+        self._remove(session)
+
+    # --- Pembersihan ---
+
+    def cleanup_stale(self) -> int:
+        self._load()
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            stale = [s for s in self._sessions.values() if s.updated_at < cutoff and not s.finalizing]
+        for session in stale:
+            self._remove(session)
+        return len(stale)
+
+    async def _cleanup_loop(self):
+        while True:
+            try:
+                removed = await asyncio.to_thread(self.cleanup_stale)
+                if removed:
+                    print(f"Membersihkan {removed} sesi unggah yang kedaluwarsa.")
+            except Exception as e:
+                print(f"Gagal membersihkan sesi unggah: {e}")
+            await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+
+    def start_cleanup(self):
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.get_running_loop().create_task(self._cleanup_loop())
+
+    async def stop_cleanup(self):
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            try:
+                await self._cleanup_task
+            except asyncio.CancelledError:
+                pass
+            self._cleanup_task = None
+
+
+upload_sessions = UploadSessionStore()
@@ -0,0 +1,166 @@
+# Pembacaan format region Anvil (.mca).
+# File region berisi 32x32 chunk. 8 KB pertama adalah header: 1024 entri lokasi
+# (offset 3 byte dalam sektor 4 KB + jumlah sektor 1 byte) lalu 1024 timestamp.
+# Setiap chunk diawali panjang data 4 byte (big-endian) dan 1 byte jenis kompresi.
+
+import mmap
+import os
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+SECTOR_SIZE = 4096
+HEADER_SIZE = 2 * SECTOR_SIZE
+CHUNKS_PER_REGION = 1024
+CHUNK_HEADER_SIZE = 5
+
+# Jenis kompresi chunk: 1 gzip, 2 zlib, 3 tanpa kompresi, 4 LZ4 (1.20.5+)
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+COMPRESSION_LZ4 = 4
+COMPRESSED_TYPES = (COMPRESSION_GZIP, COMPRESSION_ZLIB, COMPRESSION_LZ4)
+
+_HEADER_TABLE = struct.Struct(">1024I")
+
+
+def read_locations(header: bytes) -> List[Tuple[int, int, int]]:
+    """(indeks chunk, offset byte, jumlah sektor) untuk setiap chunk yang ada."""
+    locations = []
+    for index, entry in enumerate(_HEADER_TABLE.unpack_from(header, 0)):
+        if entry:
+            sector, count = entry >> 8, entry & 0xFF
+            if sector and count:
+                locations.append((index, sector * SECTOR_SIZE, count))
+    return locations
+
+
+def read_timestamps(header: bytes) -> Tuple[int, ...]:
+    return _HEADER_TABLE.unpack_from(header, SECTOR_SIZE)
+
+
+def chunk_spans(data, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Rentang (offset, panjang) data nyata setiap chunk di file region, diurutkan per offset.
+    Panjang mengikuti field panjang chunk (bukan jumlah sektor), jadi sisa sektor yang
+    tidak terpakai tidak ikut. None jika header tidak valid (file rusak atau bukan Anvil).
+    """
+    if size < HEADER_SIZE:
+        return None
+    spans = []
+    for _, offset, count in read_locations(data[:HEADER_SIZE]):
+        if offset < HEADER_SIZE or offset + CHUNK_HEADER_SIZE > size:
+            return None
+        length = int.from_bytes(data[offset:offset + 4], "big") + 4
+        length = min(length, count * SECTOR_SIZE, size - offset)
+        spans.append((offset, length))
+    spans.sort()
+    for (offset, length), (next_offset, _) in zip(spans, spans[1:]):
+        if offset + length > next_offset:
+            return None
+    return spans
+
+
+def external_chunk_path(region_dir: str, chunk_x: int, chunk_z: int) -> str:
+    """File c.<x>.<z>.mcc untuk chunk yang datanya > 1 MB (koordinat chunk global)."""
+    return os.path.join(region_dir, f"c.{chunk_x}.{chunk_z}.mcc")
+
+
+def decompress_chunk(compression: int, payload) -> Optional[bytes]:
+    """NBT mentah satu chunk. None untuk LZ4 (tidak ada di stdlib) atau jenis tak dikenal."""
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_GZIP:
+        return zlib.decompress(payload, 16 + zlib.MAX_WBITS)
+    if compression == COMPRESSION_NONE:
+        return bytes(payload)
+    return None
+
+
+def region_coords(name: str) -> Optional[Tuple[int, int]]:
+    """Koordinat region dari nama file r.<x>.<z>.mca."""
+    parts = name.split(".")
+    if len(parts) != 4 or parts[0] != "r" or parts[3] != "mca":
+        return None
+    try:
+        return int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+def _scan_region(data, size: int, with_chunks: bool) -> dict:
+    total_sectors = (size + SECTOR_SIZE - 1) // SECTOR_SIZE
+    summary = {
+        "size": size, "chunks": 0, "data_bytes": 0, "allocated_bytes": 0,
+        "wasted_bytes": 0, "reclaimable_bytes": 0, "free_sectors": 0, "fragments": 0,
+        "oldest": None, "newest": None, "external": 0, "corrupt": 0,
+    }
+    chunks = [] if with_chunks else None
+    if size == 0:
+        return {**summary, "chunk_list": chunks}
+    if size < HEADER_SIZE:
+        summary["corrupt"] = 1
+        return {**summary, "chunk_list": chunks}
+
+    header = data[:HEADER_SIZE]
+    timestamps = read_timestamps(header)
+    used = bytearray(total_sectors)
+    used[0] = used[1] = 1
+    needed_sectors = 2
+    for index, offset, count in read_locations(header):
+        sector = offset // SECTOR_SIZE
+        if sector < 2 or sector + count > total_sectors or offset + CHUNK_HEADER_SIZE > size:
+            summary["corrupt"] += 1
+            continue
+        if any(used[sector:sector + count]):
+            summary["corrupt"] += 1  # Dua chunk berbagi sektor yang sama
+            continue
+        used[sector:sector + count] = b"\x01" * count
+        length = int.from_bytes(data[offset:offset + 4], "big") + 4
+        compression = data[offset + 4]
+        external = bool(compression & 0x80)  # Data chunk > 1 MB disimpan di c.<x>.<z>.mcc
+        timestamp = timestamps[index]
+        summary["chunks"] += 1
+        summary["data_bytes"] += length
+        summary["allocated_bytes"] += count * SECTOR_SIZE
+        summary["external"] += external
+        needed_sectors += (length + SECTOR_SIZE - 1) // SECTOR_SIZE
+        if timestamp:
+            summary["oldest"] = timestamp if summary["oldest"] is None else min(summary["oldest"], timestamp)
+            summary["newest"] = timestamp if summary["newest"] is None else max(summary["newest"], timestamp)
+        if chunks is not None:
+            chunks.append({
+                "index": index, "local_x": index % 32, "local_z": index // 32,
+                "sector": sector, "sectors": count, "bytes": length,
+                "compression": compression & 0x7F, "external": external, "timestamp": timestamp,
+            })
+
+    # Fragmen: rangkaian sektor kosong; setiap rangkaian diawali sektor terpakai (header selalu terpakai)
+    summary["free_sectors"] = used.count(0)
+    summary["fragments"] = used.count(b"\x01\x00")
+    summary["wasted_bytes"] = size - HEADER_SIZE - summary["data_bytes"]
+    summary["reclaimable_bytes"] = max(0, size - needed_sectors * SECTOR_SIZE)
+    return {**summary, "chunk_list": chunks}
+
+
+def analyze_region(path: str, with_chunks: bool = False) -> dict:
+    """Ringkasan satu file region (dan daftar chunk jika diminta), dibaca lewat mmap."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return _scan_region(b"", 0, with_chunks)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _scan_region(data, size, with_chunks)
+
+
+def analyze_regions(paths: List[str]) -> List[Tuple[str, Optional[dict]]]:
+    """Fungsi worker process pool: ringkasan sekumpulan file region (None jika gagal dibaca)."""
+    results = []
+    for path in paths:
+        try:
+            summary = analyze_region(path)
+            summary.pop("chunk_list")
+        except OSError:
+            summary = None
+        results.append((path, summary))
+    return results
@@ -0,0 +1,168 @@
+# Fungsi worker untuk backup dunia (berjalan di process pool, jadi hanya memakai stdlib).
+# File dipecah menjadi potongan (piece) yang dialamatkan dengan SHA-256 isinya:
+# - file region .mca dipecah per chunk Minecraft (plus header 8 KB), sehingga region
+#   yang hanya berubah beberapa chunk cukup menyimpan chunk itu saja;
+# - file lain dipecah per blok tetap.
+# Worker membaca file lewat mmap, menghitung hash, mengecek ke index.db (read-only)
+# apakah potongan sudah tersimpan, dan hanya mengompres potongan yang baru.
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import zlib
+from typing import List, Tuple
+
+from backend.utils.anvil import CHUNK_HEADER_SIZE, COMPRESSED_TYPES, HEADER_SIZE, chunk_spans
+
+BLOCK_SIZE = 4 * 1024 * 1024
+COMPRESS_LEVEL = 6
+MIN_COMPRESSION_GAIN = 0.9   # Simpan mentah jika hasil kompresi tidak lebih kecil dari 90%
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+
+# Satu entri recipe: offset (8 byte), panjang (4 byte), hash (32 byte)
+RECIPE_ENTRY = struct.Struct(">QI32s")
+
+_connections = {}  # path index.db -> (dev, inode, koneksi)
+
+
+def _index_connection(db_path: str) -> sqlite3.Connection:
+    # Satu koneksi read-only per proses worker untuk setiap store. Dicocokkan dengan inode:
+    # id server bisa dipakai ulang setelah server dihapus, dan store barunya file yang berbeda.
+    st = os.stat(db_path)
+    cached = _connections.get(db_path)
+    if cached is not None and cached[:2] == (st.st_dev, st.st_ino):
+        return cached[2]
+    if cached is not None:
+        cached[2].close()
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    _connections[db_path] = (st.st_dev, st.st_ino, conn)
+    return conn
+
+
+def pack_recipe(pieces: List[Tuple[int, int, bytes]]) -> bytes:
+    return b"".join(RECIPE_ENTRY.pack(offset, length, digest) for offset, length, digest in pieces)
+
+
+def unpack_recipe(data: bytes) -> List[Tuple[int, int, bytes]]:
+    return list(RECIPE_ENTRY.iter_unpack(data))
+
+
+def _spans(data, size: int, is_region: bool) -> List[Tuple[int, int]]:
+    if is_region:
+        spans = chunk_spans(data, size)
+        if spans is not None:
+            return [(0, HEADER_SIZE)] + spans
+    return [(offset, min(BLOCK_SIZE, size - offset)) for offset in range(0, size, BLOCK_SIZE)]
+
+
+def _encode(piece, is_chunk: bool) -> Tuple[int, bytes]:
+    # Data chunk Minecraft biasanya sudah terkompresi (zlib/gzip/LZ4): jangan dikompres ulang
+    if is_chunk and len(piece) > CHUNK_HEADER_SIZE and piece[4] in COMPRESSED_TYPES:
+        return CODEC_RAW, bytes(piece)
+    compressed = zlib.compress(piece, COMPRESS_LEVEL)
+    if len(compressed) < len(piece) * MIN_COMPRESSION_GAIN:
+        return CODEC_ZLIB, compressed
+    return CODEC_RAW, bytes(piece)
+
+
+def decode(codec: int, blob: bytes) -> bytes:
+    return zlib.decompress(blob) if codec == CODEC_ZLIB else blob
+
+
+def chunk_file(db_path: str, path: str, is_region: bool):
+    """
+    Pecah satu file dan siapkan potongan yang belum ada di store.
+    Mengembalikan (ukuran, recipe, potongan baru [(hash, codec, panjang asli, blob)]).
+    """
+    conn = _index_connection(db_path)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0, b"", []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                pieces = []
+                new_pieces = []
+                seen = set()
+                for offset, length in _spans(data, size, is_region):
+                    with view[offset:offset + length] as piece:
+                        digest = hashlib.sha256(piece).digest()
+                        pieces.append((offset, length, digest))
+                        if digest in seen:
+                            continue
+                        seen.add(digest)
+                        if conn.execute("SELECT 1 FROM chunks WHERE hash = ?", (digest,)).fetchone():
+                            continue
+                        codec, blob = _encode(piece, is_region and offset >= HEADER_SIZE)
+                        new_pieces.append((digest, codec, length, blob))
+            finally:
+                view.release()
+    return size, pack_recipe(pieces), new_pieces
+
+
+def encode_pieces(path: str, is_region: bool, wanted: List[Tuple[int, int, bytes]]):
+    """
+    Baca ulang dan kodekan potongan tertentu (offset, panjang, hash) dari file.
+    Dipakai proses utama untuk potongan di recipe yang ternyata belum ada di store.
+    ValueError jika isi file sudah berbeda dari hash di recipe.
+    """
+    new_pieces = []
+    with open(path, "rb") as f:
+        for offset, length, digest in wanted:
+            f.seek(offset)
+            piece = f.read(length)
+            if len(piece) != length or hashlib.sha256(piece).digest() != digest:
+                raise ValueError(f"{path} berubah selama backup (offset {offset})")
+            codec, blob = _encode(piece, is_region and offset >= HEADER_SIZE)
+            new_pieces.append((digest, codec, length, blob))
+    return new_pieces
+
+
+def restore_file(dest: str, size: int, mtime_ns: int, mode: int,
+                 pieces: List[Tuple[int, int, bytes, str, int, int, int]]) -> int:
+    """
+    Tulis ulang satu file dari potongannya. pieces: (offset, panjang, hash, path pack,
+    offset di pack, panjang di pack, codec). Celah antar potongan (sektor region yang tidak
+    terpakai) diisi nol. File ditulis ke file sementara lalu di-rename agar atomik.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = f"{dest}.restore-tmp"
+    packs = {}
+    try:
+        with open(tmp_path, "wb") as out:
+            out.truncate(size)
+            for offset, length, digest, pack_path, pack_offset, pack_length, codec in pieces:
+                pack = packs.get(pack_path)
+                if pack is None:
+                    pack = packs[pack_path] = open(pack_path, "rb")
+                pack.seek(pack_offset)
+                data = decode(codec, pack.read(pack_length))
+                if len(data) != length or hashlib.sha256(data).digest() != digest:
+                    raise ValueError(f"Potongan rusak untuk {dest} pada offset {offset}")
+                out.seek(offset)
+                out.write(data)
+        os.chmod(tmp_path, mode & 0o7777)
+        os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        for pack in packs.values():
+            pack.close()
+    return size
+
+
+def unchanged_on_disk(path: str, size: int, mtime_ns: int) -> bool:
+    """True jika file di disk tampak sama (ukuran dan mtime) dengan entri snapshot."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return st.st_size == size and st.st_mtime_ns == mtime_ns
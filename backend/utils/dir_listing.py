@@ -0,0 +1,168 @@
+# Mesin daftar isi direktori untuk file manager.
+# Direktori dibaca sekali dengan os.scandir (tipe entri didapat dari DirEntry tanpa
+# syscall tambahan), hasilnya disimpan sebentar per direktori dan dianggap basi
+# begitu mtime direktori berubah. Urutan per kolom (name/size/mtime) juga di-cache,
+# sehingga berpindah halaman atau kembali ke folder yang sama hampir tanpa biaya.
+
+import base64
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+
+from backend.auth_cache import TTLCache
+
+LISTING_CACHE_SIZE = 256
+LISTING_TTL_SECONDS = 10  # Ukuran/mtime file bisa berubah tanpa mengubah mtime direktori
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+SORT_FIELDS = ("name", "size", "mtime")
+
+
+class ListingError(Exception):
+    pass
+
+
+class DirEntryInfo:
+    __slots__ = ("name", "is_dir", "size", "mtime")
+
+    def __init__(self, name: str, is_dir: bool, size: int, mtime: float):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+
+
+class DirectorySnapshot:
+    def __init__(self, mtime_ns: int, entries: List[DirEntryInfo]):
+        self.mtime_ns = mtime_ns
+        self.entries = entries
+        self._views: Dict[Tuple[str, bool], Tuple[list, List[DirEntryInfo]]] = {}
+        self._lock = threading.Lock()
+
+    def view(self, sort: str, descending: bool) -> Tuple[list, List[DirEntryInfo]]:
+        """(kunci terurut naik, entri terurut naik); untuk desc dibaca dari belakang."""
+        with self._lock:
+            view = self._views.get((sort, descending))
+            if view is None:
+                keyed = sorted(((sort_key(e, sort, descending), e) for e in self.entries), key=lambda pair: pair[0])
+                view = ([k for k, _ in keyed], [e for _, e in keyed])
+                self._views[(sort, descending)] = view
+            return view
+
+
+def sort_key(entry: DirEntryInfo, sort: str, descending: bool = False) -> list:
+    # Folder selalu di depan, apa pun arah urutannya
+    rank = 0 if entry.is_dir != descending else 1
+    lowered = entry.name.lower()
+    if sort == "size":
+        return [rank, entry.size, lowered, entry.name]
+    if sort == "mtime":
+        return [rank, entry.mtime, lowered, entry.name]
+    return [rank, lowered, entry.name]
+
+
+def encode_cursor(sort: str, order: str, key: list) -> str:
+    raw = json.dumps([sort, order, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, key = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ListingError("Cursor tidak valid.")
+    if cursor_sort != sort or cursor_order != order or not _valid_key(key, sort):
+        raise ListingError("Cursor tidak cocok dengan urutan yang diminta.")
+    return key
+
+
+def _valid_key(key, sort: str) -> bool:
+    """Kunci harus berbentuk sama dengan hasil sort_key agar bisa dibandingkan saat bisect."""
+    if not isinstance(key, list):
+        return False
+    # bool adalah subclass int; tidak mungkin dihasilkan sort_key
+    if sort == "name":
+        types = (int, str, str)
+    else:
+        types = (int, int if sort == "size" else (int, float), str, str)
+    return len(key) == len(types) and all(
+        isinstance(value, expected) and not isinstance(value, bool) for value, expected in zip(key, types)
+    )
+
+
+class DirectoryLister:
+    def __init__(self, cache_size: int = LISTING_CACHE_SIZE, ttl: float = LISTING_TTL_SECONDS):
+        self._cache = TTLCache(cache_size, ttl)
+
+    def _scan(self, abs_path: str, mtime_ns: int) -> DirectorySnapshot:
+        entries = []
+        with os.scandir(abs_path) as it:
+            for dir_entry in it:
+                try:
+                    is_dir = dir_entry.is_dir()
+                    st = dir_entry.stat()
+                except OSError:
+                    # Symlink rusak atau file yang hilang saat dibaca
+                    continue
+                entries.append(DirEntryInfo(dir_entry.name, is_dir, st.st_size, st.st_mtime))
+        return DirectorySnapshot(mtime_ns, entries)
+
+    def snapshot(self, abs_path: str) -> DirectorySnapshot:
+        mtime_ns = os.stat(abs_path).st_mtime_ns
+        snapshot = self._cache.get(abs_path)
+        if snapshot is None or snapshot.mtime_ns != mtime_ns:
+            snapshot = self._scan(abs_path, mtime_ns)
+            self._cache.set(abs_path, snapshot)
+        return snapshot
+
+    def list(
+        self,
+        abs_path: str,
+        sort: str = "name",
+        order: str = "asc",
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        pattern: Optional[str] = None,
+    ) -> dict:
+        """
+        Satu halaman isi direktori. Cursor menyimpan kunci urut entri terakhir, jadi
+        halaman berikutnya tetap konsisten walaupun ada file yang ditambah/dihapus.
+        """
+        if sort not in SORT_FIELDS:
+            raise ListingError(f"Urutan harus salah satu dari: {', '.join(SORT_FIELDS)}.")
+        if order not in ("asc", "desc"):
+            raise ListingError("Arah urutan harus 'asc' atau 'desc'.")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        snapshot = self.snapshot(os.path.normpath(abs_path))
+        descending = order == "desc"
+        keys, entries = snapshot.view(sort, descending)
+        total = len(entries)
+
+        if cursor:
+            key = decode_cursor(cursor, sort, order)
+            start = total - bisect_left(keys, key) if descending else bisect_right(keys, key)
+        else:
+            start = 0
+
+        pattern = pattern.lower() if pattern else None
+        page: List[DirEntryInfo] = []
+        position = start
+        while position < total and len(page) < limit:
+            entry = entries[total - 1 - position] if descending else entries[position]
+            position += 1
+            if pattern and not fnmatchcase(entry.name.lower(), pattern):
+                continue
+            page.append(entry)
+
+        next_cursor = None
+        if position < total and page:
+            next_cursor = encode_cursor(sort, order, sort_key(page[-1], sort, descending))
+        return {"entries": page, "total": total, "next_cursor": next_cursor}
+
+
+directory_lister = DirectoryLister()
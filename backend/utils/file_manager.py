@@ -1 +1,297 @@
-# Placeholder file for future file manager utils
+# Utilitas file yang dipakai bersama oleh beberapa modul.
+
+import asyncio
+import io
+import os
+import shutil
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Iterator, List, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Tulis file lewat file sementara + rename agar pembaca tidak pernah melihat file setengah jadi."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def atomic_write_text(path: str, content: str):
+    atomic_write_bytes(path, content.encode("utf-8"))
+
+
+def atomic_copy_fileobj(source, path: str):
+    """Salin file-like ke path lewat file sementara + rename, tanpa membaca semuanya ke memori."""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(source, f, 1024 * 1024)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# --- Respons file ---
+
+
+class DownloadResponse(FileResponse):
+    """
+    FileResponse dengan potongan lebih besar, dan sendfile zero-copy jika server ASGI
+    mendukung ekstensi "http.response.zerocopysend". Range, ETag, dan Last-Modified
+    ditangani oleh FileResponse bawaan Starlette.
+    """
+
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope, receive, send):
+        extensions = scope.get("extensions") or {}
+        headers = Headers(scope=scope)
+        if (
+            "http.response.zerocopysend" in extensions
+            and scope["method"].upper() != "HEAD"
+            and headers.get("range") is None
+            and self.stat_result is not None
+        ):
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "count": self.stat_result.st_size,
+                    "more_body": False,
+                })
+            if self.background is not None:
+                await self.background()
+            return
+        await super().__call__(scope, receive, send)
+
+
+def is_not_modified(request_headers: Headers, response: FileResponse) -> bool:
+    """Cek If-None-Match / If-Modified-Since terhadap ETag dan Last-Modified respons."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = response.headers.get("etag")
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    last_modified = response.headers.get("last-modified")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified_response(response: FileResponse) -> Response:
+    headers = {k: response.headers[k] for k in ("etag", "last-modified") if k in response.headers}
+    return Response(status_code=304, headers=headers)
+
+
+# --- ZIP streaming ---
+
+# File yang isinya sudah terkompresi disimpan apa adanya (ZIP_STORED); mengompresi
+# ulang hanya membuang CPU tanpa mengurangi ukuran.
+PRECOMPRESSED_EXTENSIONS = {
+    ".mca", ".mcc", ".jar", ".zip", ".gz", ".tgz", ".xz", ".bz2", ".7z", ".rar",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ogg", ".mp3", ".dat", ".dat_old", ".nbt",
+}
+ZIP_WORKERS = 8  # Unduhan ZIP bersamaan; permintaan berikutnya ditolak 429
+ZIP_CHUNK_SIZE = 256 * 1024
+ZIP_QUEUE_CHUNKS = 8  # Potongan yang boleh menunggu dikirim; membatasi memori per unduhan
+ZIP_COMPRESS_LEVEL = 6
+
+_zip_executor = ThreadPoolExecutor(max_workers=ZIP_WORKERS, thread_name_prefix="zip-stream")
+# Setiap unduhan memegang satu thread pool selama klien menerima data; slot diambil
+# sebelum respons dibuat sehingga unduhan yang tidak kebagian thread langsung ditolak
+_zip_slots = threading.BoundedSemaphore(ZIP_WORKERS)
+_ZIP_DONE = object()
+
+
+class ZipBusyError(Exception):
+    def __init__(self, status_code: int = 429, detail: str = "Terlalu banyak unduhan ZIP berjalan, coba lagi nanti."):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _ZipCancelled(Exception):
+    pass
+
+
+class _ChunkBridge:
+    """
+    Antrean dari thread kompresi ke event loop. Tempat kosong dihitung dengan semaphore:
+    thread produsen menunggu saat klien lambat, event loop tidak pernah memblokir.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, cancel: threading.Event):
+        self._loop = loop
+        self._cancel = cancel
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._space = threading.Semaphore(ZIP_QUEUE_CHUNKS)
+
+    def put(self, item):
+        """Dipanggil dari thread produsen; _ZipCancelled jika unduhan dibatalkan."""
+        while not self._space.acquire(timeout=0.5):
+            if self._cancel.is_set():
+                raise _ZipCancelled()
+        if self._cancel.is_set():
+            raise _ZipCancelled()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    def close(self):
+        """Penanda selesai; tidak menunggu tempat kosong."""
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, _ZIP_DONE)
+        except RuntimeError:
+            pass  # Event loop sudah ditutup
+
+    async def get(self):
+        item = await self._queue.get()
+        if item is not _ZIP_DONE:
+            self._space.release()
+        return item
+
+
+class _ChunkQueueWriter(io.RawIOBase):
+    """
+    Objek file tulis-saja (tidak bisa seek) untuk zipfile. Data dikumpulkan per
+    potongan lalu dimasukkan ke antrean terbatas; put() memblokir saat klien lambat,
+    sehingga kompresi ikut melambat dan memori tetap konstan.
+    """
+
+    def __init__(self, chunks: _ChunkBridge):
+        self._chunks = chunks
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= ZIP_CHUNK_SIZE:
+            self._emit()
+        return len(data)
+
+    def _emit(self):
+        if not self._buffer:
+            return
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        self._chunks.put(chunk)
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        self._emit()
+
+
+def iter_zip_sources(base_dir: str, relative_paths: List[str]) -> Iterator[Tuple[str, str]]:
+    """Hasilkan (path absolut, nama di arsip) untuk file dan folder terpilih, folder ditelusuri rekursif."""
+    real_base = os.path.realpath(base_dir)
+
+    def inside_base(path: str) -> bool:
+        # Pembanding diakhiri separator: /srv/a tidak boleh lolos sebagai bagian dari /srv/ab
+        real_path = os.path.realpath(path)
+        return real_path == real_base or real_path.startswith(real_base + os.sep)
+
+    for relative_path in relative_paths:
+        abs_path = os.path.normpath(os.path.join(base_dir, relative_path))
+        if not inside_base(abs_path):
+            continue
+        if os.path.isdir(abs_path):
+            for root, dirs, files in os.walk(abs_path):
+                dirs.sort()
+                arc_root = os.path.relpath(root, base_dir).replace("\\", "/")
+                if not dirs and not files:
+                    yield root, arc_root + "/"
+                for name in sorted(files):
+                    full_path = os.path.join(root, name)
+                    # Jangan ikuti symlink yang mengarah keluar direktori server
+                    if not inside_base(full_path):
+                        continue
+                    yield full_path, f"{arc_root}/{name}"
+        elif os.path.isfile(abs_path):
+            yield abs_path, os.path.relpath(abs_path, base_dir).replace("\\", "/")
+
+
+def _write_zip(sources: Iterator[Tuple[str, str]], chunks: _ChunkBridge):
+    writer = _ChunkQueueWriter(chunks)
+    try:
+        with zipfile.ZipFile(writer, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESS_LEVEL) as zf:
+            for abs_path, arcname in sources:
+                if arcname.endswith("/"):
+                    zf.writestr(zipfile.ZipInfo(arcname), b"")
+                    continue
+                try:
+                    zinfo = zipfile.ZipInfo.from_file(abs_path, arcname)
+                    ext = os.path.splitext(abs_path)[1].lower()
+                    if ext in PRECOMPRESSED_EXTENSIONS:
+                        zinfo.compress_type = zipfile.ZIP_STORED
+                    else:
+                        zinfo.compress_type = zipfile.ZIP_DEFLATED
+                        zinfo._compresslevel = ZIP_COMPRESS_LEVEL
+                    with open(abs_path, "rb") as src, zf.open(zinfo, mode="w") as dest:
+                        while True:
+                            block = src.read(ZIP_CHUNK_SIZE)
+                            if not block:
+                                break
+                            dest.write(block)
+                except OSError as e:
+                    # File bisa saja hilang/terkunci saat server berjalan; lewati saja
+                    print(f"Peringatan: gagal menambahkan {abs_path} ke ZIP: {e}")
+        writer.finish()
+    except _ZipCancelled:
+        return
+    finally:
+        chunks.close()
+
+
+def stream_zip(sources: Iterator[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """
+    Bangun ZIP secara streaming: kompresi berjalan di worker pool, setiap potongan
+    dikirim ke klien begitu siap tanpa menampung seluruh arsip di memori.
+    ZipBusyError (429) jika semua slot unduhan sedang terpakai.
+    """
+    if not _zip_slots.acquire(blocking=False):
+        raise ZipBusyError()
+    return _stream_zip(sources)
+
+
+async def _stream_zip(sources: Iterator[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    chunks = _ChunkBridge(loop, cancel)
+    try:
+        producer = loop.run_in_executor(_zip_executor, _write_zip, sources, chunks)
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is _ZIP_DONE:
+                    break
+                yield chunk
+            await producer
+        finally:
+            # Klien memutus koneksi: produsen berhenti pada put() berikutnya
+            cancel.set()
+    finally:
+        _zip_slots.release()
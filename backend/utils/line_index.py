@@ -0,0 +1,197 @@
+# Indeks offset baris (sparse) untuk pratinjau file besar.
+# Hanya offset byte setiap LINE_CHECKPOINT baris yang disimpan, jadi indeks untuk
+# log 500 MB cukup beberapa ribu angka. Membaca baris ke-N cukup seek ke checkpoint
+# terdekat lalu melewati paling banyak LINE_CHECKPOINT-1 baris. Indeks dipakai ulang
+# selama ukuran dan mtime file tidak berubah; jika file hanya bertambah panjang
+# (latest.log yang terus ditulis), indeks diperpanjang dari posisi terakhir saja.
+# "Hanya bertambah" dibuktikan dengan sidik jari: byte tepat sebelum posisi terakhir
+# yang diindeks harus masih sama; file yang ditulis ulang di tempat dibangun ulang dari nol.
+
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+LINE_CHECKPOINT = 1000
+SCAN_BLOCK_SIZE = 1024 * 1024
+INDEX_CACHE_SIZE = 64
+MAX_PREVIEW_LINES = 5000
+MAX_PREVIEW_BYTES = 1024 * 1024
+FINGERPRINT_SIZE = 4096
+
+
+class LineIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.checkpoints = array("q", [0])  # checkpoints[i] = offset awal baris ke-(i*LINE_CHECKPOINT)
+        self.newlines = 0
+        self.indexed_size = 0
+        self.mtime_ns = 0
+        self.inode = None
+        self.last_newline_end = 0
+        self.fingerprint = b""  # Byte terakhir sebelum indexed_size saat indeks dibangun
+        self.lock = threading.Lock()
+
+    @property
+    def total_lines(self) -> int:
+        # Baris terakhir tanpa newline tetap dihitung sebagai satu baris
+        return self.newlines + (1 if self.indexed_size > self.last_newline_end else 0)
+
+    def _scan(self, f, start: int):
+        f.seek(start)
+        offset = start
+        while True:
+            block = f.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            count = block.count(b"\n")
+            # Lompat langsung jika blok ini tidak melewati checkpoint berikutnya
+            next_checkpoint = len(self.checkpoints) * LINE_CHECKPOINT
+            if self.newlines + count < next_checkpoint:
+                self.newlines += count
+            else:
+                position = 0
+                for _ in range(count):
+                    position = block.find(b"\n", position) + 1
+                    self.newlines += 1
+                    if self.newlines % LINE_CHECKPOINT == 0:
+                        self.checkpoints.append(offset + position)
+            if count:
+                self.last_newline_end = offset + block.rfind(b"\n") + 1
+            offset += len(block)
+        self.indexed_size = offset
+
+    def _read_fingerprint(self, f) -> bytes:
+        start = max(0, self.indexed_size - FINGERPRINT_SIZE)
+        f.seek(start)
+        return f.read(self.indexed_size - start)
+
+    def refresh(self, st: os.stat_result):
+        """Bangun atau perpanjang indeks agar sesuai dengan stat file saat ini."""
+        if st.st_mtime_ns == self.mtime_ns and st.st_size == self.indexed_size and st.st_ino == self.inode:
+            return
+        with open(self.path, "rb") as f:
+            if (st.st_ino == self.inode and st.st_size >= self.indexed_size and self.indexed_size > 0
+                    and self._read_fingerprint(f) == self.fingerprint):
+                # File hanya bertambah: lanjutkan dari awal baris terakhir yang belum lengkap
+                self._scan(f, self.indexed_size)
+            else:
+                self.checkpoints = array("q", [0])
+                self.newlines = 0
+                self.last_newline_end = 0
+                self._scan(f, 0)
+            self.fingerprint = self._read_fingerprint(f)
+        self.mtime_ns = st.st_mtime_ns
+        self.inode = st.st_ino
+
+    def line_offset(self, f, line: int) -> int:
+        """Offset byte awal baris (0-based)."""
+        checkpoint = min(line // LINE_CHECKPOINT, len(self.checkpoints) - 1)
+        f.seek(self.checkpoints[checkpoint])
+        for _ in range(line - checkpoint * LINE_CHECKPOINT):
+            if not f.readline():
+                break
+        return f.tell()
+
+    def line_at(self, f, offset: int) -> int:
+        """Nomor baris (0-based) yang memuat offset byte."""
+        checkpoint = bisect_right(self.checkpoints, offset) - 1
+        start = self.checkpoints[checkpoint]
+        line = checkpoint * LINE_CHECKPOINT
+        f.seek(start)
+        remaining = offset - start
+        while remaining > 0:
+            block = f.read(min(SCAN_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            line += block.count(b"\n")
+            remaining -= len(block)
+        return line
+
+
+def _read_lines(f, count: int, max_bytes: int) -> Tuple[bytes, int, bool]:
+    """Baca sampai `count` baris atau `max_bytes` byte. (data, jumlah baris, terpotong)."""
+    parts = []
+    size = 0
+    lines = 0
+    while lines < count:
+        line = f.readline(max_bytes - size + 1)
+        if not line:
+            return b"".join(parts), lines, False
+        if size + len(line) > max_bytes:
+            return b"".join(parts), lines, True
+        parts.append(line)
+        size += len(line)
+        lines += 1
+    return b"".join(parts), lines, False
+
+
+class LineIndexCache:
+    def __init__(self, maxsize: int = INDEX_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, path: str) -> LineIndex:
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is None:
+                index = LineIndex(path)
+                self._indexes[path] = index
+            self._indexes.move_to_end(path)
+            while len(self._indexes) > self.maxsize:
+                self._indexes.popitem(last=False)
+            return index
+
+    def read(
+        self,
+        path: str,
+        mode: str = "head",
+        start_line: Optional[int] = None,
+        lines: int = 200,
+        offset: Optional[int] = None,
+        length: int = 64 * 1024,
+    ) -> dict:
+        """
+        mode: "head" (N baris pertama), "tail" (N baris terakhir), "lines" (mulai start_line,
+        1-based), atau "bytes" (rentang byte mulai offset). Nomor baris di hasil 1-based.
+        """
+        lines = max(1, min(lines, MAX_PREVIEW_LINES))
+        index = self._get(path)
+        with index.lock:
+            st = os.stat(path)
+            index.refresh(st)
+            total = index.total_lines
+            with open(path, "rb") as f:
+                if mode == "bytes":
+                    start = max(0, min(offset or 0, st.st_size))
+                    f.seek(start)
+                    data = f.read(max(0, min(length, MAX_PREVIEW_BYTES)))
+                    first_line = index.line_at(f, start)
+                    end_offset = start + len(data)
+                    return {
+                        "content": data.decode("utf-8", errors="replace"),
+                        "offset": start, "next_offset": end_offset if end_offset < st.st_size else None,
+                        "start_line": first_line + 1, "total_lines": total, "size": st.st_size,
+                        "truncated": end_offset < st.st_size,
+                    }
+
+                if mode == "tail":
+                    first = max(0, total - lines)
+                elif mode == "lines":
+                    first = max(0, (start_line or 1) - 1)
+                else:
+                    first = 0
+                start = index.line_offset(f, first)
+                f.seek(start)
+                data, count, truncated = _read_lines(f, lines, MAX_PREVIEW_BYTES)
+        return {
+            "content": data.decode("utf-8", errors="replace"),
+            "start_line": first + 1, "end_line": first + count, "total_lines": total,
+            "offset": start, "size": st.st_size, "truncated": truncated,
+        }
+
+
+line_index_cache = LineIndexCache()
@@ -0,0 +1,143 @@
+# Parser baris konsol/log Minecraft menjadi record terstruktur.
+# Format yang dikenali:
+#   [12:00:01] [Server thread/INFO]: Steve joined the game                 (vanilla)
+#   [12:00:01 INFO]: [Essentials] Loaded 1 kits                              (Paper/Spigot)
+#   [05Jan2024 12:00:01.123] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: ...  (Forge)
+# Baris tanpa prefiks (stack trace, output multi-baris) menjadi lanjutan record
+# sebelumnya: waktu, thread, dan level-nya diwarisi.
+# Log hanya mencatat jam, jadi tanggal diambil dari konteks (waktu baris diterima, atau
+# nama file log arsip) dan bertambah satu hari saat jam mundur melewati tengah malam.
+
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+EVENTS = ("join", "leave", "chat", "death", "lag")
+
+VANILLA_PATTERN = re.compile(
+    r"^\[(?:\d{2}[A-Za-z]{3}\d{4} )?(\d{2}):(\d{2}):(\d{2})(?:\.(\d{3}))?\] "
+    r"\[([^\]]*)/([A-Z]+)\](?: \[([^\]]*?)/?\])?: ?(.*)$"
+)
+PAPER_PATTERN = re.compile(r"^\[(\d{2}):(\d{2}):(\d{2}) ([A-Z]+)\]: ?(.*)$")
+PLUGIN_PREFIX_PATTERN = re.compile(r"^\[([A-Za-z0-9_.\- ]{1,48})\] ")
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+PLAYER_NAME = r"[A-Za-z0-9_.]{2,16}"
+JOIN_PATTERN = re.compile(rf"^({PLAYER_NAME}) joined the game$")
+LEAVE_PATTERN = re.compile(rf"^({PLAYER_NAME}) left the game$")
+CHAT_PATTERN = re.compile(rf"^(?:\[Not Secure\] )?<({PLAYER_NAME})> ")
+LAG_PATTERN = re.compile(r"^Can't keep up! .*?Running (\d+)ms or (\d+) ticks behind")
+# Pesan kematian vanilla diawali nama pemain lalu salah satu frasa berikut
+DEATH_PATTERN = re.compile(
+    rf"^({PLAYER_NAME}) (?:"
+    r"was (?:slain|shot|killed|blown up|fireballed|pummeled|impaled|skewered|squashed|squished|"
+    r"stung to death|pricked to death|poked to death|struck by lightning|roasted|burnt to a crisp|"
+    r"obliterated|doomed to fall|frozen to death|knocked into the void|smashed)|"
+    r"died|drowned|starved to death|suffocated in a wall|blew up|burned to death|went up in flames|"
+    r"walked into (?:fire|a cactus|danger zone)|tried to swim in lava|hit the ground too hard|"
+    r"fell (?:from|off|out of|into|while)|experienced kinetic energy|withered away|froze to death|"
+    r"discovered the floor was lava|didn't want to live|left the confines of this world|"
+    r"went off with a bang|was killed by)"
+)
+
+MIDNIGHT_SLACK_SECONDS = 3600  # Jam mundur lebih dari ini berarti tanggal berganti
+
+
+class LogLineParser:
+    """Parser berkeadaan untuk satu aliran log (satu server atau satu file arsip)."""
+
+    def __init__(self, day: Optional[date] = None):
+        self.day = day
+        self._last_seconds: Optional[int] = None
+        self.last: Optional[dict] = None
+
+    def _timestamp(self, hours: str, minutes: str, seconds: str, millis: Optional[str], received_at: float) -> float:
+        seconds_of_day = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        if self.day is None:
+            # Aliran langsung: tanggal dari waktu baris diterima; jam di depan "sekarang" berarti kemarin
+            received = datetime.fromtimestamp(received_at)
+            day = received.date()
+            received_seconds = received.hour * 3600 + received.minute * 60 + received.second
+            if seconds_of_day - received_seconds > MIDNIGHT_SLACK_SECONDS:
+                day -= timedelta(days=1)
+        else:
+            if self._last_seconds is not None and self._last_seconds - seconds_of_day > MIDNIGHT_SLACK_SECONDS:
+                self.day += timedelta(days=1)
+            day = self.day
+        self._last_seconds = seconds_of_day
+        stamp = time.mktime((day.year, day.month, day.day, 0, 0, 0, 0, 0, -1)) + seconds_of_day
+        return stamp + (int(millis) / 1000 if millis else 0)
+
+    def parse(self, raw: str, received_at: Optional[float] = None) -> Optional[dict]:
+        """Record untuk satu baris, atau None untuk baris kosong."""
+        line = ANSI_PATTERN.sub("", raw).rstrip("\r\n")
+        if not line.strip():
+            return None
+        received_at = time.time() if received_at is None else received_at
+
+        match = VANILLA_PATTERN.match(line)
+        if match:
+            hours, minutes, seconds, millis, thread, level, source, message = match.groups()
+        else:
+            match = PAPER_PATTERN.match(line)
+            if match:
+                hours, minutes, seconds, level, message = match.groups()
+                millis = thread = source = None
+            else:
+                # Lanjutan record sebelumnya
+                previous = self.last
+                return {
+                    "ts": previous["ts"] if previous else received_at,
+                    "thread": previous["thread"] if previous else None,
+                    "level": previous["level"] if previous else None,
+                    "source": previous["source"] if previous else None,
+                    "player": None, "event": None, "lag_ms": None, "message": line,
+                }
+
+        if source is None:
+            plugin = PLUGIN_PREFIX_PATTERN.match(message)
+            if plugin and not CHAT_PATTERN.match(message):
+                source = plugin.group(1)
+        record = {
+            "ts": self._timestamp(hours, minutes, seconds, millis, received_at),
+            "thread": thread, "level": level, "source": source,
+            "player": None, "event": None, "lag_ms": None, "message": message,
+        }
+        classify(record)
+        self.last = record
+        return record
+
+
+def classify(record: dict):
+    """Isi player/event/lag_ms dari isi pesan."""
+    message = record["message"]
+    match = CHAT_PATTERN.match(message)
+    if match:
+        record["player"], record["event"] = match.group(1), "chat"
+        return
+    match = JOIN_PATTERN.match(message)
+    if match:
+        record["player"], record["event"] = match.group(1), "join"
+        return
+    match = LEAVE_PATTERN.match(message)
+    if match:
+        record["player"], record["event"] = match.group(1), "leave"
+        return
+    if record["level"] == "WARN":
+        match = LAG_PATTERN.match(message)
+        if match:
+            record["event"], record["lag_ms"] = "lag", int(match.group(1))
+            return
+    if record["level"] == "INFO" and record["source"] is None:
+        match = DEATH_PATTERN.match(message)
+        if match:
+            record["player"], record["event"] = match.group(1), "death"
+
+
+def archive_date(name: str) -> Optional[date]:
+    """Tanggal dari nama log arsip Minecraft: YYYY-MM-DD-N.log.gz."""
+    try:
+        return datetime.strptime(name[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
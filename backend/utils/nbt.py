@@ -0,0 +1,111 @@
+# Pembaca NBT minimal (format biner data Minecraft, big-endian, tanpa kompresi).
+# Hanya membaca tag tingkat atas suatu compound dan melompati payload lain tanpa
+# membangun objek, karena pemangkasan dunia cukup butuh beberapa field per chunk.
+
+import struct
+from typing import Dict, Iterable, Optional
+
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+_FIXED_SIZES = {TAG_BYTE: 1, TAG_SHORT: 2, TAG_INT: 4, TAG_LONG: 8, TAG_FLOAT: 4, TAG_DOUBLE: 8}
+_ARRAY_ITEM_SIZES = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_LONG_ARRAY: 8}
+_SCALAR_FORMATS = {TAG_BYTE: ">b", TAG_SHORT: ">h", TAG_INT: ">i", TAG_LONG: ">q", TAG_FLOAT: ">f", TAG_DOUBLE: ">d"}
+
+_INT = struct.Struct(">i")
+_USHORT = struct.Struct(">H")
+
+
+class NBTError(ValueError):
+    pass
+
+
+def _skip(data, pos: int, tag: int) -> int:
+    """Posisi sesudah payload tag di pos."""
+    size = _FIXED_SIZES.get(tag)
+    if size is not None:
+        return pos + size
+    if tag in _ARRAY_ITEM_SIZES:
+        (count,) = _INT.unpack_from(data, pos)
+        return pos + 4 + count * _ARRAY_ITEM_SIZES[tag]
+    if tag == TAG_STRING:
+        (length,) = _USHORT.unpack_from(data, pos)
+        return pos + 2 + length
+    if tag == TAG_LIST:
+        item_tag = data[pos]
+        (count,) = _INT.unpack_from(data, pos + 1)
+        pos += 5
+        if count <= 0:
+            return pos
+        size = _FIXED_SIZES.get(item_tag)
+        if size is not None:
+            return pos + count * size
+        for _ in range(count):
+            pos = _skip(data, pos, item_tag)
+        return pos
+    if tag == TAG_COMPOUND:
+        while True:
+            child = data[pos]
+            if child == TAG_END:
+                return pos + 1
+            (name_length,) = _USHORT.unpack_from(data, pos + 1)
+            pos = _skip(data, pos + 3 + name_length, child)
+    raise NBTError(f"Jenis tag NBT tidak dikenal: {tag}")
+
+
+def read_fields(data, names: Iterable[str], pos: int = 0) -> Dict[str, object]:
+    """
+    Nilai tag skalar/string bernama di tingkat atas compound akar (atau compound yang
+    dimulai di pos). Compound anak yang namanya diminta dikembalikan sebagai posisi
+    payload-nya agar bisa dibaca lagi dengan read_fields(data, ..., posisi).
+    """
+    wanted = set(names)
+    found: Dict[str, object] = {}
+    try:
+        if pos == 0:
+            # Compound akar: tag, nama (biasanya kosong), lalu payload
+            if data[0] != TAG_COMPOUND:
+                raise NBTError("Data NBT tidak diawali compound.")
+            (name_length,) = _USHORT.unpack_from(data, 1)
+            pos = 3 + name_length
+        while len(found) < len(wanted):
+            tag = data[pos]
+            if tag == TAG_END:
+                break
+            (name_length,) = _USHORT.unpack_from(data, pos + 1)
+            name = bytes(data[pos + 3:pos + 3 + name_length]).decode("utf-8", "replace")
+            pos += 3 + name_length
+            if name in wanted:
+                if tag in _SCALAR_FORMATS:
+                    (found[name],) = struct.unpack_from(_SCALAR_FORMATS[tag], data, pos)
+                elif tag == TAG_STRING:
+                    (length,) = _USHORT.unpack_from(data, pos)
+                    found[name] = bytes(data[pos + 2:pos + 2 + length]).decode("utf-8", "replace")
+                elif tag == TAG_COMPOUND:
+                    found[name] = pos
+            pos = _skip(data, pos, tag)
+    except (IndexError, struct.error) as e:
+        raise NBTError(f"Data NBT terpotong: {e}") from e
+    return found
+
+
+def inhabited_time(data) -> Optional[int]:
+    """InhabitedTime chunk dalam tick (di akar sejak 1.18, di compound Level sebelumnya)."""
+    fields = read_fields(data, ("InhabitedTime", "Level"))
+    if "InhabitedTime" in fields:
+        return int(fields["InhabitedTime"])
+    if "Level" in fields:
+        value = read_fields(data, ("InhabitedTime",), fields["Level"]).get("InhabitedTime")
+        return int(value) if value is not None else None
+    return None
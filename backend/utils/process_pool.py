@@ -0,0 +1,68 @@
+# Process pool bersama untuk pekerjaan dunia yang berat di CPU (backup, analisis region,
+# pemangkasan). Satu pool untuk semua agar jumlah proses tidak berlipat ganda saat
+# beberapa job berjalan bersamaan.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Optional
+
+WORLD_WORKERS = max(1, min(4, os.cpu_count() or 1))
+MAX_PENDING_TASKS = WORLD_WORKERS * 4   # Batas tugas yang sedang diproses agar memori tetap kecil
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn: aman dipakai dari aplikasi yang punya banyak thread (fork bisa mewarisi lock terkunci)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=WORLD_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def discard_pool():
+    # Pool yang worker-nya mati mendadak tidak bisa dipakai lagi; buat baru di job berikutnya
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def run_pooled(tasks: Iterable[tuple], on_done: Callable, cancelled: Optional[threading.Event] = None):
+    """
+    Jalankan (fungsi, argumen, konteks) di process pool dengan jumlah tugas berjalan terbatas.
+    on_done(konteks, hasil) dipanggil di thread pemanggil begitu setiap tugas selesai.
+    """
+    pool = get_pool()
+    pending = {}
+    tasks = iter(tasks)
+    exhausted = False
+    while pending or not exhausted:
+        while not exhausted and len(pending) < MAX_PENDING_TASKS:
+            if cancelled is not None and cancelled.is_set():
+                exhausted = True
+                break
+            task = next(tasks, None)
+            if task is None:
+                exhausted = True
+                break
+            func, args, context = task
+            pending[pool.submit(func, *args)] = context
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                discard_pool()
+                raise
+            on_done(pending.pop(future), result)
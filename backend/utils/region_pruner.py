@@ -0,0 +1,201 @@
+# Fungsi worker untuk pemangkasan dunia (berjalan di process pool, jadi hanya memakai stdlib).
+# Satu tugas menangani satu posisi region di satu dimensi: file terrain (region/) plus
+# pasangannya di entities/ dan poi/. Chunk yang dibuang ditentukan dari file terrain
+# (InhabitedTime) dan dari koordinatnya (di luar radius/poligon yang dipertahankan), lalu
+# ketiga file ditulis ulang rapat: chunk yang tersisa disusun berurutan tanpa sektor kosong.
+#
+# Aturan (dict):
+# - min_inhabited_ticks : buang chunk yang InhabitedTime-nya di bawah nilai ini
+# - center_x, center_z, radius : area lingkaran (koordinat blok) yang dipertahankan
+# - polygon : daftar titik [x, z] (koordinat blok) area yang dipertahankan
+# Jika radius dan poligon sama-sama diisi, area yang dipertahankan adalah gabungan keduanya.
+# Chunk yang tidak bisa dibaca (LZ4, rusak) tidak pernah dibuang karena aturan InhabitedTime.
+
+import mmap
+import os
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from backend.utils.anvil import (
+    CHUNK_HEADER_SIZE, HEADER_SIZE, SECTOR_SIZE, decompress_chunk, external_chunk_path,
+    read_locations, read_timestamps,
+)
+from backend.utils.nbt import NBTError, inhabited_time
+
+
+def _point_in_polygon(x: float, z: float, polygon: List[Tuple[float, float]]) -> bool:
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, zi = polygon[i]
+        xj, zj = polygon[j]
+        if (zi > z) != (zj > z) and x < (xj - xi) * (z - zi) / (zj - zi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def in_keep_area(rules: dict, chunk_x: int, chunk_z: int) -> bool:
+    """True jika chunk (sebagian saja cukup) berada di area yang dipertahankan, atau tidak ada aturan area."""
+    radius = rules.get("radius")
+    polygon = rules.get("polygon")
+    if radius is None and not polygon:
+        return True
+    x0, z0 = chunk_x * 16, chunk_z * 16
+    if radius is not None:
+        cx, cz = rules.get("center_x", 0), rules.get("center_z", 0)
+        # Jarak dari pusat ke titik terdekat di dalam chunk
+        dx = max(x0 - cx, 0, cx - (x0 + 15))
+        dz = max(z0 - cz, 0, cz - (z0 + 15))
+        if dx * dx + dz * dz <= radius * radius:
+            return True
+    if polygon:
+        points = ((x0 + 8, z0 + 8), (x0, z0), (x0 + 16, z0), (x0, z0 + 16), (x0 + 16, z0 + 16))
+        if any(_point_in_polygon(x, z, polygon) for x, z in points):
+            return True
+        # Poligon yang lebih kecil dari satu chunk
+        if any(x0 <= x <= x0 + 16 and z0 <= z <= z0 + 16 for x, z in polygon):
+            return True
+    return False
+
+
+def _read_layout(data, size: int) -> Optional[List[Tuple[int, int, int, int]]]:
+    """(indeks, offset, panjang data, jumlah sektor) setiap chunk; None jika tabel lokasi rusak."""
+    if size < HEADER_SIZE:
+        return None
+    total_sectors = (size + SECTOR_SIZE - 1) // SECTOR_SIZE
+    used = bytearray(total_sectors)
+    layout = []
+    for index, offset, count in read_locations(data[:HEADER_SIZE]):
+        sector = offset // SECTOR_SIZE
+        if sector < 2 or sector + count > total_sectors or offset + CHUNK_HEADER_SIZE > size:
+            return None
+        if any(used[sector:sector + count]):
+            return None
+        used[sector:sector + count] = b"\x01" * count
+        length = int.from_bytes(data[offset:offset + 4], "big") + 4
+        layout.append((index, offset, min(length, count * SECTOR_SIZE, size - offset), count))
+    return layout
+
+
+def _chunk_inhabited(data, offset: int, length: int, region_dir: str, chunk_x: int, chunk_z: int) -> Optional[int]:
+    compression = data[offset + 4]
+    try:
+        if compression & 0x80:
+            with open(external_chunk_path(region_dir, chunk_x, chunk_z), "rb") as f:
+                payload = f.read()
+        else:
+            payload = data[offset + CHUNK_HEADER_SIZE:offset + length]
+        nbt = decompress_chunk(compression & 0x7F, payload)
+        return inhabited_time(nbt) if nbt is not None else None
+    except (OSError, zlib.error, NBTError):
+        return None
+
+
+def _compact(path: str, data, layout, removed: Set[int], timestamps) -> int:
+    """Tulis ulang region dengan chunk yang tersisa secara berurutan. Mengembalikan ukuran baru."""
+    header = bytearray(HEADER_SIZE)
+    tmp_path = f"{path}.prune-tmp"
+    try:
+        with open(tmp_path, "wb") as out:
+            out.write(header)
+            sector = 2
+            for index, offset, length, _ in sorted(layout, key=lambda item: item[1]):
+                if index in removed:
+                    continue
+                count = (length + SECTOR_SIZE - 1) // SECTOR_SIZE
+                out.write(data[offset:offset + length])
+                out.write(b"\0" * (count * SECTOR_SIZE - length))
+                header[index * 4:index * 4 + 4] = (sector << 8 | count).to_bytes(4, "big")
+                header[SECTOR_SIZE + index * 4:SECTOR_SIZE + index * 4 + 4] = timestamps[index].to_bytes(4, "big")
+                sector += count
+            out.seek(0)
+            out.write(header)
+            out.flush()
+            os.fsync(out.fileno())
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return sector * SECTOR_SIZE
+
+
+def prune_region_group(files: Dict[str, str], region_x: int, region_z: int, rules: dict,
+                       dry_run: bool, compact: bool = True) -> dict:
+    """
+    files: jenis ("region", "entities", "poi") -> path file region di posisi yang sama.
+    Mengembalikan ringkasan; pada dry run tidak ada file yang diubah.
+    """
+    result = {
+        "files": 0, "rewritten": 0, "deleted": 0, "chunks_removed": 0, "chunks_kept": 0,
+        "unreadable_chunks": 0, "bytes_before": 0, "bytes_after": 0, "skipped": [],
+    }
+    min_inhabited = rules.get("min_inhabited_ticks")
+    unvisited: Set[int] = set()   # Indeks chunk terrain dengan InhabitedTime terlalu rendah
+    ordered = sorted(files.items(), key=lambda item: item[0] != "region")  # Terrain lebih dulu
+
+    for kind, path in ordered:
+        region_dir = os.path.dirname(path)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            result["files"] += 1
+            result["bytes_before"] += size
+            if size == 0:
+                result["bytes_after"] += size
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                layout = _read_layout(data, size)
+                if layout is None:
+                    # Jangan menyentuh file yang tabel lokasinya tidak konsisten
+                    result["skipped"].append((path, "tabel lokasi chunk rusak"))
+                    result["bytes_after"] += size
+                    continue
+                removed = set()
+                external_removed = []
+                for index, offset, length, _ in layout:
+                    chunk_x, chunk_z = region_x * 32 + index % 32, region_z * 32 + index // 32
+                    drop = not in_keep_area(rules, chunk_x, chunk_z)
+                    if not drop and min_inhabited is not None:
+                        if kind == "region":
+                            ticks = _chunk_inhabited(data, offset, length, region_dir, chunk_x, chunk_z)
+                            if ticks is None:
+                                result["unreadable_chunks"] += 1
+                            elif ticks < min_inhabited:
+                                unvisited.add(index)
+                        drop = index in unvisited
+                    if drop:
+                        removed.add(index)
+                        if data[offset + 4] & 0x80:
+                            external_removed.append(external_chunk_path(region_dir, chunk_x, chunk_z))
+
+                kept = len(layout) - len(removed)
+                needed = HEADER_SIZE + sum((length + SECTOR_SIZE - 1) // SECTOR_SIZE * SECTOR_SIZE
+                                           for index, _, length, _ in layout if index not in removed)
+                external_bytes = sum(os.path.getsize(p) for p in external_removed if os.path.exists(p))
+                result["chunks_removed"] += len(removed)
+                result["chunks_kept"] += kept
+                result["bytes_before"] += external_bytes
+
+                if kept == 0:
+                    new_size = 0
+                    result["deleted"] += 1
+                elif removed or (compact and needed < size):
+                    new_size = needed
+                    result["rewritten"] += 1
+                else:
+                    new_size = size
+                result["bytes_after"] += new_size
+
+                if dry_run or new_size == size:
+                    continue
+                if kept:
+                    _compact(path, data, layout, removed, read_timestamps(data[:HEADER_SIZE]))
+        if kept == 0:
+            # Minecraft membuat ulang region yang hilang saat area itu dikunjungi lagi
+            os.remove(path)
+        for external in external_removed:
+            if os.path.exists(external):
+                os.remove(external)
+    return result
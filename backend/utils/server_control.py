@@ -1 +1,515 @@
-# Placeholder file for future server control utils
+# Mesin siklus hidup server (lifecycle) berbasis asyncio.
+# Start/stop dijalankan sebagai task di event loop utama sehingga handler HTTP
+# langsung kembali dengan operation id, dan progresnya bisa dipantau lewat
+# endpoint status maupun WebSocket.
+
+import asyncio
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from backend import repositories
+from backend.jar_store import jar_store
+from backend.log_pipeline import log_pipeline
+from backend.server_watcher import activity
+from backend.shared_state import server_processes
+
+JAVA_ARGS = ["java", "-Xmx1024M", "-Xms1024M", "-jar"]
+STOP_TIMEOUT_SECONDS = 30
+INIT_TIMEOUT_SECONDS = 120    # Batas inisialisasi file pertama kali
+INIT_POLL_INTERVAL = 0.2      # Interval pengecekan file hasil inisialisasi
+READY_TIMEOUT_SECONDS = 600   # Batas menunggu penanda "Done" saat start
+INIT_EXPECTED_FILES = ("server.properties",)
+MAX_LINE_BYTES = 1024 * 1024
+MAX_OPERATIONS = 500  # Riwayat operasi yang disimpan di memori
+
+
+class ServerState(str, Enum):
+    CREATING = "creating"
+    DOWNLOADING = "downloading"
+    INITIALIZING = "initializing"
+    STARTING = "starting"
+    RUNNING = "running"
+    STOPPING = "stopping"
+    STOPPED = "stopped"
+    CRASHED = "crashed"
+
+
+class ServerProcess:
+    """
+    Pembungkus asyncio.subprocess.Process dengan antarmuka mirip Popen (poll, pid)
+    agar kode yang berjalan di thread lain (command, watcher) tetap bisa memakainya.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process, loop: asyncio.AbstractEventLoop):
+        self._process = process
+        self._loop = loop
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def poll(self) -> Optional[int]:
+        return self._process.returncode
+
+    def _write(self, data: bytes):
+        if self._process.stdin is not None and not self._process.stdin.is_closing():
+            self._process.stdin.write(data)
+
+    def send_command(self, command: str):
+        """Kirim satu baris perintah ke stdin server. Aman dipanggil dari thread mana pun."""
+        if self.poll() is not None:
+            raise RuntimeError("Proses server sudah berhenti.")
+        data = (command.rstrip("\n") + "\n").encode("utf-8")
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._write(data)
+        else:
+            self._loop.call_soon_threadsafe(self._write, data)
+
+    async def wait(self) -> int:
+        return await self._process.wait()
+
+    def kill(self):
+        if self.poll() is None:
+            self._process.kill()
+
+
+# Penanda di konsol Minecraft, contoh:
+#   [12:00:01] [Server thread/INFO]: Preparing spawn area: 42%
+#   [12:00:05] [Server thread/INFO]: Done (4.213s)! For help, type "help"
+DONE_PATTERN = re.compile(r"Done \((\d+(?:[.,]\d+)?)s\)!")
+SPAWN_PROGRESS_PATTERN = re.compile(r"Preparing (?:spawn area|start region)[^:]*: (\d+)%")
+
+
+class ReadinessDetector:
+    """Memantau baris konsol sampai server melaporkan siap menerima pemain."""
+
+    def __init__(self, on_progress: Optional[Callable[[int], None]] = None):
+        self.ready = asyncio.Event()
+        self.ready_at: Optional[float] = None
+        self.reported_seconds: Optional[float] = None
+        self.progress: Optional[int] = None
+        self._on_progress = on_progress
+
+    def feed(self, line: str):
+        if self.ready.is_set():
+            return
+        if "Done (" in line:
+            match = DONE_PATTERN.search(line)
+            if match:
+                self.reported_seconds = float(match.group(1).replace(",", "."))
+                self.ready_at = time.time()
+                self.ready.set()
+                return
+        if "Preparing" in line:
+            match = SPAWN_PROGRESS_PATTERN.search(line)
+            if match:
+                percent = int(match.group(1))
+                if percent != self.progress:
+                    self.progress = percent
+                    if self._on_progress is not None:
+                        self._on_progress(percent)
+
+    async def wait(self, process: asyncio.subprocess.Process, timeout: float) -> bool:
+        """Tunggu sampai siap. False jika proses keluar lebih dulu atau timeout."""
+        ready_task = asyncio.ensure_future(self.ready.wait())
+        exit_task = asyncio.ensure_future(process.wait())
+        try:
+            await asyncio.wait({ready_task, exit_task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ready_task.cancel()
+            exit_task.cancel()
+        return self.ready.is_set()
+
+
+class Operation:
+    def __init__(self, server_id: int, action: str):
+        self.id = uuid.uuid4().hex
+        self.server_id = server_id
+        self.action = action
+        self.status = "pending"  # pending, running, succeeded, failed, cancelled
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.history: List[dict] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "server_id": self.server_id,
+            "action": self.action,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "history": list(self.history),
+        }
+
+
+async def stream_process_output(
+    server_id: int,
+    process: asyncio.subprocess.Process,
+    on_line: Optional[Callable[[str], None]] = None,
+):
+    """Membaca stdout proses server baris per baris dan memasukkannya ke pipeline log."""
+    try:
+        while True:
+            try:
+                raw = await process.stdout.readline()
+            except ValueError:
+                # Baris melebihi MAX_LINE_BYTES dan sudah dibuang oleh StreamReader
+                continue
+            if not raw:
+                break
+            line = raw.decode("utf-8", errors="replace")
+            if on_line is not None:
+                on_line(line)
+            log_pipeline.push(server_id, line)
+    except Exception as e:
+        print(f"Error saat membaca output server_id {server_id}: {e}")
+    finally:
+        print(f"Log streamer untuk server_id: {server_id} telah berhenti.")
+
+
+async def download_server_jar(version: str, path: str) -> str:
+    """
+    Pastikan direktori server punya server-{version}.jar. File diambil dari
+    penyimpanan JAR bersama (diunduh sekali per versi) lalu ditautkan ke sini.
+    """
+    jar_name = f"server-{version}.jar"
+    jar_path = os.path.join(path, jar_name)
+    if os.path.exists(jar_path): return jar_name
+    try:
+        store_path = await jar_store.ensure(version)
+        # Bisa berupa salinan penuh (~50 MB) jika filesystem tidak mendukung hardlink
+        await asyncio.to_thread(jar_store.link_into, store_path, jar_path)
+        return jar_name
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gagal mengunduh server jar: {str(e)}")
+
+
+def _accept_eula(server_path: str):
+    eula_path = os.path.join(server_path, "eula.txt")
+    if not os.path.exists(eula_path):
+        with open(eula_path, "w") as f: f.write("eula=true\n")
+
+
+def _init_files_present(server_path: str) -> bool:
+    for name in INIT_EXPECTED_FILES:
+        file_path = os.path.join(server_path, name)
+        if not os.path.isfile(file_path) or os.path.getsize(file_path) == 0:
+            return False
+    return True
+
+
+async def _drain_output(process: asyncio.subprocess.Process, detector: ReadinessDetector):
+    while True:
+        try:
+            raw = await process.stdout.readline()
+        except ValueError:
+            continue
+        if not raw:
+            break
+        detector.feed(raw.decode("utf-8", errors="replace"))
+
+
+async def initialize_server_files(server_path: str, jar_name: str) -> Optional[float]:
+    """
+    Jalankan server sekali untuk menghasilkan file default, lalu hentikan begitu
+    file yang diharapkan muncul (atau server melaporkan siap). Mengembalikan lama
+    inisialisasi dalam detik, atau None jika tidak diperlukan.
+    """
+    if _init_files_present(server_path): return None
+    started = time.monotonic()
+    try:
+        init_process = await asyncio.create_subprocess_exec(
+            *JAVA_ARGS, jar_name, "nogui", cwd=server_path,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            stdin=asyncio.subprocess.PIPE, limit=MAX_LINE_BYTES,
+        )
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        print(f"Peringatan: Gagal saat inisialisasi file server: {e}")
+        return None
+
+    detector = ReadinessDetector()
+    reader = asyncio.ensure_future(_drain_output(init_process, detector))
+    try:
+        deadline = started + INIT_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if _init_files_present(server_path) or detector.ready.is_set() or init_process.returncode is not None:
+                break
+            await asyncio.sleep(INIT_POLL_INTERVAL)
+        else:
+            print(f"Peringatan: Inisialisasi file server di {server_path} melebihi {INIT_TIMEOUT_SECONDS} detik.")
+    finally:
+        if init_process.returncode is None:
+            init_process.kill()
+        await init_process.wait()
+        reader.cancel()
+    return time.monotonic() - started
+
+
+def record_startup_time(server_id: int, version: str, started_at: float, ready_at: float,
+                        reported_seconds: Optional[float], init_seconds: Optional[float]):
+    """Simpan durasi boot ke database untuk memantau regresi waktu startup."""
+    try:
+        repositories.startup_times.record(server_id, version, started_at, ready_at, reported_seconds, init_seconds)
+    except Exception as e:
+        print(f"Gagal mencatat waktu startup server_id {server_id}: {e}")
+
+
+def get_startup_times(server_id: int, limit: int = 50) -> dict:
+    return {
+        "recent": repositories.startup_times.recent(server_id, limit),
+        "by_version": repositories.startup_times.by_version(server_id),
+    }
+
+
+class LifecycleManager:
+    def __init__(self):
+        # Key: server_id, Value: {"state", "since", "operation_id"}
+        self.states: Dict[int, dict] = {}
+        self.operations: "OrderedDict[str, Operation]" = OrderedDict()
+        self._active: Dict[int, Operation] = {}
+        self._start_tasks: Dict[str, asyncio.Task] = {}  # operation_id start -> task-nya
+        self._subscribers: Dict[int, List[asyncio.Queue]] = {}
+        self._listeners: List[Callable[[int, dict], None]] = []
+
+    # --- State & event ---
+
+    def get_state(self, server_id: int) -> dict:
+        state = self.states.get(server_id)
+        if state is None:
+            return {"state": ServerState.STOPPED.value, "since": None, "operation_id": None}
+        return dict(state)
+
+    def get_operation(self, operation_id: str) -> Optional[Operation]:
+        return self.operations.get(operation_id)
+
+    def subscribe(self, server_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.setdefault(server_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, server_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(server_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            self._subscribers.pop(server_id, None)
+
+    def add_listener(self, callback: Callable[[int, dict], None]):
+        """Callback dipanggil di event loop untuk setiap event semua server."""
+        self._listeners.append(callback)
+
+    def _publish(self, server_id: int, event: dict):
+        for queue in self._subscribers.get(server_id, []):
+            if queue.full():
+                # Pelanggan yang lambat kehilangan event tertua, bukan menahan lifecycle
+                queue.get_nowait()
+            queue.put_nowait(event)
+        for callback in self._listeners:
+            try:
+                callback(server_id, event)
+            except Exception as e:
+                print(f"Listener lifecycle gagal untuk server {server_id}: {e}")
+
+    def _set_state(self, server_id: int, state: ServerState, op: Optional[Operation] = None, detail: str = "", **extra):
+        now = time.time()
+        self.states[server_id] = {
+            "state": state.value,
+            "since": now,
+            "operation_id": op.id if op else None,
+            **extra,
+        }
+        if op is not None:
+            op.history.append({"state": state.value, "at": now, "detail": detail})
+        self._publish(server_id, {"type": "state", "server_id": server_id, "state": state.value,
+                                  "at": now, "operation_id": op.id if op else None, "detail": detail, **extra})
+
+    def _new_operation(self, server_id: int, action: str) -> Operation:
+        if server_id in self._active:
+            raise HTTPException(status_code=409, detail="Operasi lain sedang berjalan untuk server ini.")
+        op = Operation(server_id, action)
+        self.operations[op.id] = op
+        while len(self.operations) > MAX_OPERATIONS:
+            self.operations.popitem(last=False)
+        self._active[server_id] = op
+        return op
+
+    def _finish(self, op: Operation, error: Optional[str] = None, status: Optional[str] = None):
+        op.status = status or ("failed" if error else "succeeded")
+        op.error = error
+        op.finished_at = time.time()
+        # Start yang dibatalkan selesai setelah operasi stop penggantinya terdaftar
+        if self._active.get(op.server_id) is op:
+            del self._active[op.server_id]
+        self._publish(op.server_id, {"type": "operation", **op.to_dict()})
+
+    # --- Start ---
+
+    def start(self, server_id: int, server_path: str, version: str) -> Operation:
+        """Jadwalkan start server dan langsung kembalikan operasinya. Dipanggil dari event loop."""
+        process = server_processes.get(server_id)
+        if process and process.poll() is None:
+            raise HTTPException(status_code=400, detail="Server ini sudah berjalan.")
+        op = self._new_operation(server_id, "start")
+        task = asyncio.get_running_loop().create_task(self._run_start(op, server_path, version))
+        self._start_tasks[op.id] = task
+        task.add_done_callback(lambda _: self._start_tasks.pop(op.id, None))
+        return op
+
+    async def _run_start(self, op: Operation, server_path: str, version: str):
+        server_id = op.server_id
+        op.status = "running"
+        try:
+            self._set_state(server_id, ServerState.CREATING, op)
+            await asyncio.to_thread(_accept_eula, server_path)
+
+            self._set_state(server_id, ServerState.DOWNLOADING, op, version)
+            jar_to_run = await download_server_jar(version, server_path)
+
+            self._set_state(server_id, ServerState.INITIALIZING, op)
+            init_seconds = await initialize_server_files(server_path, jar_to_run)
+
+            self._set_state(server_id, ServerState.STARTING, op)
+            started_at = time.time()
+            process = await asyncio.create_subprocess_exec(
+                *JAVA_ARGS, jar_to_run, "nogui", cwd=server_path,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.PIPE, limit=MAX_LINE_BYTES,
+            )
+            loop = asyncio.get_running_loop()
+            server_processes[server_id] = ServerProcess(process, loop)
+            detector = ReadinessDetector(
+                on_progress=lambda percent: self._publish(
+                    server_id, {"type": "progress", "server_id": server_id, "spawn_percent": percent}
+                )
+            )
+            def on_line(line: str):
+                detector.feed(line)
+                activity.on_console_line(server_id, line)
+
+            loop.create_task(stream_process_output(server_id, process, on_line=on_line))
+            loop.create_task(self._watch_exit(server_id, process))
+
+            ready = await detector.wait(process, READY_TIMEOUT_SECONDS)
+            if process.returncode is None:
+                # Hitungan idle baru dimulai setelah server bisa menerima pemain
+                idle_minutes = await asyncio.to_thread(repositories.servers.get_idle_timeout, server_id)
+                activity.track(server_id, idle_minutes * 60 if idle_minutes is not None else None)
+
+            if ready:
+                duration = detector.ready_at - started_at
+                self._set_state(server_id, ServerState.RUNNING, op, f"siap dalam {duration:.1f} detik",
+                                ready_at=detector.ready_at, startup_seconds=round(duration, 3))
+                await asyncio.to_thread(record_startup_time, server_id, version, started_at,
+                                        detector.ready_at, detector.reported_seconds, init_seconds)
+                self._finish(op)
+            elif process.returncode is not None:
+                # State akhir (stopped/crashed) sudah ditetapkan oleh _watch_exit
+                self._finish(op, f"Server berhenti sebelum siap (exit code {process.returncode}).")
+            else:
+                self._set_state(server_id, ServerState.RUNNING, op, "penanda siap tidak terdeteksi")
+                self._finish(op)
+        except asyncio.CancelledError:
+            # Digantikan oleh stop: proses yang sudah jalan (jika ada) dihentikan oleh operasi stop
+            process = server_processes.get(server_id)
+            if process is None or process.poll() is not None:
+                self._set_state(server_id, ServerState.STOPPED, op, "start dibatalkan")
+            self._finish(op, "Start dibatalkan oleh permintaan stop.", status="cancelled")
+            raise
+        except FileNotFoundError:
+            self._set_state(server_id, ServerState.STOPPED, op)
+            self._finish(op, "Perintah 'java' tidak ditemukan. Pastikan Java terinstall dan ada di PATH sistem Anda.")
+        except HTTPException as e:
+            self._set_state(server_id, ServerState.STOPPED, op)
+            self._finish(op, str(e.detail))
+        except Exception as e:
+            self._set_state(server_id, ServerState.STOPPED, op)
+            self._finish(op, f"Gagal memulai server: {str(e)}")
+
+    async def _watch_exit(self, server_id: int, process: asyncio.subprocess.Process):
+        returncode = await process.wait()
+        current = server_processes.get(server_id)
+        if current is not None and current._process is process:
+            server_processes.pop(server_id, None)
+            activity.forget(server_id)
+        state = self.states.get(server_id, {}).get("state")
+        if state == ServerState.STOPPING.value:
+            return  # _run_stop yang menetapkan state akhir
+        # Keluar dengan kode 0 berarti dihentikan dengan rapi (misal lewat perintah /stop)
+        final = ServerState.STOPPED if returncode == 0 else ServerState.CRASHED
+        self._set_state(server_id, final, detail=f"exit code {returncode}")
+
+    # --- Stop ---
+
+    def stop(self, server_id: int) -> Operation:
+        """Stop juga menggantikan start yang belum selesai: start dibatalkan, lalu proses (jika ada) dihentikan."""
+        process = server_processes.get(server_id)
+        active = self._active.get(server_id)
+        start_task = self._start_tasks.get(active.id) if active is not None and active.action == "start" else None
+        if start_task is None and (not process or process.poll() is not None):
+            raise HTTPException(status_code=404, detail="Server ini tidak sedang berjalan.")
+        if start_task is not None:
+            del self._active[server_id]
+            start_task.cancel()
+        op = self._new_operation(server_id, "stop")
+        asyncio.get_running_loop().create_task(self._run_stop(op, start_task))
+        return op
+
+    async def _run_stop(self, op: Operation, start_task: Optional[asyncio.Task] = None):
+        server_id = op.server_id
+        op.status = "running"
+        if start_task is not None:
+            # Tunggu penanganan pembatalan start selesai (termasuk mematikan proses inisialisasi)
+            await asyncio.wait({start_task})
+        process = server_processes.get(server_id)
+        if process is None or process.poll() is not None:
+            # Start dibatalkan sebelum proses server dijalankan
+            if self.get_state(server_id)["state"] != ServerState.STOPPED.value:
+                self._set_state(server_id, ServerState.STOPPED, op)
+            self._finish(op)
+            return
+        self._set_state(server_id, ServerState.STOPPING, op)
+        try:
+            process.send_command("stop")
+            try:
+                await asyncio.wait_for(process.wait(), timeout=STOP_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                self._set_state(server_id, ServerState.STOPPED, op, "dipaksa berhenti setelah timeout")
+            else:
+                self._set_state(server_id, ServerState.STOPPED, op)
+            self._finish(op)
+        except Exception as e:
+            process.kill()
+            self._set_state(server_id, ServerState.STOPPED, op, str(e))
+            self._finish(op, f"Gagal menghentikan server: {str(e)}")
+        finally:
+            server_processes.pop(server_id, None)
+            activity.forget(server_id)
+
+    def forget(self, server_id: int):
+        """Hapus state server (misal, saat server dihapus)."""
+        self.states.pop(server_id, None)
+
+
+lifecycle = LifecycleManager()
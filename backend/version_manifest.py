@@ -0,0 +1,229 @@
+# Cache manifest versi Minecraft dari Mojang.
+# Satu layanan dipakai bersama oleh daftar versi (/server/versions) dan
+# penyimpanan JAR. Manifest disimpan di memori dengan TTL, divalidasi ulang
+# memakai ETag/If-Modified-Since, dikembalikan dalam keadaan basi sambil
+# diperbarui di latar belakang, dan disalin ke disk agar panel tetap bisa
+# menampilkan serta menjalankan versi yang sudah dikenal saat Mojang tidak bisa dihubungi.
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from backend.utils.file_manager import atomic_write_text
+
+MOJANG_VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
+MANIFEST_CACHE_DIR = "manifest_cache"
+MANIFEST_TTL_SECONDS = 300        # Manifest dianggap segar selama 5 menit
+MANIFEST_MAX_STALE_SECONDS = 86400  # Setelah ini, manifest basi tidak lagi dipakai tanpa revalidasi
+REQUEST_TIMEOUT_SECONDS = 10.0
+
+
+class ManifestUnavailable(Exception):
+    """Manifest tidak bisa diambil dari Mojang dan tidak ada salinan cache."""
+
+
+class ManifestCache:
+    def __init__(
+        self,
+        manifest_url: str = MOJANG_VERSION_MANIFEST_URL,
+        cache_dir: str = MANIFEST_CACHE_DIR,
+        ttl: float = MANIFEST_TTL_SECONDS,
+        max_stale: float = MANIFEST_MAX_STALE_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.manifest_url = manifest_url
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self._manifest: Optional[dict] = None
+        self._index: Dict[str, dict] = {}
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._fetched_at = 0.0
+        self._source: Optional[str] = None  # "network", "revalidated", atau "disk"
+        self._last_error: Optional[str] = None
+        self._loaded_from_disk = False
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._details: Dict[str, dict] = {}
+
+    # --- HTTP client bersama ---
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(transport=self._transport, timeout=REQUEST_TIMEOUT_SECONDS)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # --- Penyimpanan disk ---
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, "version_manifest.json")
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.cache_dir, "version_manifest.meta.json")
+
+    def _detail_path(self, version_id: str) -> str:
+        return os.path.join(self.cache_dir, "versions", f"{version_id}.json")
+
+    def _load_from_disk(self):
+        self._loaded_from_disk = True
+        try:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self._apply(manifest)
+        self._etag = meta.get("etag")
+        self._last_modified = meta.get("last_modified")
+        self._fetched_at = meta.get("fetched_at", 0.0)
+        self._source = "disk"
+
+    def _save_to_disk(self, manifest: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        atomic_write_text(self._manifest_path(), json.dumps(manifest))
+        self._save_meta()
+
+    def _save_meta(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        atomic_write_text(self._meta_path(), json.dumps({
+            "etag": self._etag,
+            "last_modified": self._last_modified,
+            "fetched_at": self._fetched_at,
+        }))
+
+    def _apply(self, manifest: dict):
+        self._manifest = manifest
+        self._index = {v["id"]: v for v in manifest.get("versions", [])}
+
+    # --- Manifest ---
+
+    async def _refresh(self):
+        headers = {}
+        if self._manifest is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+        try:
+            response = await self.client.get(self.manifest_url, headers=headers)
+            if response.status_code == 304 and self._manifest is not None:
+                self._fetched_at = time.time()
+                self._source = "revalidated"
+                self._last_error = None
+                await asyncio.to_thread(self._save_meta)
+                return
+            response.raise_for_status()
+            manifest = response.json()
+        except Exception as e:
+            self._last_error = str(e)
+            raise
+        self._apply(manifest)
+        self._etag = response.headers.get("etag")
+        self._last_modified = response.headers.get("last-modified")
+        self._fetched_at = time.time()
+        self._source = "network"
+        self._last_error = None
+        await asyncio.to_thread(self._save_to_disk, manifest)
+
+    def _start_refresh(self) -> asyncio.Task:
+        # Satu refresh saja yang berjalan pada satu waktu
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Gagal memperbarui manifest versi Mojang: {task.exception()}")
+
+    async def get_manifest(self) -> dict:
+        if not self._loaded_from_disk:
+            await asyncio.to_thread(self._load_from_disk)
+
+        age = time.time() - self._fetched_at
+        if self._manifest is not None and age < self.ttl:
+            return self._manifest
+
+        if self._manifest is not None and age < self.max_stale:
+            # Stale-while-revalidate: kembalikan yang ada, perbarui di latar belakang
+            self._start_refresh()
+            return self._manifest
+
+        try:
+            await asyncio.shield(self._start_refresh())
+        except Exception as e:
+            if self._manifest is None:
+                raise ManifestUnavailable(f"Tidak dapat mengambil manifest versi dari Mojang: {e}")
+            # Mojang tidak bisa dihubungi: pakai salinan lama apa adanya
+        return self._manifest
+
+    async def list_versions(self, version_type: Optional[str] = "release") -> List[dict]:
+        manifest = await self.get_manifest()
+        versions = manifest.get("versions", [])
+        if version_type is None:
+            return versions
+        return [v for v in versions if v.get("type") == version_type]
+
+    async def get_version(self, version_id: str) -> Optional[dict]:
+        await self.get_manifest()
+        entry = self._index.get(version_id)
+        if entry is None and self._source != "network":
+            # Versi yang baru dirilis mungkin belum ada di salinan cache
+            try:
+                await asyncio.shield(self._start_refresh())
+            except Exception:
+                pass
+            entry = self._index.get(version_id)
+        return entry
+
+    async def get_version_detail(self, version_id: str) -> dict:
+        """JSON detail versi. URL detail berisi hash isinya, jadi cukup diambil sekali."""
+        detail = self._details.get(version_id)
+        if detail is not None:
+            return detail
+        try:
+            with open(self._detail_path(version_id)) as f:
+                detail = json.load(f)
+        except (FileNotFoundError, ValueError):
+            entry = await self.get_version(version_id)
+            if entry is None:
+                raise ManifestUnavailable(f"Versi {version_id} tidak ditemukan.")
+            try:
+                response = await self.client.get(entry["url"])
+                response.raise_for_status()
+                detail = response.json()
+            except Exception as e:
+                raise ManifestUnavailable(f"Tidak dapat mengambil detail versi {version_id}: {e}")
+            os.makedirs(os.path.dirname(self._detail_path(version_id)), exist_ok=True)
+            await asyncio.to_thread(atomic_write_text, self._detail_path(version_id), json.dumps(detail))
+        self._details[version_id] = detail
+        return detail
+
+    def status(self) -> dict:
+        return {
+            "source": self._source,
+            "fetched_at": self._fetched_at or None,
+            "age_seconds": round(time.time() - self._fetched_at, 1) if self._fetched_at else None,
+            "ttl_seconds": self.ttl,
+            "etag": self._etag,
+            "versions": len(self._index),
+            "last_error": self._last_error,
+        }
+
+
+manifest_cache = ManifestCache()
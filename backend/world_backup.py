@@ -0,0 +1,694 @@
+# Backup dunia inkremental dengan deduplikasi.
+# Setiap server punya store sendiri di backups/<server_id>/:
+#   index.db  : tabel chunks (hash -> lokasi di pack), recipes (daftar potongan sebuah
+#               file), packs, snapshots (manifest gzip: path -> ukuran, mtime, recipe)
+#   packs/    : file pack tempat blob potongan ditambahkan secara berurutan
+# Potongan dialamatkan dengan SHA-256 isinya, jadi chunk region yang tidak berubah hanya
+# tersimpan sekali di semua snapshot. File yang ukuran dan mtime-nya sama dengan snapshot
+# sebelumnya bahkan tidak dibaca. Pemecahan, hashing, dan kompresi berjalan di process pool.
+# Snapshot konsisten: jika server berjalan, dikirim save-off lalu save-all flush, dan
+# penyimpanan otomatis dinyalakan lagi (save-on) setelah semua file dibaca.
+# Referensi dihitung (snapshot -> recipe -> chunk), sehingga menghapus snapshot langsung
+# tahu potongan mana yang mati; pack yang sebagian besar isinya mati ditulis ulang.
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from backend.scrollback import scrollback
+from backend.shared_state import server_processes
+from backend.utils.chunk_store import chunk_file, encode_pieces, restore_file, unchanged_on_disk, unpack_recipe
+from backend.utils.process_pool import run_pooled
+from backend.utils.server_control import lifecycle, ServerState
+
+BACKUP_DIR = "backups"
+PACK_MAX_SIZE = 256 * 1024 * 1024
+COMMIT_EVERY_BYTES = 64 * 1024 * 1024    # fsync pack + commit index setiap sekian byte baru
+REPACK_THRESHOLD = 0.5                   # Tulis ulang pack jika isi hidupnya di bawah 50%
+SAVE_TIMEOUT_SECONDS = 120
+SKIPPED_FILES = {"session.lock"}
+DEFAULT_RETENTION = {"keep_last": 7, "keep_daily": 7, "keep_weekly": 4}
+FINISHED_JOBS_KEPT = 50
+# State ketika proses server sedang disiapkan atau masih hidup
+ACTIVE_STATES = {ServerState.CREATING.value, ServerState.DOWNLOADING.value, ServerState.INITIALIZING.value,
+                 ServerState.STARTING.value, ServerState.RUNNING.value, ServerState.STOPPING.value}
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS chunks (
+        hash BLOB PRIMARY KEY,
+        pack INTEGER NOT NULL,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        raw_length INTEGER NOT NULL,
+        codec INTEGER NOT NULL,
+        refs INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_chunks_pack ON chunks (pack)",
+    """CREATE TABLE IF NOT EXISTS recipes (
+        hash BLOB PRIMARY KEY,
+        data BLOB NOT NULL,
+        refs INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    "CREATE TABLE IF NOT EXISTS packs (id INTEGER PRIMARY KEY, size INTEGER NOT NULL, live_bytes INTEGER NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS snapshots (
+        id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL,
+        consistent INTEGER NOT NULL,
+        stats TEXT NOT NULL,
+        manifest BLOB NOT NULL
+    )""",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+
+class BackupError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def world_dirs(server_path: str) -> List[str]:
+    """Direktori dunia (relatif terhadap server) sesuai level-name di server.properties."""
+    level = "world"
+    try:
+        with open(os.path.join(server_path, "server.properties"), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith("level-name="):
+                    level = line.split("=", 1)[1].strip() or level
+                    break
+    except FileNotFoundError:
+        pass
+    # Server Bukkit/Paper menyimpan Nether dan End di direktori terpisah
+    candidates = (level, f"{level}_nether", f"{level}_the_end")
+    return [name for name in candidates if os.path.isdir(os.path.join(server_path, name))]
+
+
+def _walk_world(server_path: str, world: str):
+    """Hasilkan (path relatif, stat) untuk file dan (path relatif, None) untuk direktori."""
+    stack = [world]
+    while stack:
+        rel_dir = stack.pop()
+        yield rel_dir, None
+        with os.scandir(os.path.join(server_path, rel_dir)) as it:
+            for entry in it:
+                if entry.is_symlink() or entry.name in SKIPPED_FILES or entry.name.endswith(".restore-tmp"):
+                    continue
+                rel = f"{rel_dir}/{entry.name}"
+                if entry.is_dir():
+                    stack.append(rel)
+                elif entry.is_file():
+                    yield rel, entry.stat()
+
+
+class BackupStore:
+    def __init__(self, server_id: int, backup_dir: str = BACKUP_DIR):
+        self.root = os.path.join(backup_dir, str(server_id))
+        self.pack_dir = os.path.join(self.root, "packs")
+        self.db_path = os.path.join(self.root, "index.db")
+        os.makedirs(self.pack_dir, exist_ok=True)
+        self._pack_file = None
+        self._pack_id: Optional[int] = None
+        conn = self.connect()
+        try:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        # WAL: worker di process pool membaca index sambil proses utama menulis
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def pack_path(self, pack_id: int) -> str:
+        return os.path.join(self.pack_dir, f"{pack_id:08d}.pack")
+
+    # --- Menulis potongan ---
+
+    def _writable_pack(self, conn: sqlite3.Connection):
+        if self._pack_file is not None and self._pack_file.tell() < PACK_MAX_SIZE:
+            return self._pack_id, self._pack_file
+        self.close_pack(conn)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'current_pack'").fetchone()
+        pack_id = int(row["value"]) if row else None
+        if pack_id is not None and os.path.exists(self.pack_path(pack_id)) \
+                and os.path.getsize(self.pack_path(pack_id)) < PACK_MAX_SIZE:
+            f = open(self.pack_path(pack_id), "r+b")
+            # Potong sisa tulisan yang tidak pernah di-commit (misal, proses mati di tengah backup)
+            size = conn.execute("SELECT size FROM packs WHERE id = ?", (pack_id,)).fetchone()["size"]
+            f.truncate(size)
+            f.seek(size)
+        else:
+            pack_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM packs").fetchone()[0]
+            conn.execute("INSERT INTO packs (id, size, live_bytes) VALUES (?, 0, 0)", (pack_id,))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_pack', ?)", (str(pack_id),))
+            f = open(self.pack_path(pack_id), "wb")
+        self._pack_id, self._pack_file = pack_id, f
+        return pack_id, f
+
+    def _append(self, conn: sqlite3.Connection, blob: bytes) -> Tuple[int, int]:
+        pack_id, f = self._writable_pack(conn)
+        offset = f.tell()
+        f.write(blob)
+        conn.execute("UPDATE packs SET size = size + ?, live_bytes = live_bytes + ? WHERE id = ?",
+                     (len(blob), len(blob), pack_id))
+        return pack_id, offset
+
+    def sync(self, conn: sqlite3.Connection):
+        """Pastikan isi pack sudah di disk sebelum index yang menunjuk ke sana di-commit."""
+        if self._pack_file is not None:
+            self._pack_file.flush()
+            os.fsync(self._pack_file.fileno())
+        conn.commit()
+
+    def close_pack(self, conn: sqlite3.Connection):
+        if self._pack_file is not None:
+            self.sync(conn)
+            self._pack_file.close()
+            self._pack_file = None
+            self._pack_id = None
+
+    def _store_pieces(self, conn: sqlite3.Connection, new_pieces) -> int:
+        written = 0
+        for digest, codec, raw_length, blob in new_pieces:
+            # Worker lain bisa saja sudah menyimpan potongan yang sama di putaran ini
+            if conn.execute("SELECT 1 FROM chunks WHERE hash = ?", (digest,)).fetchone():
+                continue
+            pack_id, offset = self._append(conn, blob)
+            conn.execute(
+                "INSERT INTO chunks (hash, pack, offset, length, raw_length, codec) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, pack_id, offset, len(blob), raw_length, codec),
+            )
+            written += len(blob)
+        return written
+
+    def add_file(self, conn: sqlite3.Connection, recipe: bytes, new_pieces, path: str,
+                 is_region: bool) -> Tuple[str, int]:
+        """Simpan potongan baru dan recipe file. Mengembalikan (hash recipe hex, byte ditulis)."""
+        written = self._store_pieces(conn, new_pieces)
+        # Worker menilai "sudah tersimpan" dari index read-only miliknya; jangan percaya begitu saja.
+        # Potongan di recipe yang tidak ada di store dibaca dan dikodekan ulang di sini.
+        missing, seen = [], set()
+        for piece in unpack_recipe(recipe):
+            digest = piece[2]
+            if digest in seen:
+                continue
+            seen.add(digest)
+            if not conn.execute("SELECT 1 FROM chunks WHERE hash = ?", (digest,)).fetchone():
+                missing.append(piece)
+        if missing:
+            try:
+                written += self._store_pieces(conn, encode_pieces(path, is_region, missing))
+            except (OSError, ValueError) as e:
+                raise BackupError(500, f"Gagal menyimpan potongan yang hilang: {e}")
+        recipe_hash = hashlib.sha256(recipe).digest()
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO recipes (hash, data) VALUES (?, ?)", (recipe_hash, recipe)
+        ).rowcount
+        if inserted:
+            conn.executemany("UPDATE chunks SET refs = refs + 1 WHERE hash = ?",
+                             [(digest,) for _, _, digest in unpack_recipe(recipe)])
+        return recipe_hash.hex(), written
+
+    def commit_snapshot(self, conn: sqlite3.Connection, snapshot_id: str, created_at: float,
+                        consistent: bool, manifest: dict, stats: dict):
+        conn.executemany("UPDATE recipes SET refs = refs + 1 WHERE hash = ?",
+                         [(bytes.fromhex(entry[3]),) for entry in manifest["files"].values()])
+        conn.execute(
+            "INSERT INTO snapshots (id, created_at, consistent, stats, manifest) VALUES (?, ?, ?, ?, ?)",
+            (snapshot_id, created_at, int(consistent), json.dumps(stats),
+             gzip.compress(json.dumps(manifest).encode("utf-8"), 6)),
+        )
+        self.sync(conn)
+
+    # --- Membaca ---
+
+    def list_snapshots(self, conn: sqlite3.Connection) -> List[dict]:
+        rows = conn.execute("SELECT id, created_at, consistent, stats FROM snapshots ORDER BY created_at DESC")
+        return [{"id": row["id"], "created_at": row["created_at"], "consistent": bool(row["consistent"]),
+                 **json.loads(row["stats"])} for row in rows]
+
+    def load_manifest(self, conn: sqlite3.Connection, snapshot_id: Optional[str] = None) -> Optional[dict]:
+        """Manifest snapshot tertentu, atau snapshot terbaru jika snapshot_id None."""
+        if snapshot_id is None:
+            row = conn.execute("SELECT manifest FROM snapshots ORDER BY created_at DESC LIMIT 1").fetchone()
+        else:
+            row = conn.execute("SELECT manifest FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return json.loads(gzip.decompress(row["manifest"])) if row else None
+
+    def resolve(self, conn: sqlite3.Connection, recipe_hex: str) -> list:
+        """Potongan file beserta lokasinya di pack, siap dikirim ke restore_file."""
+        row = conn.execute("SELECT data FROM recipes WHERE hash = ?", (bytes.fromhex(recipe_hex),)).fetchone()
+        if row is None:
+            raise BackupError(500, f"Recipe {recipe_hex[:12]} hilang dari store backup.")
+        pieces = []
+        for offset, length, digest in unpack_recipe(row["data"]):
+            chunk = conn.execute("SELECT pack, offset, length, codec FROM chunks WHERE hash = ?", (digest,)).fetchone()
+            if chunk is None:
+                raise BackupError(500, f"Potongan {digest.hex()[:12]} hilang dari store backup.")
+            pieces.append((offset, length, digest, self.pack_path(chunk["pack"]),
+                           chunk["offset"], chunk["length"], chunk["codec"]))
+        return pieces
+
+    # --- Retensi & pembersihan ---
+
+    def get_retention(self, conn: sqlite3.Connection) -> dict:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'retention'").fetchone()
+        return {**DEFAULT_RETENTION, **(json.loads(row["value"]) if row else {})}
+
+    def set_retention(self, conn: sqlite3.Connection, policy: dict):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('retention', ?)", (json.dumps(policy),))
+        conn.commit()
+
+    def expired_snapshots(self, conn: sqlite3.Connection) -> List[str]:
+        """Snapshot yang tidak dipertahankan oleh aturan keep_last / keep_daily / keep_weekly."""
+        policy = self.get_retention(conn)
+        snapshots = conn.execute("SELECT id, created_at FROM snapshots ORDER BY created_at DESC").fetchall()
+        keep = {row["id"] for row in snapshots[:policy["keep_last"]]}
+        for key, bucket in (("keep_daily", "%Y-%m-%d"), ("keep_weekly", "%G-W%V")):
+            seen = []
+            for row in snapshots:
+                label = datetime.fromtimestamp(row["created_at"]).strftime(bucket)
+                if label in seen:
+                    continue
+                if len(seen) >= policy[key]:
+                    break
+                seen.append(label)
+                keep.add(row["id"])  # Snapshot terbaru di setiap hari/minggu
+        return [row["id"] for row in snapshots if row["id"] not in keep]
+
+    def delete_snapshot(self, conn: sqlite3.Connection, snapshot_id: str) -> bool:
+        manifest = self.load_manifest(conn, snapshot_id)
+        if manifest is None:
+            return False
+        conn.executemany("UPDATE recipes SET refs = refs - 1 WHERE hash = ?",
+                         [(bytes.fromhex(entry[3]),) for entry in manifest["files"].values()])
+        conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+        return True
+
+    def collect_garbage(self, conn: sqlite3.Connection) -> dict:
+        """Buang recipe/potongan tanpa referensi, hapus pack kosong, tulis ulang pack yang jarang."""
+        dead_recipes = conn.execute("SELECT hash, data FROM recipes WHERE refs <= 0").fetchall()
+        for row in dead_recipes:
+            conn.executemany("UPDATE chunks SET refs = refs - 1 WHERE hash = ?",
+                             [(digest,) for _, _, digest in unpack_recipe(row["data"])])
+        conn.execute("DELETE FROM recipes WHERE refs <= 0")
+        dead = conn.execute("SELECT pack, COUNT(*) AS n, SUM(length) AS bytes FROM chunks WHERE refs <= 0 GROUP BY pack").fetchall()
+        for row in dead:
+            conn.execute("UPDATE packs SET live_bytes = live_bytes - ? WHERE id = ?", (row["bytes"], row["pack"]))
+        conn.execute("DELETE FROM chunks WHERE refs <= 0")
+        self.sync(conn)
+
+        self.close_pack(conn)
+        current = conn.execute("SELECT value FROM meta WHERE key = 'current_pack'").fetchone()
+        current_id = int(current["value"]) if current else None
+        removed_packs = 0
+        repacked = 0
+        freed = 0
+        for pack in conn.execute("SELECT id, size, live_bytes FROM packs ORDER BY id").fetchall():
+            if pack["id"] == current_id or pack["live_bytes"] >= pack["size"] * REPACK_THRESHOLD:
+                continue
+            if pack["live_bytes"] > 0:
+                with open(self.pack_path(pack["id"]), "rb") as f:
+                    live = conn.execute("SELECT hash, offset, length FROM chunks WHERE pack = ? ORDER BY offset",
+                                        (pack["id"],)).fetchall()
+                    for chunk in live:
+                        f.seek(chunk["offset"])
+                        new_pack, new_offset = self._append(conn, f.read(chunk["length"]))
+                        conn.execute("UPDATE chunks SET pack = ?, offset = ? WHERE hash = ?",
+                                     (new_pack, new_offset, chunk["hash"]))
+                repacked += 1
+            # Index baru harus sudah di disk sebelum pack lama dihapus
+            conn.execute("DELETE FROM packs WHERE id = ?", (pack["id"],))
+            self.sync(conn)
+            os.remove(self.pack_path(pack["id"]))
+            freed += pack["size"] - pack["live_bytes"]
+            removed_packs += 1
+        self.close_pack(conn)
+        return {"dead_recipes": len(dead_recipes), "dead_chunks": sum(row["n"] for row in dead),
+                "removed_packs": removed_packs, "repacked_packs": repacked, "freed_bytes": freed}
+
+    def usage(self, conn: sqlite3.Connection) -> dict:
+        row = conn.execute("SELECT COUNT(*) AS packs, COALESCE(SUM(size), 0) AS size, "
+                           "COALESCE(SUM(live_bytes), 0) AS live FROM packs").fetchone()
+        chunks = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {"packs": row["packs"], "stored_bytes": row["size"], "live_bytes": row["live"], "chunks": chunks}
+
+
+class BackupJob:
+    def __init__(self, server_id: int, server_path: str, kind: str, snapshot_id: Optional[str] = None):
+        self.job_id = uuid.uuid4().hex
+        self.server_id = server_id
+        self.server_path = server_path
+        self.kind = kind  # "backup" atau "restore"
+        self.snapshot_id = snapshot_id
+        self.state = "running"
+        self.phase = "queued"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.files_total = 0
+        self.files_done = 0
+        self.files_skipped = 0   # Tidak dibaca/ditulis karena ukuran+mtime sama
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.result: Optional[dict] = None
+
+    def status(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "state": self.state,
+            "phase": self.phase,
+            "snapshot_id": self.snapshot_id,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "files_skipped": self.files_skipped,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class WorldBackupService:
+    def __init__(self, backup_dir: str = BACKUP_DIR):
+        self.backup_dir = backup_dir
+        self._jobs: "OrderedDict[str, BackupJob]" = OrderedDict()
+        self._busy: Dict[int, str] = {}  # server_id -> job_id atau operasi yang sedang berjalan
+        self._lock = threading.Lock()
+
+    def _store(self, server_id: int) -> BackupStore:
+        return BackupStore(server_id, self.backup_dir)
+
+    def _acquire(self, server_id: int, owner: str):
+        with self._lock:
+            if server_id in self._busy:
+                raise BackupError(409, "Backup atau restore lain sedang berjalan untuk server ini.")
+            self._busy[server_id] = owner
+
+    def is_busy(self, server_id: int) -> bool:
+        return server_id in self._busy
+
+    def is_restoring(self, server_id: int) -> bool:
+        """True jika job restore sedang mengganti file dunia server ini (server tidak boleh di-start)."""
+        with self._lock:
+            job = self._jobs.get(self._busy.get(server_id, ""))
+        return job is not None and job.kind == "restore"
+
+    def _release(self, server_id: int):
+        with self._lock:
+            self._busy.pop(server_id, None)
+
+    def _start(self, job: BackupJob, target, precheck=None) -> BackupJob:
+        self._acquire(job.server_id, job.job_id)
+        if precheck is not None:
+            # Diperiksa setelah slot diambil: route start menolak server yang sedang di-restore
+            try:
+                precheck()
+            except BaseException:
+                self._release(job.server_id)
+                raise
+        with self._lock:
+            self._jobs[job.job_id] = job
+            finished = [job_id for job_id, j in self._jobs.items() if j.state != "running"]
+            for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+                del self._jobs[job_id]
+
+        def run():
+            try:
+                target(job)
+                job.state = "succeeded"
+            except BackupError as e:
+                job.state, job.error = "failed", e.detail
+            except Exception as e:
+                job.state, job.error = "failed", str(e)
+            finally:
+                job.finished_at = time.time()
+                self._release(job.server_id)
+
+        threading.Thread(target=run, name=f"world-{job.kind}-{job.job_id[:8]}", daemon=True).start()
+        return job
+
+    # --- API publik ---
+
+    def start_backup(self, server_id: int, server_path: str, precheck=None) -> BackupJob:
+        """precheck dijalankan setelah slot server diambil dan boleh menolak dengan BackupError."""
+        if not world_dirs(server_path):
+            raise BackupError(404, "Direktori dunia tidak ditemukan. Jalankan server sekali terlebih dahulu.")
+        return self._start(BackupJob(server_id, server_path, "backup"), self._backup, precheck)
+
+    def start_restore(self, server_id: int, server_path: str, snapshot_id: str) -> BackupJob:
+        def require_stopped():
+            process = server_processes.get(server_id)
+            if (process is not None and process.poll() is None) or lifecycle.get_state(server_id)["state"] in ACTIVE_STATES:
+                raise BackupError(409, "Hentikan server sebelum memulihkan backup.")
+
+        require_stopped()
+        store = self._store(server_id)
+        conn = store.connect()
+        try:
+            if conn.execute("SELECT 1 FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone() is None:
+                raise BackupError(404, "Snapshot tidak ditemukan.")
+        finally:
+            conn.close()
+        return self._start(BackupJob(server_id, server_path, "restore", snapshot_id), self._restore, require_stopped)
+
+    def get_job(self, server_id: int, job_id: str) -> BackupJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.server_id != server_id:
+            raise BackupError(404, "Job backup tidak ditemukan.")
+        return job
+
+    def overview(self, server_id: int) -> dict:
+        store = self._store(server_id)
+        conn = store.connect()
+        try:
+            return {
+                "snapshots": store.list_snapshots(conn),
+                "retention": store.get_retention(conn),
+                "store": store.usage(conn),
+                "busy": server_id in self._busy,
+            }
+        finally:
+            conn.close()
+
+    def delete_snapshot(self, server_id: int, snapshot_id: str) -> dict:
+        self._acquire(server_id, "delete")
+        try:
+            store = self._store(server_id)
+            conn = store.connect()
+            try:
+                if not store.delete_snapshot(conn, snapshot_id):
+                    raise BackupError(404, "Snapshot tidak ditemukan.")
+                return store.collect_garbage(conn)
+            finally:
+                conn.close()
+        finally:
+            self._release(server_id)
+
+    def set_retention(self, server_id: int, policy: dict) -> dict:
+        if any(value < 0 for value in policy.values()) or not any(policy.values()):
+            raise BackupError(400, "Aturan retensi harus non-negatif dan menyimpan minimal satu snapshot.")
+        self._acquire(server_id, "retention")
+        try:
+            store = self._store(server_id)
+            conn = store.connect()
+            try:
+                store.set_retention(conn, policy)
+                expired = store.expired_snapshots(conn)
+                for snapshot_id in expired:
+                    store.delete_snapshot(conn, snapshot_id)
+                gc = store.collect_garbage(conn)
+                return {"retention": store.get_retention(conn), "deleted_snapshots": expired, **gc}
+            finally:
+                conn.close()
+        finally:
+            self._release(server_id)
+
+    def drop(self, server_id: int):
+        """Hapus seluruh store backup (misal, saat server dihapus). BackupError 409 jika store sedang dipakai."""
+        self._acquire(server_id, "drop")
+        try:
+            shutil.rmtree(os.path.join(self.backup_dir, str(server_id)), ignore_errors=True)
+        finally:
+            self._release(server_id)
+
+    # --- Konsistensi ---
+
+    def _save_off(self, job: BackupJob) -> bool:
+        """Matikan penyimpanan otomatis dan tunggu sampai dunia selesai di-flush ke disk."""
+        process = server_processes.get(job.server_id)
+        if process is None or process.poll() is not None:
+            return False
+        job.phase = "flushing"
+        buffer = scrollback.get(job.server_id)
+        _, last_seq, _ = buffer.snapshot(limit=0)
+        process.send_command("save-off")
+        process.send_command("save-all flush")
+        deadline = time.monotonic() + SAVE_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            _, seq, lines = buffer.snapshot(since=last_seq)
+            if lines:
+                last_seq = seq
+                if any("Saved the game" in line for line in lines):
+                    return True
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+        self._save_on(job)
+        raise BackupError(504, "Server tidak mengonfirmasi save-all flush; backup dibatalkan.")
+
+    def _save_on(self, job: BackupJob):
+        process = server_processes.get(job.server_id)
+        if process is not None and process.poll() is None:
+            try:
+                process.send_command("save-on")
+            except Exception as e:
+                print(f"Gagal mengirim save-on ke server {job.server_id}: {e}")
+
+    # --- Job ---
+
+    def _backup(self, job: BackupJob):
+        store = self._store(job.server_id)
+        conn = store.connect()
+        try:
+            previous = (store.load_manifest(conn) or {"files": {}})["files"]
+            worlds = world_dirs(job.server_path)
+            flushed = self._save_off(job)
+            manifest = {"worlds": worlds, "dirs": [], "files": {}}
+            uncommitted = [0]
+            try:
+                job.phase = "scanning"
+                tasks = []
+                for world in worlds:
+                    for rel, st in _walk_world(job.server_path, world):
+                        if st is None:
+                            manifest["dirs"].append(rel)
+                            continue
+                        job.files_total += 1
+                        old = previous.get(rel)
+                        if old is not None and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                            manifest["files"][rel] = [st.st_size, st.st_mtime_ns, st.st_mode, old[3]]
+                            job.files_skipped += 1
+                            job.files_done += 1
+                            continue
+                        path = os.path.join(job.server_path, rel)
+                        tasks.append((chunk_file, (store.db_path, path, rel.endswith(".mca")), (rel, st)))
+
+                job.phase = "storing"
+
+                def on_done(context, result):
+                    rel, st = context
+                    size, recipe, new_pieces = result
+                    recipe_hex, written = store.add_file(conn, recipe, new_pieces,
+                                                         os.path.join(job.server_path, rel), rel.endswith(".mca"))
+                    manifest["files"][rel] = [size, st.st_mtime_ns, st.st_mode, recipe_hex]
+                    job.files_done += 1
+                    job.bytes_read += size
+                    job.bytes_written += written
+                    uncommitted[0] += written
+                    if uncommitted[0] >= COMMIT_EVERY_BYTES:
+                        store.sync(conn)
+                        uncommitted[0] = 0
+
+                run_pooled(tasks, on_done)
+            finally:
+                if flushed:
+                    self._save_on(job)
+
+            job.phase = "committing"
+            snapshot_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+            stats = {
+                "files": len(manifest["files"]),
+                "logical_bytes": sum(entry[0] for entry in manifest["files"].values()),
+                "unchanged_files": job.files_skipped,
+                "read_bytes": job.bytes_read,
+                "written_bytes": job.bytes_written,
+                "duration_seconds": round(time.time() - job.started_at, 2),
+            }
+            store.commit_snapshot(conn, snapshot_id, time.time(), flushed, manifest, stats)
+            job.snapshot_id = snapshot_id
+
+            job.phase = "pruning"
+            expired = store.expired_snapshots(conn)
+            for old_id in expired:
+                store.delete_snapshot(conn, old_id)
+            gc = store.collect_garbage(conn)
+            job.result = {**stats, "consistent": flushed, "deleted_snapshots": expired, "gc": gc}
+            job.phase = "done"
+        finally:
+            store.close_pack(conn)
+            conn.close()
+
+    def _restore(self, job: BackupJob):
+        store = self._store(job.server_id)
+        conn = store.connect()
+        try:
+            manifest = store.load_manifest(conn, job.snapshot_id)
+            root = os.path.realpath(job.server_path)
+            files = manifest["files"]
+            job.files_total = len(files)
+            job.phase = "restoring"
+
+            def tasks():
+                for rel, (size, mtime_ns, mode, recipe_hex) in files.items():
+                    dest = os.path.realpath(os.path.join(root, rel))
+                    if not dest.startswith(root + os.sep):
+                        raise BackupError(500, f"Path tidak valid di snapshot: {rel}")
+                    if unchanged_on_disk(dest, size, mtime_ns):
+                        job.files_skipped += 1
+                        job.files_done += 1
+                        continue
+                    pieces = store.resolve(conn, recipe_hex)
+                    yield restore_file, (dest, size, mtime_ns, mode, pieces), size
+
+            def on_done(size, _):
+                job.files_done += 1
+                job.bytes_written += size
+
+            run_pooled(tasks(), on_done)
+
+            # Buang file dan direktori yang tidak ada di snapshot, hanya di dalam direktori dunianya
+            job.phase = "cleaning"
+            keep_dirs = set(manifest["dirs"])
+            removed = 0
+            for world in manifest["worlds"]:
+                os.makedirs(os.path.join(root, world), exist_ok=True)
+                found_dirs = []
+                for rel, st in _walk_world(root, world):
+                    if st is None:
+                        found_dirs.append(rel)
+                    elif rel not in files:
+                        os.remove(os.path.join(root, rel))
+                        removed += 1
+                for rel in sorted(found_dirs, key=len, reverse=True):
+                    if rel not in keep_dirs and not os.listdir(os.path.join(root, rel)):
+                        os.rmdir(os.path.join(root, rel))
+            for rel in manifest["dirs"]:
+                os.makedirs(os.path.join(root, rel), exist_ok=True)
+            job.result = {"restored_files": job.files_done - job.files_skipped,
+                          "unchanged_files": job.files_skipped, "removed_files": removed}
+            job.phase = "done"
+        finally:
+            conn.close()
+
+
+world_backups = WorldBackupService()
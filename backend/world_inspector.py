@@ -0,0 +1,275 @@
+# Analisis file region Anvil (.mca) per server.
+# Header setiap region (region/, entities/, poi/ di setiap dimensi) dibaca lewat mmap
+# di process pool bersama, dalam batch agar overhead per tugas kecil. Ringkasan per file
+# (jumlah chunk, byte data, sektor kosong, fragmen, byte yang bisa diklaim ulang lewat
+# compaction, rentang timestamp) disimpan di world_index/<server_id>.db bersama ukuran
+# dan mtime file, sehingga analisis ulang hanya membaca file yang berubah.
+#
+# Istilah di hasil:
+# - data_bytes        : total panjang data chunk (tanpa padding sektor)
+# - wasted_bytes      : ukuran file dikurangi header dan data_bytes (padding + sektor kosong)
+# - reclaimable_bytes : byte yang hilang jika region ditulis ulang rapat (lihat pemangkasan)
+# - fragments         : jumlah rangkaian sektor kosong di tengah file
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from backend.utils.anvil import analyze_region, analyze_regions, region_coords
+from backend.utils.process_pool import run_pooled
+from backend.world_backup import world_dirs
+
+WORLD_INDEX_DIR = "world_index"
+ANALYSIS_BATCH_SIZE = 64
+REGION_KINDS = ("region", "entities", "poi")
+REGION_SORTS = {
+    "reclaimable": "reclaimable_bytes DESC",
+    "size": "size DESC",
+    "chunks": "chunks DESC",
+    "fragments": "fragments DESC",
+    "oldest": "newest ASC",
+}
+SUMMARY_COLUMNS = ("size", "chunks", "data_bytes", "allocated_bytes", "wasted_bytes", "reclaimable_bytes",
+                   "free_sectors", "fragments", "oldest", "newest", "external", "corrupt")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS regions (
+        path TEXT PRIMARY KEY,
+        dimension TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        x INTEGER NOT NULL,
+        z INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        chunks INTEGER NOT NULL,
+        data_bytes INTEGER NOT NULL,
+        allocated_bytes INTEGER NOT NULL,
+        wasted_bytes INTEGER NOT NULL,
+        reclaimable_bytes INTEGER NOT NULL,
+        free_sectors INTEGER NOT NULL,
+        fragments INTEGER NOT NULL,
+        oldest INTEGER,
+        newest INTEGER,
+        external INTEGER NOT NULL,
+        corrupt INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_regions_dimension ON regions (dimension, kind)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+
+class WorldInspectionError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def region_dirs(server_path: str) -> List[Tuple[str, str, str]]:
+    """(path relatif direktori, dimensi, jenis) untuk setiap direktori region yang ada."""
+    found = []
+    for world in world_dirs(server_path):
+        dimensions = [("", "overworld"), ("DIM-1", "the_nether"), ("DIM1", "the_end")]
+        # Dimensi data pack (1.16+): <world>/dimensions/<namespace>/<nama>/
+        custom_root = os.path.join(server_path, world, "dimensions")
+        if os.path.isdir(custom_root):
+            for namespace in sorted(os.listdir(custom_root)):
+                ns_dir = os.path.join(custom_root, namespace)
+                if os.path.isdir(ns_dir):
+                    for name in sorted(os.listdir(ns_dir)):
+                        dimensions.append((f"dimensions/{namespace}/{name}", f"{namespace}:{name}"))
+        for subdir, dimension in dimensions:
+            for kind in REGION_KINDS:
+                rel = "/".join(part for part in (world, subdir, kind) if part)
+                if os.path.isdir(os.path.join(server_path, rel)):
+                    found.append((rel, dimension, kind))
+    return found
+
+
+class AnalysisJob:
+    def __init__(self, server_id: int):
+        self.job_id = uuid.uuid4().hex
+        self.server_id = server_id
+        self.state = "running"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.regions_total = 0
+        self.regions_changed = 0
+        self.regions_done = 0
+        self.regions_removed = 0
+
+    def status(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "regions_total": self.regions_total,
+            "regions_changed": self.regions_changed,
+            "regions_done": self.regions_done,
+            "regions_removed": self.regions_removed,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class WorldInspector:
+    def __init__(self, index_dir: str = WORLD_INDEX_DIR):
+        self.index_dir = index_dir
+        self._jobs: Dict[int, AnalysisJob] = {}  # Job terakhir per server
+        self._lock = threading.Lock()
+
+    def _connect(self, server_id: int) -> sqlite3.Connection:
+        os.makedirs(self.index_dir, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.index_dir, f"{server_id}.db"))
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    # --- Analisis ---
+
+    def start(self, server_id: int, server_path: str) -> AnalysisJob:
+        with self._lock:
+            current = self._jobs.get(server_id)
+            if current is not None and current.state == "running":
+                raise WorldInspectionError(409, "Analisis dunia sedang berjalan untuk server ini.")
+            job = self._jobs[server_id] = AnalysisJob(server_id)
+        threading.Thread(target=self._run, args=(job, server_path), name=f"world-analysis-{server_id}",
+                         daemon=True).start()
+        return job
+
+    def _run(self, job: AnalysisJob, server_path: str):
+        try:
+            self._analyze(job, server_path)
+            job.state = "succeeded"
+        except Exception as e:
+            job.state, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _analyze(self, job: AnalysisJob, server_path: str):
+        conn = self._connect(job.server_id)
+        try:
+            cached = {row["path"]: (row["size"], row["mtime_ns"])
+                      for row in conn.execute("SELECT path, size, mtime_ns FROM regions")}
+            on_disk = {}
+            changed = []
+            for rel_dir, dimension, kind in region_dirs(server_path):
+                with os.scandir(os.path.join(server_path, rel_dir)) as it:
+                    for entry in it:
+                        coords = region_coords(entry.name)
+                        if coords is None or not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat()
+                        rel = f"{rel_dir}/{entry.name}"
+                        on_disk[rel] = (dimension, kind, coords, st.st_mtime_ns)
+                        if cached.get(rel) != (st.st_size, st.st_mtime_ns):
+                            changed.append(rel)
+            job.regions_total = len(on_disk)
+            job.regions_changed = len(changed)
+
+            removed = [(rel,) for rel in cached if rel not in on_disk]
+            conn.executemany("DELETE FROM regions WHERE path = ?", removed)
+            job.regions_removed = len(removed)
+            conn.commit()
+
+            batches = (
+                (analyze_regions, ([os.path.join(server_path, rel) for rel in batch],), batch)
+                for batch in (changed[i:i + ANALYSIS_BATCH_SIZE] for i in range(0, len(changed), ANALYSIS_BATCH_SIZE))
+            )
+            columns = ("path", "dimension", "kind", "x", "z", "mtime_ns") + SUMMARY_COLUMNS
+            insert = f"INSERT OR REPLACE INTO regions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+            def on_done(batch, results):
+                rows = []
+                for rel, (_, summary) in zip(batch, results):
+                    if summary is None:
+                        continue  # File hilang/terkunci di tengah analisis; dicoba lagi lain kali
+                    dimension, kind, (x, z), mtime_ns = on_disk[rel]
+                    rows.append((rel, dimension, kind, x, z, mtime_ns) + tuple(summary[c] for c in SUMMARY_COLUMNS))
+                conn.executemany(insert, rows)
+                conn.commit()
+                job.regions_done += len(batch)
+
+            run_pooled(batches, on_done)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('analyzed_at', ?)", (str(time.time()),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --- Hasil ---
+
+    def summary(self, server_id: int) -> dict:
+        conn = self._connect(server_id)
+        try:
+            totals = "COUNT(*) AS regions, " + ", ".join(
+                f"{'MIN' if c == 'oldest' else 'MAX' if c == 'newest' else 'SUM'}({c}) AS {c}" for c in SUMMARY_COLUMNS
+            )
+            overall = dict(conn.execute(f"SELECT {totals} FROM regions").fetchone())
+            groups = [dict(row) for row in conn.execute(
+                f"SELECT dimension, kind, {totals} FROM regions GROUP BY dimension, kind ORDER BY dimension, kind"
+            )]
+            analyzed = conn.execute("SELECT value FROM meta WHERE key = 'analyzed_at'").fetchone()
+        finally:
+            conn.close()
+        job = self._jobs.get(server_id)
+        return {
+            "analyzed_at": float(analyzed["value"]) if analyzed else None,
+            "totals": overall,
+            "dimensions": groups,
+            "job": job.status() if job else None,
+        }
+
+    def regions(self, server_id: int, dimension: Optional[str] = None, kind: Optional[str] = None,
+                sort: str = "reclaimable", limit: int = 100, offset: int = 0) -> List[dict]:
+        if sort not in REGION_SORTS:
+            raise WorldInspectionError(400, f"Urutan tidak dikenal. Pilihan: {', '.join(REGION_SORTS)}")
+        where, params = [], []
+        if dimension:
+            where.append("dimension = ?")
+            params.append(dimension)
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        sql = "SELECT * FROM regions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {REGION_SORTS[sort]}, path LIMIT ? OFFSET ?"
+        conn = self._connect(server_id)
+        try:
+            return [dict(row) for row in conn.execute(sql, params + [max(1, min(limit, 1000)), max(0, offset)])]
+        finally:
+            conn.close()
+
+    def region_detail(self, server_path: str, rel_path: str) -> dict:
+        """Daftar chunk satu region (ukuran terkompresi, sektor, timestamp, koordinat global)."""
+        root = os.path.realpath(server_path)
+        path = os.path.realpath(os.path.join(root, rel_path))
+        coords = region_coords(os.path.basename(path))
+        if not path.startswith(root + os.sep) or coords is None:
+            raise WorldInspectionError(400, "Path harus menunjuk ke file region r.<x>.<z>.mca di dalam server.")
+        if not os.path.isfile(path):
+            raise WorldInspectionError(404, "File region tidak ditemukan.")
+        result = analyze_region(path, with_chunks=True)
+        for chunk in result["chunk_list"]:
+            chunk["chunk_x"] = coords[0] * 32 + chunk["local_x"]
+            chunk["chunk_z"] = coords[1] * 32 + chunk["local_z"]
+        result["chunks_detail"] = result.pop("chunk_list")
+        result["x"], result["z"] = coords
+        return result
+
+    def drop(self, server_id: int):
+        with self._lock:
+            self._jobs.pop(server_id, None)
+        path = os.path.join(self.index_dir, f"{server_id}.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+world_inspector = WorldInspector()
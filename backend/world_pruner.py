@@ -0,0 +1,191 @@
+# Pemangkasan dunia offline: membuang chunk yang hampir tidak pernah dikunjungi
+# (InhabitedTime rendah) atau yang berada di luar area yang dipertahankan, lalu menulis
+# ulang file region (.mca) tanpa sektor kosong. Hanya boleh berjalan saat server berhenti,
+# dan server tidak bisa di-start selama pemangkasan berjalan. Mode dry run membaca dunia
+# yang sama dan melaporkan byte yang akan dibebaskan tanpa mengubah file apa pun.
+# Pekerjaan per region berjalan di process pool bersama (lihat utils/region_pruner.py).
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from backend.shared_state import server_processes
+from backend.utils.anvil import region_coords
+from backend.utils.process_pool import run_pooled
+from backend.utils.region_pruner import prune_region_group
+from backend.utils.server_control import lifecycle
+from backend.world_backup import ACTIVE_STATES, world_backups
+from backend.world_inspector import region_dirs
+
+FINISHED_JOBS_KEPT = 50
+RESULT_COUNTERS = ("files", "rewritten", "deleted", "chunks_removed", "chunks_kept",
+                   "unreadable_chunks", "bytes_before", "bytes_after")
+
+
+class PruneError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class PruneJob:
+    def __init__(self, server_id: int, server_path: str, rules: dict, dimensions: Optional[List[str]],
+                 dry_run: bool, compact: bool):
+        self.job_id = uuid.uuid4().hex
+        self.server_id = server_id
+        self.server_path = server_path
+        self.rules = rules
+        self.dimensions = dimensions
+        self.dry_run = dry_run
+        self.compact = compact
+        self.state = "running"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.regions_total = 0
+        self.regions_done = 0
+        self.totals = dict.fromkeys(RESULT_COUNTERS, 0)
+        self.by_dimension: Dict[str, dict] = {}
+        self.skipped: List[dict] = []
+
+    def status(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "dry_run": self.dry_run,
+            "compact": self.compact,
+            "rules": self.rules,
+            "dimensions": self.dimensions,
+            "regions_total": self.regions_total,
+            "regions_done": self.regions_done,
+            "totals": {**self.totals, "reclaimed_bytes": self.totals["bytes_before"] - self.totals["bytes_after"]},
+            "by_dimension": {
+                dimension: {**counters, "reclaimed_bytes": counters["bytes_before"] - counters["bytes_after"]}
+                for dimension, counters in self.by_dimension.items()
+            },
+            "skipped": self.skipped,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class WorldPruner:
+    def __init__(self):
+        self._jobs: "OrderedDict[str, PruneJob]" = OrderedDict()
+        self._busy: Dict[int, PruneJob] = {}  # server_id -> job yang sedang berjalan
+        self._lock = threading.Lock()
+
+    def is_rewriting(self, server_id: int) -> bool:
+        """True jika pemangkasan (bukan dry run) sedang mengubah file dunia server ini."""
+        job = self._busy.get(server_id)
+        return job is not None and not job.dry_run
+
+    def _release(self, server_id: int):
+        with self._lock:
+            self._busy.pop(server_id, None)
+
+    def start(self, server_id: int, server_path: str, rules: dict, dimensions: Optional[List[str]] = None,
+              dry_run: bool = True, compact: bool = True) -> PruneJob:
+        has_rule = (rules.get("min_inhabited_ticks") is not None or rules.get("radius") is not None
+                    or bool(rules.get("polygon")))
+        if not has_rule and not compact:
+            raise PruneError(400, "Tentukan aturan pemangkasan (min_inhabited_ticks, radius, atau polygon) "
+                                  "atau aktifkan compact.")
+        if rules.get("polygon") is not None and len(rules["polygon"]) < 3:
+            raise PruneError(400, "Poligon membutuhkan minimal 3 titik.")
+        groups = self._region_groups(server_path, dimensions)
+        if not groups:
+            raise PruneError(404, "File region tidak ditemukan. Jalankan server sekali terlebih dahulu.")
+
+        job = PruneJob(server_id, server_path, rules, dimensions, dry_run, compact)
+        with self._lock:
+            if server_id in self._busy:
+                raise PruneError(409, "Pemangkasan dunia lain sedang berjalan untuk server ini.")
+            # Slot diambil sebelum memeriksa state server: route start menolak server yang sedang dipangkas
+            self._busy[server_id] = job
+        if not dry_run:
+            process = server_processes.get(server_id)
+            if (process is not None and process.poll() is None) or lifecycle.get_state(server_id)["state"] in ACTIVE_STATES:
+                self._release(server_id)
+                raise PruneError(409, "Hentikan server sebelum memangkas dunia.")
+            if world_backups.is_busy(server_id):
+                self._release(server_id)
+                raise PruneError(409, "Tunggu backup atau restore yang sedang berjalan selesai.")
+        with self._lock:
+            self._jobs[job.job_id] = job
+            finished = [job_id for job_id, j in self._jobs.items() if j.state != "running"]
+            for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+                del self._jobs[job_id]
+
+        def run():
+            try:
+                self._prune(job, groups)
+                job.state = "succeeded"
+            except Exception as e:
+                job.state, job.error = "failed", str(e)
+            finally:
+                job.finished_at = time.time()
+                self._release(server_id)
+
+        threading.Thread(target=run, name=f"world-prune-{job.job_id[:8]}", daemon=True).start()
+        return job
+
+    def get_job(self, server_id: int, job_id: str) -> PruneJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.server_id != server_id:
+            raise PruneError(404, "Job pemangkasan tidak ditemukan.")
+        return job
+
+    def list_jobs(self, server_id: int) -> List[dict]:
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.server_id == server_id]
+        return [job.status() for job in reversed(jobs)]
+
+    def drop(self, server_id: int):
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.server_id == server_id]:
+                if self._jobs[job_id].state != "running":
+                    del self._jobs[job_id]
+
+    @staticmethod
+    def _region_groups(server_path: str, dimensions: Optional[List[str]]) -> List[tuple]:
+        """(dimensi, x, z, {jenis: path}) untuk setiap posisi region; entities/poi ikut region terrain-nya."""
+        groups: Dict[tuple, dict] = {}
+        for rel_dir, dimension, kind in region_dirs(server_path):
+            if dimensions and dimension not in dimensions:
+                continue
+            dimension_root = os.path.dirname(rel_dir)
+            directory = os.path.join(server_path, rel_dir)
+            for name in os.listdir(directory):
+                coords = region_coords(name)
+                if coords is not None and os.path.isfile(os.path.join(directory, name)):
+                    key = (dimension_root, dimension) + coords
+                    groups.setdefault(key, {})[kind] = os.path.join(directory, name)
+        return [(dimension, x, z, files) for (_, dimension, x, z), files in sorted(groups.items())]
+
+    def _prune(self, job: PruneJob, groups: List[tuple]):
+        job.regions_total = len(groups)
+        tasks = (
+            (prune_region_group, (files, x, z, job.rules, job.dry_run, job.compact), dimension)
+            for dimension, x, z, files in groups
+        )
+
+        def on_done(dimension, result):
+            counters = job.by_dimension.setdefault(dimension, dict.fromkeys(RESULT_COUNTERS, 0))
+            for key in RESULT_COUNTERS:
+                counters[key] += result[key]
+                job.totals[key] += result[key]
+            job.skipped.extend({"path": os.path.relpath(path, job.server_path), "reason": reason}
+                               for path, reason in result["skipped"])
+            job.regions_done += 1
+
+        run_pooled(tasks, on_done)
+
+
+world_pruner = WorldPruner()
@@ -1,26 +1,48 @@
-
-from fastapi import WebSocket, WebSocketDisconnect, APIRouter
 import asyncio
 import os
 
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+
+from backend import auth
+from backend.dependencies import get_owned_server
+from backend.log_tailer import log_tailers
+
 router = APIRouter()
 clients = set()
 
-@router.websocket("/ws/log")
-async def websocket_log_endpoint(websocket: WebSocket):
+
+def server_log_path(server_path: str) -> str:
+    return os.path.join(server_path, "logs", "latest.log")
+
+
+@router.websocket("/ws/logfile/{server_id}")
+async def websocket_log_file_endpoint(websocket: WebSocket, server_id: int, token: str = Query(...)):
+    """Mengalirkan baris baru logs/latest.log milik server (termasuk server yang dijalankan di luar panel)."""
+    try:
+        user = await auth.get_current_user(token)
+    except HTTPException:
+        user = None
+    if not user:
+        await websocket.close(code=1008, reason="Token tidak valid")
+        return
+    server_data = await asyncio.to_thread(get_owned_server, user.username, server_id)
+    if not server_data:
+        await websocket.close(code=1008, reason="Server tidak ditemukan atau Anda tidak memiliki akses.")
+        return
+
+    log_path = server_log_path(server_data["path"])
     await websocket.accept()
     clients.add(websocket)
+    # Semua klien server yang sama berbagi satu tailer; baris dikirim begitu inotify membangunkannya
+    queue = log_tailers.subscribe(log_path)
     try:
-        log_path = "server/logs/latest.log"
         if not os.path.exists(log_path):
             await websocket.send_text("Log file not found.")
-            return
-        with open(log_path, "r") as log_file:
-            log_file.seek(0, os.SEEK_END)
-            while True:
-                line = log_file.readline()
-                if line:
-                    await websocket.send_text(line)
-                await asyncio.sleep(0.5)
+        while True:
+            line = await queue.get()
+            await websocket.send_text(line)
     except WebSocketDisconnect:
-        clients.remove(websocket)
+        pass
+    finally:
+        log_tailers.unsubscribe(log_path, queue)
+        clients.discard(websocket)
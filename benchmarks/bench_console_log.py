@@ -0,0 +1,92 @@
+"""
+Benchmark log konsol terstruktur.
+
+Mengisi store dengan N baris konsol sintetis (chat, join/leave, peringatan lag, error)
+yang tersebar dalam 30 hari lewat jalur penulisan yang sama dengan aliran langsung,
+lalu mengukur latensi query yang umum (target: hitungan milidetik, misal semua
+peringatan lag seminggu terakhir).
+
+Jalankan dari root repositori:
+    python benchmarks/bench_console_log.py --lines 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.console_log import ConsoleLogStore, LIVE_ORIGIN, _row  # noqa: E402
+from backend.utils.log_parser import LogLineParser  # noqa: E402
+
+PLAYERS = [f"Player{i}" for i in range(200)]
+
+
+def synthetic_line(rnd: random.Random, ts: float) -> str:
+    clock = time.strftime("%H:%M:%S", time.localtime(ts))
+    roll = rnd.random()
+    if roll < 0.002:
+        return f"[{clock}] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running {rnd.randint(2000, 9000)}ms or 60 ticks behind"
+    if roll < 0.01:
+        return f"[{clock}] [Server thread/INFO]: {rnd.choice(PLAYERS)} {rnd.choice(['joined', 'left'])} the game"
+    if roll < 0.012:
+        return f"[{clock}] [Server thread/ERROR]: Exception ticking world {rnd.randint(0, 10 ** 6)}"
+    if roll < 0.6:
+        return f"[{clock}] [Server thread/INFO]: <{rnd.choice(PLAYERS)}> pesan acak nomor {rnd.randint(0, 10 ** 6)}"
+    return f"[{clock}] [Server thread/INFO]: Saved the game ({rnd.randint(0, 10 ** 6)} chunks)"
+
+
+def timed(label: str, func, repeat: int = 20):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    print(f"{label:<40} p50={durations[len(durations) // 2] * 1000:7.2f} ms  "
+          f"max={durations[-1] * 1000:7.2f} ms  hasil={len(result['records'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-console-log-")
+    try:
+        store = ConsoleLogStore(log_dir=workdir, retention_days=3650)
+        rnd = random.Random(1)
+        now = time.time()
+        span = 30 * 86400
+        line_parser = LogLineParser()
+        started = time.perf_counter()
+        pending = {}
+        for i in range(0, args.lines, args.batch):
+            rows = []
+            for j in range(i, min(i + args.batch, args.lines)):
+                ts = now - span + span * j / args.lines
+                record = line_parser.parse(synthetic_line(rnd, ts), ts)
+                rows.append(_row(record, LIVE_ORIGIN))
+            pending[0] = rows
+            store._write(pending)
+        elapsed = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+        print(f"lines={args.lines} ingest={elapsed:.1f} s ({args.lines / elapsed:,.0f} baris/s)  db={size / 2 ** 20:.1f} MB")
+
+        week_ago = now - 7 * 86400
+        timed("lag seminggu terakhir (100 teratas)", lambda: store.query(0, since=week_ago, events=["lag"], limit=100))
+        timed("lag seminggu terakhir (semua)", lambda: store.query(0, since=week_ago, events=["lag"], limit=1000))
+        timed("ERROR hari ini", lambda: store.query(0, since=now - 86400, levels=["ERROR"]))
+        timed("pemain Player7 (100 teratas)", lambda: store.query(0, player="Player7"))
+        timed("teks penuh 'Exception ticking'", lambda: store.query(0, text="Exception ticking"))
+        timed("halaman terbaru tanpa filter", lambda: store.query(0))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
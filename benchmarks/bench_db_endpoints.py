@@ -0,0 +1,90 @@
+"""
+Benchmark beban untuk endpoint yang sering dipolling dasbor.
+
+Membuat database sementara berisi satu pengguna dan beberapa server, lalu
+menjalankan sejumlah klien bersamaan terhadap aplikasi FastAPI (in-process
+lewat ASGITransport) dan melaporkan latensi p50/p99 untuk:
+    GET /servers/{id}/status
+    GET /servers
+
+Jalankan dari root repositori:
+    python benchmarks/bench_db_endpoints.py --clients 200 --requests 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def hammer(client, path, headers, clients, requests_per_client):
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+async def run(clients: int, requests_per_client: int, server_count: int):
+    import httpx
+    from backend import auth, repositories
+    from backend.main import app
+
+    user_id = repositories.users.create("bench", auth.get_password_hash("bench"), "servers/bench")
+    server_ids = [
+        repositories.servers.create(user_id, f"srv{i}", "1.20.4", os.path.join("servers", "bench", f"srv{i}"))
+        for i in range(server_count)
+    ]
+    token = auth.create_access_token({"sub": "bench"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, path in (
+            ("status", f"/servers/{server_ids[0]}/status"),
+            ("list", "/servers"),
+        ):
+            latencies, errors, elapsed = await hammer(client, path, headers, clients, requests_per_client)
+            print(f"{label:<8} {len(latencies)} req in {elapsed:.2f}s "
+                  f"({len(latencies) / elapsed:.0f} req/s)  "
+                  f"p50={statistics.median(latencies):.1f}ms  "
+                  f"p99={percentile(latencies, 99):.1f}ms  errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="Request per klien per endpoint")
+    parser.add_argument("--servers", type=int, default=5)
+    args = parser.parse_args()
+
+    # Jalankan di direktori sementara agar database asli tidak tersentuh
+    workdir = tempfile.mkdtemp(prefix="mc-bench-")
+    os.chdir(workdir)
+    asyncio.run(run(args.clients, args.requests, args.servers))
+
+
+if __name__ == "__main__":
+    main()
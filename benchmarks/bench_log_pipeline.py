@@ -0,0 +1,97 @@
+"""
+Benchmark pipeline log konsol.
+
+Menjalankan proses "java" palsu (skrip Python) yang mencetak baris log dengan
+laju tertentu, membacanya memakai stream_process_output yang sama dengan server asli,
+lalu mengukur berapa baris yang sampai ke sink beserta statistik pipeline.
+
+Jalankan dari root repositori:
+    python benchmarks/bench_log_pipeline.py --rate 50000 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.log_pipeline import LogPipeline  # noqa: E402
+from backend.utils import server_control  # noqa: E402
+
+FAKE_JAVA = r"""
+import sys, time
+rate, seconds = int(sys.argv[1]), float(sys.argv[2])
+line = "[12:00:00] [Server thread/INFO]: Preparing spawn area: 42%%  #%d\n"
+out = sys.stdout
+start = time.perf_counter()
+n = 0
+total = int(rate * seconds)
+while n < total:
+    target = int((time.perf_counter() - start) * rate) + 1
+    while n < min(target, total):
+        out.write(line % n)
+        n += 1
+    out.flush()
+    time.sleep(0.001)
+"""
+
+
+async def run(rate: int, seconds: float, servers: int):
+    pipeline = LogPipeline()
+    received = {"lines": 0, "frames": 0}
+
+    async def sink(server_id: int, lines: list):
+        received["frames"] += 1
+        received["lines"] += len(lines)
+
+    # Ganti pipeline global yang dipakai stream_process_output dengan instance benchmark
+    server_control.log_pipeline = pipeline
+    pipeline.start(sink)
+
+    per_server_rate = max(1, rate // servers)
+    readers = []
+    started = time.perf_counter()
+    for server_id in range(servers):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", FAKE_JAVA, str(per_server_rate), str(seconds),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            stdin=asyncio.subprocess.PIPE, limit=server_control.MAX_LINE_BYTES,
+        )
+        readers.append((asyncio.create_task(server_control.stream_process_output(server_id, process)), process))
+
+    await asyncio.gather(*(reader for reader, _ in readers))
+    # Tunggu sampai sisa antrean terkirim
+    await asyncio.sleep(pipeline.flush_interval * 4)
+    elapsed = time.perf_counter() - started
+    await pipeline.stop()
+
+    for _, process in readers:
+        await process.wait()
+
+    totals = {"queued": 0, "dropped": 0, "coalesced": 0, "sent": 0, "frames": 0}
+    for server_id in range(servers):
+        for key, value in pipeline.get_stats(server_id).items():
+            if key in totals:
+                totals[key] += value
+
+    print(f"servers            : {servers}")
+    print(f"target rate        : {rate} baris/detik")
+    print(f"elapsed            : {elapsed:.2f} s")
+    print(f"lines received     : {received['lines']} ({received['lines'] / elapsed:.0f} baris/detik)")
+    print(f"frames received    : {received['frames']}")
+    print(f"queued/dropped     : {totals['queued']}/{totals['dropped']}")
+    print(f"coalesced          : {totals['coalesced']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=50000, help="Total baris per detik")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--servers", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args.rate, args.seconds, args.servers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark lonjakan login.
+
+Mengirim sejumlah login bersamaan ke /token sambil terus mengukur latensi
+"konsol": waktu dari broadcast_lines sampai frame diterima oleh klien
+WebSocket palsu di ConnectionManager. Dengan bcrypt di executor terbatas,
+latensi konsol harus tetap datar selama lonjakan. Opsi --inline menjalankan
+bcrypt langsung di event loop (perilaku lama) sebagai pembanding.
+
+Jalankan dari root repositori:
+    python benchmarks/bench_login_burst.py --logins 100
+    python benchmarks/bench_login_burst.py --logins 100 --inline
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+CONSOLE_SERVER_ID = 1
+PROBE_INTERVAL = 0.02
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = asyncio.Queue()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.received.put_nowait(time.perf_counter())
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+async def probe_console(manager, websocket, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        sent = time.perf_counter()
+        await manager.broadcast_lines(CONSOLE_SERVER_ID, ["[Server thread/INFO]: tick\n"])
+        delivered = await websocket.received.get()
+        latencies.append((delivered - sent) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def run(logins: int, inline: bool):
+    import httpx
+    from backend import auth, repositories
+    from backend.main import app
+    from backend.routes.websocket import manager
+
+    repositories.users.create("burst", auth.get_password_hash("burst-password"), "servers/burst")
+    if inline:
+        async def verify_inline(plain, hashed):
+            return auth.verify_password(plain, hashed)
+        auth.password_hasher.verify = verify_inline
+
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, CONSOLE_SERVER_ID, replay_lines=0)
+
+    baseline, during = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_console(manager, websocket, stop, baseline))
+    await asyncio.sleep(1.0)
+    stop.set()
+    await probe
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_console(manager, websocket, stop, during))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/token", data={"username": "burst", "password": "burst-password"})
+            for _ in range(logins)
+        ))
+        elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    codes = {}
+    for response in responses:
+        codes[response.status_code] = codes.get(response.status_code, 0) + 1
+
+    print(f"mode               : {'inline (event loop)' if inline else 'executor'}")
+    print(f"logins             : {logins} dalam {elapsed:.2f}s, status {codes}")
+    print(f"console idle       : p50={statistics.median(baseline):.2f}ms  max={max(baseline):.2f}ms")
+    print(f"console burst      : p50={statistics.median(during):.2f}ms  max={max(during):.2f}ms")
+    print(f"hash stats         : {auth.password_hasher.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--inline", action="store_true", help="Jalankan bcrypt di event loop (perilaku lama)")
+    args = parser.parse_args()
+
+    # Jalankan di direktori sementara agar database asli tidak tersentuh
+    os.chdir(tempfile.mkdtemp(prefix="mc-bench-"))
+    asyncio.run(run(args.logins, args.inline))
+
+
+if __name__ == "__main__":
+    main()
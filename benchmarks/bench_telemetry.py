@@ -0,0 +1,56 @@
+"""
+Benchmark sampler telemetri.
+
+Menjalankan N proses `sleep` sebagai pengganti server, mendaftarkannya ke
+server_processes, lalu mengukur durasi satu putaran sample_once dan waktu CPU
+yang dipakai per detik pada interval 1 detik (target: < 1% satu core untuk 200 server).
+
+Jalankan dari root repositori:
+    python benchmarks/bench_telemetry.py --servers 200 --passes 30
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.shared_state import server_processes  # noqa: E402
+from backend.telemetry import ResourceSampler  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", type=int, default=200)
+    parser.add_argument("--passes", type=int, default=30)
+    args = parser.parse_args()
+
+    processes = [subprocess.Popen(["sleep", "600"]) for _ in range(args.servers)]
+    try:
+        for i, process in enumerate(processes):
+            server_processes[i] = process
+        sampler = ResourceSampler(interval=1.0)
+        sampler.sample_once()  # Sampel acuan
+
+        cpu_started = time.process_time()
+        durations = []
+        for _ in range(args.passes):
+            sampler.sample_once()
+            durations.append(sampler.last_pass_seconds)
+        cpu_per_pass = (time.process_time() - cpu_started) / args.passes
+
+        durations.sort()
+        print(f"servers={args.servers} passes={args.passes}")
+        print(f"pass p50={durations[len(durations) // 2] * 1000:.2f} ms  max={durations[-1] * 1000:.2f} ms")
+        print(f"cpu per pass={cpu_per_pass * 1000:.2f} ms  => {cpu_per_pass / sampler.interval * 100:.3f}% core pada interval 1 s")
+        print(f"titik tersimpan server 0: {len(sampler.query(0)['points'])}")
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+        server_processes.clear()
+
+
+if __name__ == "__main__":
+    main()